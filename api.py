@@ -1,10 +1,32 @@
-from flask import Blueprint, jsonify, request
+import base64
+import binascii
+import json
+import os
+
+from flask import Blueprint, request, url_for, current_app, Response, stream_with_context, make_response
 from sqlalchemy.exc import SQLAlchemyError
 
-from datamanager.sqllite_data_magager import SQLiteDataManager
+from datamanager.data_models import ReviewStats
+from datamanager.enrichment import EnrichmentQueueFull
+from datamanager.omdb_client import OMDbUnavailableError
+from datamanager.cascade import DELETABLE
+from datamanager.leaderboards import TRENDING_PERIODS
+from datamanager.query_budget import exempt_from_statement_budget
+from datamanager.export import EXPORT_COLUMNS, EXPORT_FORMATS, csv_chunks, gzip_chunks, ndjson_chunks
+from datamanager.search import SEARCH_KINDS
+from datamanager.versions import USERS, USER
+from datamanager.sqllite_data_magager import SQLiteDataManager, USER_FIELDS, MOVIE_FIELDS, MOVIE_LIST_PLAN
+from serialization import compress_response, negotiate, serialize
 
 api = Blueprint('api', __name__)
 data_manager = None
+BATCH_MAX_TITLES = int(os.getenv('BATCH_MAX_TITLES', 10000))
+BATCH_MAX_DELETES = int(os.getenv('BATCH_MAX_DELETES', 100000))
+NDJSON_MIMETYPE = 'application/x-ndjson'
+DEFAULT_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+HTTP_CACHE_MAX_AGE = int(os.getenv('HTTP_CACHE_MAX_AGE', 0))
+HTTP_CACHE_SHARED_MAX_AGE = int(os.getenv('HTTP_CACHE_SHARED_MAX_AGE', 0))
 
 
 def init_data_manager(data_manager_app):
@@ -18,57 +40,263 @@ def init_data_manager(data_manager_app):
     data_manager = data_manager_app
 
 
+def respond(body):
+    """
+    Build an API response in the format the client asked for (see serialization.negotiate).
+
+    Args:
+        body (dict or list): The response body.
+
+    Returns:
+        Response: A 200 response; return it with a status as (respond(body), status) for others.
+    """
+    mimetype = negotiate(request.accept_mimetypes)
+    response = Response(serialize(body, mimetype), mimetype=mimetype)
+    response.vary.add('Accept')
+    return response
+
+
+@api.after_request
+def compress_api_response(response):
+    """Compress API responses for clients that accept gzip or Brotli."""
+    return compress_response(response, request.accept_encodings)
+
+
+def movie_to_dict(movie):
+    """Serialize a movie the way every API endpoint returns it."""
+    return {
+        "movie_id": movie.movie_id,
+        "title": movie.movie_name,
+        "director": movie.director,
+        "year": movie.year,
+        "rating": movie.rating
+    }
+
+
+def review_stats_to_dict(stats):
+    """Serialize review aggregates; stats may be None for something never reviewed."""
+    if stats is None:
+        return {"review_count": 0, "average_rating": None,
+                "histogram": {str(bucket): 0 for bucket in range(1, 11)}}
+    return {
+        "review_count": stats.review_count,
+        "average_rating": stats.average_rating,
+        "histogram": {str(bucket): count for bucket, count in stats.histogram.items()}
+    }
+
+
+def wants_async(data=None):
+    """
+    Decide whether a movie should be added asynchronously.
+
+    The ?async= query parameter or an "async" field in the JSON body wins;
+    otherwise the app's ASYNC_ENRICHMENT setting decides.
+    """
+    flag = request.args.get('async')
+    if flag is None and data:
+        flag = data.get('async')
+    if flag is None:
+        return current_app.config.get('ASYNC_ENRICHMENT', False)
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+
+def encode_cursor(after_id):
+    """Turn the last ID of a page into an opaque cursor string."""
+    return base64.urlsafe_b64encode(str(after_id).encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Turn a cursor string back into the ID to continue after.
+
+    Raises:
+        ValueError: If the cursor is not one produced by encode_cursor.
+    """
+    try:
+        return int(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode())
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor: {cursor}")
+
+
+def read_page_args(allowed_fields, args=None):
+    """
+    Read the limit, cursor and fields query parameters of a list endpoint.
+
+    Args:
+        allowed_fields (dict): The fields that may be requested with fields=.
+        args (MultiDict, optional): The query parameters; those of the current request by default.
+
+    Returns:
+        tuple: (after_id, limit, fields)
+
+    Raises:
+        ValueError: If a parameter is invalid.
+    """
+    args = request.args if args is None else args
+    limit = args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be a number between 1 and {MAX_PAGE_SIZE}")
+
+    cursor = args.get('cursor')
+    after_id = decode_cursor(cursor) if cursor else None
+
+    fields = args.get('fields')
+    if not fields:
+        return after_id, limit, list(allowed_fields)
+    fields = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = [field for field in fields if field not in allowed_fields]
+    if unknown or not fields:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(allowed_fields)}")
+    return after_id, limit, fields
+
+
+def page_links(next_after_id):
+    """
+    Build the pagination part of a list response.
+
+    Returns:
+        tuple: (body, headers) with the next cursor and URL, and a Link header if there is a next page.
+    """
+    if next_after_id is None:
+        return {"next_cursor": None, "next": None}, {}
+
+    cursor = encode_cursor(next_after_id)
+    args = request.args.to_dict()
+    args['cursor'] = cursor
+    next_url = url_for(request.endpoint, **request.view_args, **args)
+    return {"next_cursor": cursor, "next": next_url}, {'Link': f'<{next_url}>; rel="next"'}
+
+
+def validators(scope, subject_id):
+    """
+    Build the ETag and Last-Modified of a cacheable list from its version counter.
+
+    Returns:
+        tuple: (etag, last_modified), last_modified being None before the first write.
+    """
+    return version_validators(scope, subject_id, *data_manager.get_data_version(scope, subject_id))
+
+
+def version_validators(scope, subject_id, version, updated_at):
+    """Build the validators of validators() from an already read version counter."""
+    stamp = int(updated_at.timestamp() * 1000) if updated_at else 0
+    return f"{scope}-{subject_id}-{version}-{stamp}", updated_at
+
+
+def cacheable(response, etag, last_modified):
+    """Add validators and Cache-Control to a response so clients and proxies can revalidate it."""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.public = True
+    response.cache_control.max_age = HTTP_CACHE_MAX_AGE
+    if HTTP_CACHE_SHARED_MAX_AGE:
+        response.cache_control.s_maxage = HTTP_CACHE_SHARED_MAX_AGE
+    if not HTTP_CACHE_MAX_AGE:
+        response.cache_control.must_revalidate = True
+    return response
+
+
+def not_modified(etag, last_modified):
+    """
+    Answer a conditional request whose copy is still current.
+
+    Returns:
+        Response or None: A 304 response if If-None-Match or If-Modified-Since
+        match the validators, else None and the full response has to be built.
+    """
+    response = cacheable(Response(), etag, last_modified)
+    response.make_conditional(request)
+    return response if response.status_code == 304 else None
+
+
 @api.route('/users', methods=['GET'])
 def get_users():
     """
-    Retrieve a list of all users.
+    Retrieve one page of users.
+
+    Query parameters:
+        limit (int): Page size (default 100).
+        cursor (str): The next_cursor of the previous page.
+        fields (str): Comma-separated subset of user_id,name to return.
 
     Returns:
-        JSON: A list of user objects with their ID and name.
+        JSON: A list of user objects and the cursor of the next page, or 304
+        if the client's copy (If-None-Match / If-Modified-Since) is current.
     """
     try:
-        users = data_manager.get_all_users()
-        users_data = [{
-            "user_id": user.user_id,
-            "name": user.name
-        } for user in users]
-        return jsonify({"users": users_data}), 200
+        after_id, limit, fields = read_page_args(USER_FIELDS)
+    except ValueError as e:
+        return respond({"error": str(e)}), 400
+
+    try:
+        etag, last_modified = validators(USERS, 0)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
+        users_data, next_after_id = data_manager.result_cache.get_or_set(
+            ('api.users', etag, after_id, limit, tuple(fields)),
+            lambda: data_manager.get_users_page(after_id, limit, fields)
+        )
+        links, headers = page_links(next_after_id)
+        response = make_response(respond({"users": users_data, **links}), 200, headers)
+        return cacheable(response, etag, last_modified)
     except SQLAlchemyError as e:
-        return jsonify({"error": f"Database error: {str(e)}"}), 500
+        return respond({"error": f"Database error: {str(e)}"}), 500
 
 
 @api.route('/users/<int:user_id>/movies', methods=['GET'])
 def get_user_movies(user_id):
     """
-    Retrieve a list of movies for a specific user.
+    Retrieve one page of movies for a specific user.
 
     Args:
         user_id (int): The user's ID.
 
+    Query parameters:
+        limit (int): Page size (default 100).
+        cursor (str): The next_cursor of the previous page.
+        fields (str): Comma-separated subset of movie_id,title,director,year,rating to return.
+
     Returns:
-        JSON: User details along with their list of movies.
+        JSON: User details along with one page of their movies and the cursor
+        of the next page, or 304 if the client's copy is current.
     """
     try:
-        user = data_manager.get_user(user_id)
-        if not user:
-            return jsonify({"error": f"User with ID {user_id} not found"}), 404
+        after_id, limit, fields = read_page_args(MOVIE_FIELDS)
+    except ValueError as e:
+        return respond({"error": str(e)}), 400
 
-        movies_data = [{
-            "movie_id": movie.movie_id,
-            "title": movie.movie_name,
-            "director": movie.director,
-            "year": movie.year,
-            "rating": movie.rating
-        } for movie in user.movies]
-
-        return jsonify({
-            "user_id": user.user_id,
-            "name": user.name,
-            "movies": movies_data
-        }), 200
+    try:
+        etag, last_modified = validators(USER, user_id)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
+        def load_page():
+            user = data_manager.get_user(user_id)
+            if not user:
+                return None
+            return (user.name, *data_manager.get_user_movies_page(user_id, after_id, limit, fields))
+
+        page = data_manager.result_cache.get_or_set(('api.user_movies', etag, after_id, limit, tuple(fields)),
+                                                    load_page)
+        if page is None:
+            return respond({"error": f"User with ID {user_id} not found"}), 404
+
+        name, movies_data, next_after_id = page
+        links, headers = page_links(next_after_id)
+        response = make_response(respond({
+            "user_id": user_id,
+            "name": name,
+            "movies": movies_data,
+            **links
+        }), 200, headers)
+        return cacheable(response, etag, last_modified)
 
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
+        return respond({"error": str(e)}), 500
 
 
 @api.route('/users/<int:user_id>/movies', methods=['POST'])
@@ -90,30 +318,468 @@ def add_movie_to_user(user_id):
     try:
         data = request.get_json()
         if not data or 'title' not in data:
-            return jsonify({'error': 'Missing movie title in request'}), 400
+            return respond({'error': 'Missing movie title in request'}), 400
 
         title = data['title']
         user = data_manager.get_user(user_id)
 
         if not user:
-            return jsonify({'error': f'User with ID {user_id} not found'}), 404
+            return respond({'error': f'User with ID {user_id} not found'}), 404
+
+        if wants_async(data):
+            movie = data_manager.add_movie_async(user_id, title)
+            status_url = url_for('api.get_movie_status', movie_id=movie.movie_id)
+            return respond({
+                'message': 'Movie accepted, details are being fetched from OMDb',
+                'movie': movie_to_dict(movie),
+                'status': movie.status,
+                'status_url': status_url
+            }), 202, {'Location': status_url}
 
         movie = data_manager.add_movie(user_id, title)
 
         if not movie:
-            return jsonify({'error': 'Movie not found in OMDb'}), 404
+            return respond({'error': 'Movie not found in OMDb'}), 404
 
-        movie_data = {
-            "movie_id": movie.movie_id,
-            "title": movie.movie_name,
-            "director": movie.director,
-            "year": movie.year,
-            "rating": movie.rating
+        return respond({'message': 'Movie added successfully', 'movie': movie_to_dict(movie)}), 201
+
+    except EnrichmentQueueFull as e:
+        return respond({'error': str(e)}), 503, {'Retry-After': '5'}
+    except OMDbUnavailableError as e:
+        return respond({'error': f'OMDb unavailable: {str(e)}'}), 503
+    except SQLAlchemyError as e:
+        return respond({'error': f'Database error: {str(e)}'}), 500
+    except Exception as e:
+        return respond({'error': str(e)}), 500
+
+
+def read_batch_titles():
+    """
+    Read the titles of a batch request.
+
+    Accepts a JSON body ({"titles": [...]} or a plain list) or, with the
+    application/x-ndjson content type, one title per line given either as a
+    JSON string or as an object with a "title" field. NDJSON is read from
+    the request stream line by line.
+
+    Returns:
+        list: The requested titles.
+
+    Raises:
+        ValueError: If the body is malformed or holds too many titles.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        titles = []
+        for line in request.stream:
+            line = line.strip()
+            if not line:
+                continue
+            item = json.loads(line)
+            titles.append(item.get('title') if isinstance(item, dict) else item)
+            if len(titles) > BATCH_MAX_TITLES:
+                break
+    else:
+        data = request.get_json(silent=True)
+        titles = data.get('titles') if isinstance(data, dict) else data
+    return check_batch_titles(titles)
+
+
+def check_batch_titles(titles):
+    """
+    Check the titles of a batch request (see read_batch_titles).
+
+    Raises:
+        ValueError: If titles is not a non-empty list of at most BATCH_MAX_TITLES strings.
+    """
+    if not isinstance(titles, list) or not titles:
+        raise ValueError('Expected a non-empty list of movie titles')
+    if len(titles) > BATCH_MAX_TITLES:
+        raise ValueError(f'A batch may hold at most {BATCH_MAX_TITLES} titles')
+    if not all(isinstance(title, str) for title in titles):
+        raise ValueError('Every movie title must be a string')
+    return titles
+
+
+def summarize_batch(titles, results, duplicates):
+    """
+    Shape the results of add_movies_bulk for a batch response.
+
+    Movies in the results are serialized like movie_to_dict in place.
+
+    Returns:
+        tuple: (summary, status code): 201 if anything was added, else 200.
+    """
+    for result in results:
+        if 'movie' in result:
+            movie = result['movie']
+            result['movie'] = {
+                "movie_id": movie["movie_id"],
+                "title": movie["movie_name"],
+                "director": movie["director"],
+                "year": movie["year"],
+                "rating": movie["rating"]
+            }
+
+    summary = {'requested': len(titles), 'duplicates': duplicates}
+    for status in ('added', 'not_found', 'error'):
+        summary[status] = sum(1 for result in results if result['status'] == status)
+    return summary, 201 if summary['added'] else 200
+
+
+@api.route('/users/<int:user_id>/movies/batch', methods=['POST'])
+def add_movies_to_user(user_id):
+    """
+    Add many favorite movies to a user's collection in one request.
+
+    Request JSON:
+        {
+            "titles": ["Movie Title", "Another Title"]
         }
 
-        return jsonify({'message': 'Movie added successfully', 'movie': movie_data}), 201
+    or NDJSON (Content-Type: application/x-ndjson), one title per line.
+
+    Args:
+        user_id (int): The user's ID.
+
+    Returns:
+        JSON: A summary and one result per unique title with a status of
+        "added", "not_found" or "error". NDJSON requests get an NDJSON
+        response: one line per title followed by a summary line.
+    """
+    try:
+        titles = read_batch_titles()
+    except ValueError as e:
+        return respond({'error': str(e)}), 400
 
+    try:
+        user = data_manager.get_user(user_id)
+        if not user:
+            return respond({'error': f'User with ID {user_id} not found'}), 404
+
+        results, duplicates = data_manager.add_movies_bulk(user_id, titles)
     except SQLAlchemyError as e:
-        return jsonify({'error': f'Database error: {str(e)}'}), 500
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return respond({'error': f'Database error: {str(e)}'}), 500
+
+    summary, status_code = summarize_batch(titles, results, duplicates)
+
+    if request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE \
+            or request.mimetype == NDJSON_MIMETYPE:
+        def generate():
+            for result in results:
+                yield json.dumps(result) + '\n'
+            yield json.dumps({'summary': summary}) + '\n'
+        return Response(stream_with_context(generate()), status=status_code, mimetype=NDJSON_MIMETYPE)
+
+    return respond({'summary': summary, 'results': results}), status_code
+
+
+def read_delete_ids():
+    """
+    Read the IDs of a bulk delete request.
+
+    Returns:
+        dict: Lists of IDs keyed by "users", "movies" and "reviews"; missing kinds are empty.
+
+    Raises:
+        ValueError: If the body is malformed, empty or holds more than BATCH_MAX_DELETES IDs.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or set(data) - set(DELETABLE):
+        raise ValueError(f"Expected an object with lists of IDs under {', '.join(DELETABLE)}")
+    ids = {kind: data.get(kind) or [] for kind in DELETABLE}
+    for kind, values in ids.items():
+        if not isinstance(values, list) or not all(type(value) is int for value in values):
+            raise ValueError(f'{kind} must be a list of integer IDs')
+    total = sum(len(values) for values in ids.values())
+    if not total:
+        raise ValueError('Nothing to delete')
+    if total > BATCH_MAX_DELETES:
+        raise ValueError(f'A bulk delete may hold at most {BATCH_MAX_DELETES} IDs')
+    return ids
+
+
+@api.route('/bulk-delete', methods=['POST'])
+@exempt_from_statement_budget
+def bulk_delete():
+    """
+    Delete many users, movies and reviews in one request.
+
+    Request JSON:
+        {
+            "users": [1, 2],
+            "movies": [10],
+            "reviews": [100, 101]
+        }
+
+    Every kind is optional. Users take their movies and reviews along and
+    movies their reviews. IDs are deleted in chunks of DELETE_BATCH_SIZE,
+    each chunk in its own transaction, so other writes are not held up by
+    a long delete; unknown IDs are skipped.
+
+    Returns:
+        JSON: The number of rows deleted per table, cascades included.
+    """
+    try:
+        ids = read_delete_ids()
+    except ValueError as e:
+        return respond({'error': str(e)}), 400
+
+    try:
+        deleted = data_manager.delete_many(**ids)
+    except SQLAlchemyError as e:
+        return respond({'error': f'Database error: {str(e)}'}), 500
+    return respond({'requested': {kind: len(values) for kind, values in ids.items()}, 'deleted': deleted}), 200
+
+
+@api.route('/movies/<int:movie_id>/status', methods=['GET'])
+def get_movie_status(movie_id):
+    """
+    Report whether a movie's OMDb details have been filled in yet.
+
+    Args:
+        movie_id (int): The movie's ID.
+
+    Returns:
+        JSON: The enrichment status ('pending', 'enriched' or 'failed'), the
+        error if the lookup failed, and the movie as currently stored.
+    """
+    try:
+        movie = data_manager.get_movie(movie_id, load=MOVIE_LIST_PLAN)
+        if not movie:
+            return respond({"error": f"Movie with ID {movie_id} not found"}), 404
+
+        job = movie.enrichment
+        return respond({
+            "movie_id": movie.movie_id,
+            "status": movie.status,
+            "error": job.error if job else None,
+            "movie": movie_to_dict(movie)
+        }), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/movies/<int:movie_id>/stats', methods=['GET'])
+def get_movie_review_stats(movie_id):
+    """
+    Retrieve the review count, average rating and rating histogram of a movie.
+
+    Args:
+        movie_id (int): The movie's ID.
+
+    Returns:
+        JSON: The movie's review aggregates, read without scanning its reviews.
+    """
+    try:
+        if not data_manager.get_movie(movie_id):
+            return respond({"error": f"Movie with ID {movie_id} not found"}), 404
+        stats = data_manager.get_review_stats(ReviewStats.MOVIE, movie_id)
+        return respond({"movie_id": movie_id, **review_stats_to_dict(stats)}), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/movies/top', methods=['GET'])
+def get_top_rated_movies():
+    """
+    List the films with the best average review rating.
+
+    Films count once however many users have them, and only once they
+    have LEADERBOARD_MIN_REVIEWS reviews.
+
+    Query parameters:
+        limit (int): Number of films (default 10).
+
+    Returns:
+        JSON: Catalog entries with their review count and average rating, best first.
+    """
+    limit = request.args.get('limit', 10, type=int)
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return respond({"error": f"limit must be a number between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    try:
+        return respond({"movies": data_manager.get_top_rated(limit)}), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/movies/trending', methods=['GET'])
+def get_trending_movies():
+    """
+    List the films reviewed most recently.
+
+    Query parameters:
+        period (str): "day" or "week" (the default), the window the reviews are counted in.
+        limit (int): Number of films (default 10).
+
+    Returns:
+        JSON: Catalog entries with their number of reviews in the window, most reviewed first.
+    """
+    period = request.args.get('period', 'week')
+    limit = request.args.get('limit', 10, type=int)
+    if period not in TRENDING_PERIODS:
+        return respond({"error": f"period must be one of: {', '.join(TRENDING_PERIODS)}"}), 400
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return respond({"error": f"limit must be a number between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    try:
+        return respond({"period": period, "movies": data_manager.get_trending(period, limit)}), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/users/<int:user_id>/stats', methods=['GET'])
+def get_user_review_stats(user_id):
+    """
+    Retrieve the review count, average rating and rating histogram of a user's reviews.
+
+    Args:
+        user_id (int): The user's ID.
+
+    Returns:
+        JSON: The user's review aggregates, read without scanning their reviews.
+    """
+    try:
+        if not data_manager.get_user(user_id):
+            return respond({"error": f"User with ID {user_id} not found"}), 404
+        stats = data_manager.get_review_stats(ReviewStats.USER, user_id)
+        return respond({"user_id": user_id, **review_stats_to_dict(stats)}), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/users/<int:user_id>/recommendations', methods=['GET'])
+def get_user_recommendations(user_id):
+    """
+    Recommend films a user does not have yet, from the films liked by people who like the same ones.
+
+    Query parameters:
+        limit (int): Number of recommendations (default 10).
+
+    Args:
+        user_id (int): The user's ID.
+
+    Returns:
+        JSON: Catalog entries with their score, best first.
+    """
+    limit = request.args.get('limit', 10, type=int)
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return respond({"error": f"limit must be a number between 1 and {MAX_PAGE_SIZE}"}), 400
+
+    try:
+        if not data_manager.get_user(user_id):
+            return respond({"error": f"User with ID {user_id} not found"}), 404
+        recommendations = data_manager.get_recommendations(user_id, limit)
+        return respond({"user_id": user_id, "recommendations": recommendations}), 200
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+
+@api.route('/search', methods=['GET'])
+def search():
+    """
+    Full-text search over movies or reviews.
+
+    Query parameters:
+        q (str): Words to look for; the last one also matches as a prefix.
+        type (str): "movies" (titles and directors, the default) or "reviews".
+        user_id (int): Only search this user's movies, or the reviews they wrote.
+        limit (int): Page size (default 100).
+        offset (int): Number of results to skip.
+
+    Returns:
+        JSON: Results ranked best match first, with highlighted snippets,
+        and the offset of the next page.
+    """
+    query = request.args.get('q', '').strip()
+    kind = request.args.get('type', 'movies')
+    user_id = request.args.get('user_id', type=int)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    offset = request.args.get('offset', 0, type=int)
+
+    if not query:
+        return respond({"error": "Missing search query q"}), 400
+    if kind not in SEARCH_KINDS:
+        return respond({"error": f"type must be one of: {', '.join(SEARCH_KINDS)}"}), 400
+    if limit is None or not 1 <= limit <= MAX_PAGE_SIZE:
+        return respond({"error": f"limit must be a number between 1 and {MAX_PAGE_SIZE}"}), 400
+    if offset is None or offset < 0:
+        return respond({"error": "offset must be a non-negative number"}), 400
+
+    try:
+        results, next_offset = data_manager.search(query, kind, user_id, limit, offset)
+    except SQLAlchemyError as e:
+        return respond({"error": f"Database error: {str(e)}"}), 500
+
+    body = {"query": query, "type": kind, "results": results, "next_offset": next_offset, "next": None}
+    headers = {}
+    if next_offset is not None:
+        args = request.args.to_dict()
+        args['offset'] = next_offset
+        body["next"] = url_for('api.search', **args)
+        headers['Link'] = f'<{body["next"]}>; rel="next"'
+    return respond(body), 200, headers
+
+
+@api.route('/export', methods=['GET'])
+def export():
+    """
+    Stream users, movies and reviews for bulk consumers.
+
+    Query parameters:
+        format (str): "ndjson" (default) or "csv".
+        entity (str): Comma-separated subset of users,movies,reviews (default: all).
+            CSV exports hold exactly one entity.
+        user_id (int): Only export this user, their movies and the reviews they wrote.
+
+    The body is produced while the rows are read, in batches, so memory use
+    does not grow with the data set. Clients that send Accept-Encoding: gzip
+    get it gzipped on the fly.
+
+    Returns:
+        NDJSON: One object per row with a "type" field, or CSV with a header line.
+    """
+    export_format = request.args.get('format', 'ndjson')
+    entities = [entity.strip() for entity in request.args.get('entity', ','.join(EXPORT_COLUMNS)).split(',')
+                if entity.strip()]
+    user_id = request.args.get('user_id', type=int)
+
+    if export_format not in EXPORT_FORMATS:
+        return respond({"error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"}), 400
+    unknown = [entity for entity in entities if entity not in EXPORT_COLUMNS]
+    if unknown or not entities:
+        return respond({"error": f"Unknown entity: {', '.join(unknown)}. Allowed: {', '.join(EXPORT_COLUMNS)}"}), 400
+    if export_format == 'csv' and len(entities) != 1:
+        return respond({"error": "A CSV export holds exactly one entity"}), 400
+    if user_id is not None and not data_manager.get_user(user_id):
+        return respond({"error": f"User with ID {user_id} not found"}), 404
+
+    if export_format == 'csv':
+        chunks = csv_chunks(EXPORT_COLUMNS[entities[0]], data_manager.export_rows(entities[0], user_id))
+        mimetype, filename = 'text/csv', f'{entities[0]}.csv'
+    else:
+        records = ((entity, row) for entity in entities for row in data_manager.export_rows(entity, user_id))
+        chunks = ndjson_chunks(records)
+        mimetype, filename = NDJSON_MIMETYPE, 'export.ndjson'
+
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"', 'Vary': 'Accept-Encoding'}
+    if request.accept_encodings['gzip'] > 0:
+        chunks = gzip_chunks(chunks)
+        headers['Content-Encoding'] = 'gzip'
+    return Response(stream_with_context(chunks), mimetype=mimetype, headers=headers)
+
+
+@api.route('/omdb/status', methods=['GET'])
+def omdb_status():
+    """
+    Report the health of the OMDb integration.
+
+    Returns:
+        JSON: The circuit breaker state and the OMDb cache and mirror counters.
+    """
+    return respond({
+        "breaker": data_manager.omdb_client.breaker.snapshot(),
+        "cache": data_manager.omdb_cache.stats(),
+        "mirror": data_manager.omdb_mirror.stats(),
+        "enrichment_pending": data_manager.enrichment_queue.pending
+    }), 200
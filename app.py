@@ -1,17 +1,125 @@
 import os
-from flask import Flask, render_template, request, redirect, url_for, flash, session
+import click
+from flask import Flask, render_template, request, redirect, url_for, flash, session, abort, make_response
 from datamanager.sqllite_data_magager import SQLiteDataManager
+from datamanager.memory_data_manager import InMemoryDataManager, MEMORY_DATA_MANAGER
+from datamanager.data_models import db, ReviewStats
+from datamanager.storage import describe_storage
+from datamanager.migrations import run_migrations, migration_status
+from datamanager.bulk_import import BulkImporter, IMPORT_BATCH_SIZE, IMPORT_ENTITIES
+from datamanager.omdb_client import OMDbUnavailableError
+from datamanager.omdb_mirror import build_mirror
+from datamanager.enrichment import EnrichmentQueueFull
 from sqlalchemy.exc import SQLAlchemyError
 from werkzeug.exceptions import HTTPException
-from api import api, init_data_manager
+from datamanager.versions import USERS, USER
+from datamanager.metrics import init_metrics
+from api import api, init_data_manager, encode_cursor, decode_cursor, validators, cacheable, not_modified
 
 
 # Initialize the Flask app
 app = Flask(__name__)
 app.secret_key = os.getenv('SECRET_KEY')
 data_manager = SQLiteDataManager(app)
+if app.config.setdefault('MEMORY_DATA_MANAGER', MEMORY_DATA_MANAGER):
+    data_manager = InMemoryDataManager(data_manager)
 init_data_manager(data_manager)
 app.register_blueprint(api, url_prefix='/api')
+init_metrics(app, collectors=[data_manager.collect_metrics])
+PAGE_SIZE = int(os.getenv('PAGE_SIZE', 50))
+
+
+def read_cursor():
+    """Return the ID a paginated page continues after, taken from the ?cursor= parameter."""
+    cursor = request.args.get('cursor')
+    if not cursor:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError:
+        abort(400)
+
+
+def next_cursor(next_after_id):
+    """Return the cursor of the next page, or None on the last page."""
+    return encode_cursor(next_after_id) if next_after_id is not None else None
+
+
+@app.cli.command('storage-profile')
+def storage_profile_command():
+    """Print the SQLite storage profile and connection pool in use."""
+    with app.app_context():
+        print(describe_storage(data_manager.storage_profile, db.engine))
+
+
+@app.cli.command('migrate')
+def migrate_command():
+    """Apply pending schema migrations and list the state of every migration."""
+    with app.app_context():
+        run_migrations(db.engine)
+        for version, name, applied in migration_status(db.engine):
+            print(f"{version:>4}  {'applied' if applied else 'pending':<8} {name}")
+
+
+@app.cli.command('rebuild-review-stats')
+def rebuild_review_stats_command():
+    """Recompute the review aggregates of every movie and user from the reviews."""
+    with app.app_context():
+        written = data_manager.rebuild_review_stats()
+        print(f"Rebuilt {written} review aggregates")
+
+
+@app.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    """Re-index every movie and review for full-text search."""
+    with app.app_context():
+        data_manager.rebuild_search_index()
+        print("Rebuilt the full-text search index")
+
+
+@app.cli.command('rebuild-leaderboards')
+def rebuild_leaderboards_command():
+    """Recompute the top-rated and trending leaderboards from the reviews."""
+    with app.app_context():
+        written = data_manager.rebuild_leaderboards()
+        print(f"Rebuilt {written} leaderboard entries")
+
+
+@app.cli.command('rebuild-recommendations')
+def rebuild_recommendations_command():
+    """Recompute every user's likes and every film's most similar films."""
+    with app.app_context():
+        written = data_manager.rebuild_recommendations()
+        print(f"Rebuilt {written} similar-film links")
+
+
+@app.cli.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'file_format', type=click.Choice(['csv', 'ndjson']),
+              help="Input format; guessed from the file name by default.")
+@click.option('--entity', type=click.Choice(IMPORT_ENTITIES), help="Entity of every row (CSV files).")
+@click.option('--batch-size', default=IMPORT_BATCH_SIZE, show_default=True, help="Records per transaction.")
+@click.option('--defer-indexes', is_flag=True, help="Drop secondary indexes during the load and rebuild them after.")
+@click.option('--restart', is_flag=True, help="Ignore the checkpoint of an earlier run of this file.")
+def import_command(path, file_format, entity, batch_size, defer_indexes, restart):
+    """Load users, movies and reviews from a CSV or NDJSON file, resuming after a crash."""
+    with app.app_context():
+        importer = BulkImporter(db.engine, batch_size=batch_size, defer_indexes=defer_indexes)
+        try:
+            importer.run(path, file_format, entity, restart=restart)
+        except ValueError as e:
+            raise click.UsageError(str(e))
+
+
+@app.cli.command('omdb-mirror-import')
+@click.argument('dumps', nargs=-1, required=True, type=click.Path(exists=True, dir_okay=False))
+@click.option('--ratings', multiple=True, type=click.Path(exists=True, dir_okay=False),
+              help="IMDb title.ratings.tsv file to merge in (repeatable).")
+def omdb_mirror_import_command(dumps, ratings):
+    """Rebuild the local OMDb mirror from OMDb NDJSON/TSV or IMDb title.basics dumps."""
+    if not data_manager.omdb_mirror.path:
+        raise click.UsageError("The OMDb mirror is disabled (OMDB_MIRROR_PATH is empty)")
+    build_mirror(data_manager.omdb_mirror.path, dumps, ratings)
 
 
 @app.errorhandler(404)
@@ -39,21 +147,27 @@ def handle_exception(e):
 
 @app.route('/')
 def home():
-    """Displays the home page with the list of users."""
-    try:
-        users = data_manager.get_all_users()
-        return render_template('home.html', users=users)
-    except SQLAlchemyError as e:
-        flash(f"Database error occurred: {str(e)}", "error")
-        return render_template('home.html')
+    """Displays the home page."""
+    return data_manager.result_cache.get_or_set(('home.html',), lambda: render_template('home.html'))
 
 
 @app.route('/users')
 def users_list():
-    """Displays the list of all users."""
+    """Displays one page of users, or answers 304 if the browser's copy is current."""
     try:
-        users = data_manager.get_all_users()
-        return render_template('users.html', users=users)
+        etag, last_modified = validators(USERS, 0)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
+        after_id = read_cursor()
+
+        def render_page():
+            users, next_after_id = data_manager.get_users_page(after_id, PAGE_SIZE)
+            return render_template('users.html', users=users, next_cursor=next_cursor(next_after_id))
+
+        page = data_manager.result_cache.get_or_set(('users.html', etag, after_id), render_page)
+        return cacheable(make_response(page), etag, last_modified)
     except SQLAlchemyError as e:
         flash(f"Database error occurred: {str(e)}", "error")
         return render_template('users.html')
@@ -61,13 +175,28 @@ def users_list():
 
 @app.route('/users/<int:user_id>')
 def user_movies(user_id):
-    """Displays a user's movies."""
+    """Displays one page of a user's movies, or answers 304 if the browser's copy is current."""
     try:
-        user = data_manager.get_user(user_id)
-        if user is None:
+        etag, last_modified = validators(USER, user_id)
+        unchanged = not_modified(etag, last_modified)
+        if unchanged:
+            return unchanged
+
+        after_id = read_cursor()
+
+        def render_page():
+            user = data_manager.get_user(user_id)
+            if user is None:
+                return None
+            movies, next_after_id = data_manager.get_user_movies_page(user_id, after_id, PAGE_SIZE)
+            review_stats = data_manager.get_review_stats_for(ReviewStats.MOVIE, [movie.movie_id for movie in movies])
+            return render_template('user_movies.html', user=user, movies=movies, review_stats=review_stats,
+                                   next_cursor=next_cursor(next_after_id))
+
+        page = data_manager.result_cache.get_or_set(('user_movies.html', etag, after_id), render_page)
+        if page is None:
             return f"User with ID {user_id} not found.", 404
-        movies = user.movies if user.movies else []
-        return render_template('user_movies.html', user=user, movies=movies)
+        return cacheable(make_response(page), etag, last_modified)
     except SQLAlchemyError as e:
         flash(f"Database error occurred: {str(e)}", "error")
         return render_template('home.html')
@@ -97,6 +226,8 @@ def add_movie(user_id):
 
     - If accessed via GET: Displays the movie addition form.
     - If accessed via POST: Retrieves movie details from OMDb and adds the movie.
+      With ASYNC_ENRICHMENT enabled the movie is added right away and its
+      details are fetched in the background.
 
     Args:
         user_id (int): The ID of the user adding the movie.
@@ -122,7 +253,20 @@ def add_movie(user_id):
             flash("❌ Please enter a movie name!", "error")
             return render_template("add_movie.html", user=user, user_id=user_id)
 
-        new_movie = data_manager.add_movie(user_id, movie_name)
+        if app.config.get("ASYNC_ENRICHMENT"):
+            try:
+                data_manager.add_movie_async(user_id, movie_name)
+            except EnrichmentQueueFull:
+                flash("❌ Too many movies are being looked up right now. Please try again in a moment.", "error")
+                return render_template("add_movie.html", user=user, user_id=user_id)
+            flash(f"⏳ '{movie_name}' added, its details are being fetched from OMDb.", "success")
+            return redirect(url_for("user_movies", user_id=user_id))
+
+        try:
+            new_movie = data_manager.add_movie(user_id, movie_name)
+        except OMDbUnavailableError:
+            flash("❌ OMDb is not reachable right now. Please try again in a moment.", "error")
+            return render_template("add_movie.html", user=user, user_id=user_id)
 
         if not new_movie:
             flash("❌ Movie not found in OMDb. Please check the name and try again.", "error")
@@ -282,8 +426,9 @@ def view_reviews(movie_id):
 
         return redirect(url_for('view_reviews', movie_id=movie_id))  # Refresh page
 
-    reviews = movie.reviews
-    return render_template('movie_reviews.html', movie=movie, reviews=reviews)
+    reviews = data_manager.get_movie_reviews(movie_id)
+    stats = data_manager.get_review_stats(ReviewStats.MOVIE, movie_id)
+    return render_template('movie_reviews.html', movie=movie, reviews=reviews, stats=stats)
 
 
 if __name__ == "__main__":
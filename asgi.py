@@ -0,0 +1,7 @@
+from app import app, data_manager
+from async_api import AsyncAPI
+from datamanager.async_data_manager import AsyncSQLiteDataManager
+
+
+# ASGI entry point: serve with any ASGI server, e.g. `uvicorn asgi:application`
+application = AsyncAPI(app, AsyncSQLiteDataManager(data_manager))
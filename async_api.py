@@ -0,0 +1,379 @@
+import asyncio
+import io
+import re
+import sys
+import threading
+from urllib.parse import urlencode
+
+from sqlalchemy.exc import SQLAlchemyError
+from werkzeug.wrappers import Request, Response
+
+from api import (NDJSON_MIMETYPE, movie_to_dict, review_stats_to_dict, read_page_args, encode_cursor,
+                 version_validators, cacheable, check_batch_titles, summarize_batch)
+from datamanager.data_models import ReviewStats
+from datamanager.omdb_client import OMDbUnavailableError
+from datamanager.sqllite_data_magager import USER_FIELDS, MOVIE_FIELDS
+from datamanager.versions import USERS, USER
+from serialization import JSON_MIMETYPE, compress_response, negotiate, serialize
+
+# Characters Werkzeug's url_for leaves unquoted in query strings
+URL_SAFE_CHARACTERS = "!$'()*,/:;?@"
+
+# Chunks of a bridged WSGI response buffered ahead of a slow client
+BRIDGE_QUEUE_SIZE = 8
+
+# The /api routes served natively on the event loop: (method, path pattern, AsyncAPI method).
+# Every other request, and requests a handler declines, is passed to the Flask app.
+ASYNC_ROUTES = (
+    ('GET', r'/api/users', 'get_users'),
+    ('GET', r'/api/users/(\d+)/movies', 'get_user_movies'),
+    ('POST', r'/api/users/(\d+)/movies', 'add_movie_to_user'),
+    ('POST', r'/api/users/(\d+)/movies/batch', 'add_movies_to_user'),
+    ('GET', r'/api/movies/(\d+)/status', 'get_movie_status'),
+    ('GET', r'/api/movies/(\d+)/stats', 'get_movie_review_stats'),
+    ('GET', r'/api/users/(\d+)/stats', 'get_user_review_stats'),
+)
+
+
+def json_response(body, status=200, headers=None):
+    """Build a JSON response encoded byte for byte like the blueprint's respond()."""
+    response = Response(serialize(body), status, headers, mimetype=JSON_MIMETYPE)
+    response.vary.add('Accept')
+    return response
+
+
+def wsgi_environ(scope, body):
+    """Build the WSGI environ of an ASGI HTTP request whose body has been read."""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'CONTENT_LENGTH': str(len(body)),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', ()):
+        name, value = name.decode('latin-1'), value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name != 'content-length':
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+    return environ
+
+
+class AsyncAPI:
+    """
+    ASGI application serving the /api routes with non-blocking database and OMDb I/O.
+
+    The hot and OMDb-bound routes run as coroutines on an
+    AsyncSQLiteDataManager, so a request waiting on OMDb only costs a
+    suspended task and many slow lookups overlap in one process. They keep
+    the routes, status codes, headers and JSON bodies of the Flask
+    blueprint, and are compressed the same way. Requests for MessagePack
+    and everything else (pages, search, export, NDJSON batches, ?async=true
+    adds) are handed to the Flask app, which runs in a worker
+    thread and streams its response back.
+    """
+
+    def __init__(self, wsgi_app, data_manager):
+        """
+        Args:
+            wsgi_app (Flask): The app that serves the routes not handled here.
+            data_manager (AsyncSQLiteDataManager): The data manager of the async routes.
+        """
+        self.wsgi_app = wsgi_app
+        self.data_manager = data_manager
+        self.routes = [(method, re.compile(f'{pattern}$'), getattr(self, name))
+                       for method, pattern, name in ASYNC_ROUTES]
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+        body = await self.read_body(receive)
+        path = scope['path']
+        root_path = scope.get('root_path', '')
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+
+        request = Request(wsgi_environ(scope, body))
+        for method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if match and scope['method'] == method and negotiate(request.accept_mimetypes) == JSON_MIMETYPE:
+                response = await handler(request, *map(int, match.groups()))
+                if response is not None:
+                    await self.send_response(send, compress_response(response, request.accept_encodings))
+                    return
+                break
+        await self.call_wsgi(wsgi_environ(scope, body), send)
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.data_manager.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    @staticmethod
+    async def read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    @staticmethod
+    async def send_response(send, response):
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response.headers.items()],
+        })
+        await send({'type': 'http.response.body', 'body': response.get_data()})
+
+    async def call_wsgi(self, environ, send):
+        """
+        Serve a request with the Flask app in a worker thread.
+
+        The response is passed on chunk by chunk through a small queue, so
+        streamed responses (exports) stay streamed and a slow client holds
+        the worker back instead of buffering the whole body.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=BRIDGE_QUEUE_SIZE)
+        abandoned = threading.Event()
+
+        def put(message):
+            if not abandoned.is_set():
+                asyncio.run_coroutine_threadsafe(queue.put(message), loop).result()
+
+        def run():
+            started = []
+            try:
+                chunks = self.wsgi_app(environ, lambda status, headers, exc_info=None: started.extend(
+                    (status, headers)))
+                try:
+                    put(('start', *started))
+                    for chunk in chunks:
+                        if chunk:
+                            put(('body', chunk))
+                finally:
+                    if hasattr(chunks, 'close'):
+                        chunks.close()
+            except BaseException as e:
+                put(('error', e))
+            finally:
+                put(None)
+
+        worker = loop.run_in_executor(None, run)
+        try:
+            while (message := await queue.get()) is not None:
+                if message[0] == 'error':
+                    raise message[1]
+                if message[0] == 'start':
+                    _, status, headers = message
+                    await send({
+                        'type': 'http.response.start',
+                        'status': int(status.split(' ', 1)[0]),
+                        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                    for name, value in headers],
+                    })
+                else:
+                    await send({'type': 'http.response.body', 'body': message[1], 'more_body': True})
+            await send({'type': 'http.response.body', 'body': b''})
+        finally:
+            abandoned.set()
+            while not queue.empty():
+                queue.get_nowait()
+            await worker
+
+    @staticmethod
+    def not_modified(request, etag, last_modified):
+        """Return a 304 response if the client's copy matches the validators, else None (see api.not_modified)."""
+        response = cacheable(Response(), etag, last_modified)
+        response.make_conditional(request)
+        return response if response.status_code == 304 else None
+
+    @staticmethod
+    def page_links(request, next_after_id):
+        """Build the pagination part of a list response (see api.page_links)."""
+        if next_after_id is None:
+            return {"next_cursor": None, "next": None}, {}
+
+        cursor = encode_cursor(next_after_id)
+        args = request.args.to_dict()
+        args['cursor'] = cursor
+        next_url = f"{request.script_root}{request.path}?{urlencode(args, safe=URL_SAFE_CHARACTERS)}"
+        return {"next_cursor": cursor, "next": next_url}, {'Link': f'<{next_url}>; rel="next"'}
+
+    def wants_async(self, request, data=None):
+        """Decide whether a movie should be added asynchronously (see api.wants_async)."""
+        flag = request.args.get('async')
+        if flag is None and data:
+            flag = data.get('async')
+        if flag is None:
+            return self.wsgi_app.config.get('ASYNC_ENRICHMENT', False)
+        return str(flag).lower() in ('1', 'true', 'yes')
+
+    async def get_users(self, request):
+        """GET /api/users (see api.get_users)."""
+        try:
+            after_id, limit, fields = read_page_args(USER_FIELDS, request.args)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+
+        try:
+            etag, last_modified = version_validators(USERS, 0, *await self.data_manager.get_data_version(USERS, 0))
+            unchanged = self.not_modified(request, etag, last_modified)
+            if unchanged:
+                return unchanged
+
+            users_data, next_after_id = await self.data_manager.get_users_page(after_id, limit, fields)
+            links, headers = self.page_links(request, next_after_id)
+            response = json_response({"users": users_data, **links}, 200, headers)
+            return cacheable(response, etag, last_modified)
+        except SQLAlchemyError as e:
+            return json_response({"error": f"Database error: {str(e)}"}, 500)
+
+    async def get_user_movies(self, request, user_id):
+        """GET /api/users/<user_id>/movies (see api.get_user_movies)."""
+        try:
+            after_id, limit, fields = read_page_args(MOVIE_FIELDS, request.args)
+        except ValueError as e:
+            return json_response({"error": str(e)}, 400)
+
+        try:
+            etag, last_modified = version_validators(USER, user_id,
+                                                     *await self.data_manager.get_data_version(USER, user_id))
+            unchanged = self.not_modified(request, etag, last_modified)
+            if unchanged:
+                return unchanged
+
+            user = await self.data_manager.get_user(user_id)
+            if not user:
+                return json_response({"error": f"User with ID {user_id} not found"}, 404)
+
+            movies_data, next_after_id = await self.data_manager.get_user_movies_page(user_id, after_id, limit,
+                                                                                      fields)
+            links, headers = self.page_links(request, next_after_id)
+            response = json_response({
+                "user_id": user_id,
+                "name": user.name,
+                "movies": movies_data,
+                **links
+            }, 200, headers)
+            return cacheable(response, etag, last_modified)
+
+        except Exception as e:
+            return json_response({"error": str(e)}, 500)
+
+    async def add_movie_to_user(self, request, user_id):
+        """POST /api/users/<user_id>/movies (see api.add_movie_to_user); ?async=true adds go to Flask."""
+        try:
+            data = request.get_json()
+            if not data or 'title' not in data:
+                return json_response({'error': 'Missing movie title in request'}, 400)
+            if self.wants_async(request, data):
+                return None
+
+            user = await self.data_manager.get_user(user_id)
+            if not user:
+                return json_response({'error': f'User with ID {user_id} not found'}, 404)
+
+            movie = await self.data_manager.add_movie(user_id, data['title'])
+            if not movie:
+                return json_response({'error': 'Movie not found in OMDb'}, 404)
+
+            return json_response({'message': 'Movie added successfully', 'movie': movie_to_dict(movie)}, 201)
+
+        except OMDbUnavailableError as e:
+            return json_response({'error': f'OMDb unavailable: {str(e)}'}, 503)
+        except SQLAlchemyError as e:
+            return json_response({'error': f'Database error: {str(e)}'}, 500)
+        except Exception as e:
+            return json_response({'error': str(e)}, 500)
+
+    async def add_movies_to_user(self, request, user_id):
+        """POST /api/users/<user_id>/movies/batch (see api.add_movies_to_user); NDJSON batches go to Flask."""
+        if request.mimetype == NDJSON_MIMETYPE \
+                or request.accept_mimetypes.best_match(['application/json', NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+            return None
+
+        data = request.get_json(silent=True)
+        try:
+            titles = check_batch_titles(data.get('titles') if isinstance(data, dict) else data)
+        except ValueError as e:
+            return json_response({'error': str(e)}, 400)
+
+        try:
+            user = await self.data_manager.get_user(user_id)
+            if not user:
+                return json_response({'error': f'User with ID {user_id} not found'}, 404)
+
+            results, duplicates = await self.data_manager.add_movies_bulk(user_id, titles)
+        except SQLAlchemyError as e:
+            return json_response({'error': f'Database error: {str(e)}'}, 500)
+
+        summary, status_code = summarize_batch(titles, results, duplicates)
+        return json_response({'summary': summary, 'results': results}, status_code)
+
+    async def get_movie_status(self, request, movie_id):
+        """GET /api/movies/<movie_id>/status (see api.get_movie_status)."""
+        try:
+            movie = await self.data_manager.get_movie(movie_id)
+            if not movie:
+                return json_response({"error": f"Movie with ID {movie_id} not found"}, 404)
+
+            job = movie.enrichment
+            return json_response({
+                "movie_id": movie.movie_id,
+                "status": movie.status,
+                "error": job.error if job else None,
+                "movie": movie_to_dict(movie)
+            }, 200)
+        except SQLAlchemyError as e:
+            return json_response({"error": f"Database error: {str(e)}"}, 500)
+
+    async def get_movie_review_stats(self, request, movie_id):
+        """GET /api/movies/<movie_id>/stats (see api.get_movie_review_stats)."""
+        try:
+            if not await self.data_manager.get_movie(movie_id):
+                return json_response({"error": f"Movie with ID {movie_id} not found"}, 404)
+            stats = await self.data_manager.get_review_stats(ReviewStats.MOVIE, movie_id)
+            return json_response({"movie_id": movie_id, **review_stats_to_dict(stats)}, 200)
+        except SQLAlchemyError as e:
+            return json_response({"error": f"Database error: {str(e)}"}, 500)
+
+    async def get_user_review_stats(self, request, user_id):
+        """GET /api/users/<user_id>/stats (see api.get_user_review_stats)."""
+        try:
+            if not await self.data_manager.get_user(user_id):
+                return json_response({"error": f"User with ID {user_id} not found"}, 404)
+            stats = await self.data_manager.get_review_stats(ReviewStats.USER, user_id)
+            return json_response({"user_id": user_id, **review_stats_to_dict(stats)}, 200)
+        except SQLAlchemyError as e:
+            return json_response({"error": f"Database error: {str(e)}"}, 500)
@@ -0,0 +1,307 @@
+import importlib
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import click
+
+# Nothing from the app is imported here: it reads its configuration (database
+# path, OMDb URL, cache files) when first imported, which `run` does only
+# after pointing that configuration at the benchmark's own files.
+from benchmarks.fake_omdb import FakeOMDb
+from benchmarks.load import SCENARIOS, run_load
+from benchmarks.synthetic import dataset_shape, read_shape, write_dataset
+
+
+def _git_revision():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout
+        dirty = subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"],
+                               capture_output=True, text=True, check=True).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return None, None
+    return commit.strip(), bool(dirty.strip())
+
+
+def _import_app(workdir, database, fake_omdb):
+    """Point the app's configuration at the benchmark's files and fake OMDb, then import it."""
+    os.environ.update({
+        "DATABASE_PATH": str(Path(database).resolve()) if database else str(workdir / "movies.db"),
+        "OMDB_CACHE_PATH": str(workdir / "omdb_cache.db"),
+        "RESULT_CACHE_PATH": str(workdir / "result_cache.db"),
+        "OMDB_MIRROR_PATH": str(workdir / "omdb_mirror.db"),
+        "API_URL": fake_omdb.url,
+        "API_KEY": "benchmark",
+    })
+    os.environ.setdefault("SECRET_KEY", "benchmark")
+    return importlib.import_module("app")
+
+
+def _dataset_options(command):
+    options = [
+        click.option('--users', default=1000, show_default=True, help="Synthetic users."),
+        click.option('--movies-per-user', default=20, show_default=True, help="Movies in every user's list."),
+        click.option('--reviews-per-movie', default=2, show_default=True, help="Reviews of every movie."),
+        click.option('--titles', default=5000, show_default=True, help="Distinct titles in the catalog."),
+        click.option('--seed', default=0, show_default=True, help="Seed of the data and of the request choices."),
+    ]
+    for option in reversed(options):
+        command = option(command)
+    return command
+
+
+@click.group()
+def cli():
+    """Benchmarks of the data manager and the HTTP routes on synthetic data."""
+
+
+@cli.command()
+@click.argument('path', type=click.Path(dir_okay=False))
+@_dataset_options
+def generate(path, users, movies_per_user, reviews_per_movie, titles, seed):
+    """Write a synthetic dataset to PATH as gzipped NDJSON (load it with `flask import`)."""
+    shape = dataset_shape(users, movies_per_user, reviews_per_movie, titles)
+    started = time.perf_counter()
+    records = write_dataset(path, shape, seed)
+    click.echo(f"Wrote {records} records to {path} in {time.perf_counter() - started:.1f}s")
+
+
+@cli.command()
+@_dataset_options
+@click.option('--database', type=click.Path(dir_okay=False),
+              help="Benchmark this database file; it is filled with synthetic data if empty. "
+                   "A throw-away file by default.")
+@click.option('--iterations', default=200, show_default=True, help="Calls per micro-benchmark.")
+@click.option('--scenario', 'scenarios', multiple=True, type=click.Choice(list(SCENARIOS)),
+              help="Load scenarios to run (repeatable); all by default.")
+@click.option('--concurrency', 'concurrencies', multiple=True, type=int,
+              help="Concurrent clients of every load scenario (repeatable); 1 and 8 by default.")
+@click.option('--requests', 'total_requests', default=2000, show_default=True, help="Requests per load run.")
+@click.option('--omdb-latency', default=0.05, show_default=True, help="Seconds the fake OMDb takes to answer.")
+@click.option('--omdb-jitter', default=0.02, show_default=True, help="Extra random seconds per OMDb answer.")
+@click.option('--omdb-error-rate', default=0.0, show_default=True, help="Share of OMDb answers that are 503s.")
+@click.option('--omdb-not-found-rate', default=0.0, show_default=True,
+              help="Share of OMDb answers that are 'Movie not found!'.")
+@click.option('--skip-micro', is_flag=True, help="Only run the load scenarios.")
+@click.option('--skip-load', is_flag=True, help="Only run the micro-benchmarks.")
+@click.option('--output', default='benchmark.json', show_default=True, type=click.Path(dir_okay=False),
+              help="File the JSON results are written to.")
+def run(users, movies_per_user, reviews_per_movie, titles, seed, database, iterations, scenarios,
+        concurrencies, total_requests, omdb_latency, omdb_jitter, omdb_error_rate, omdb_not_found_rate,
+        skip_micro, skip_load, output):
+    """Generate and load a dataset, run the benchmarks and write the results as JSON."""
+    workdir = Path(tempfile.mkdtemp(prefix="moviweb-bench-"))
+    fake_omdb = FakeOMDb(latency=omdb_latency, jitter=omdb_jitter, error_rate=omdb_error_rate,
+                         not_found_rate=omdb_not_found_rate, seed=seed)
+
+    with fake_omdb:
+        app_module = _import_app(workdir, database, fake_omdb)
+        from datamanager.bulk_import import BulkImporter
+        from benchmarks.micro import run_micro_benchmarks
+        app, manager = app_module.app, app_module.data_manager
+        with app.app_context():
+            engine = app_module.db.engine
+
+        dataset = {"loaded": None}
+        shape = read_shape(engine)
+        if not shape["users"]:
+            shape = dataset_shape(users, movies_per_user, reviews_per_movie, titles)
+            path = workdir / "dataset.ndjson.gz"
+            click.echo(f"Generating {shape['users']} users, {shape['movies']} movies, {shape['reviews']} reviews")
+            write_dataset(path, shape, seed)
+            importer = BulkImporter(engine, defer_indexes=True, report=None)
+            dataset["loaded"] = importer.run(str(path), 'ndjson', restart=True)
+            click.echo(f"Loaded at {dataset['loaded']['rows_per_second']} rows/s")
+        if not shape["movies"]:
+            raise click.UsageError(f"{os.environ['DATABASE_PATH']} has users but no movies to benchmark")
+        dataset["shape"] = shape
+
+        load_results = []
+        if not skip_load:
+            for scenario in scenarios or list(SCENARIOS):
+                for concurrency in concurrencies or (1, 8):
+                    load_results.append(run_load(app, shape, scenario, concurrency, total_requests, seed,
+                                                 report=click.echo))
+
+        micro_results = []
+        if not skip_micro:
+            micro_results = run_micro_benchmarks(manager, shape, iterations, seed, report=click.echo)
+
+        manager.enrichment_queue.shutdown()
+        manager.recommendation_updater.shutdown()
+
+    commit, dirty = _git_revision()
+    results = {
+        "meta": {
+            "commit": commit,
+            "dirty": dirty,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "storage_profile": manager.storage_profile["name"],
+            "parameters": {
+                "seed": seed, "iterations": iterations, "requests": total_requests,
+                "omdb_latency": omdb_latency, "omdb_jitter": omdb_jitter,
+                "omdb_error_rate": omdb_error_rate, "omdb_not_found_rate": omdb_not_found_rate,
+            },
+            "omdb_requests": fake_omdb.requests,
+        },
+        "dataset": dataset,
+        "micro": micro_results,
+        "load": load_results,
+    }
+    Path(output).write_text(json.dumps(results, indent=2))
+    click.echo(f"Results written to {output}")
+
+
+@cli.command('async-compare')
+@click.option('--users', default=50, show_default=True, help="Users the new titles are added to.")
+@click.option('--workers', default=4, show_default=True, help="Worker threads of the sync path.")
+@click.option('--clients', default=64, show_default=True, help="Concurrent clients of the async path.")
+@click.option('--requests', 'total_requests', default=256, show_default=True, help="Adds per path.")
+@click.option('--omdb-latency', default=0.5, show_default=True, help="Seconds the fake OMDb takes to answer.")
+@click.option('--omdb-jitter', default=0.05, show_default=True, help="Extra random seconds per OMDb answer.")
+@click.option('--output', default='async_compare.json', show_default=True, type=click.Path(dir_okay=False),
+              help="File the JSON results are written to.")
+def async_compare(users, workers, clients, total_requests, omdb_latency, omdb_jitter, output):
+    """Compare adding new titles (one OMDb lookup each) through the sync and the async API."""
+    workdir = Path(tempfile.mkdtemp(prefix="moviweb-bench-"))
+    with FakeOMDb(latency=omdb_latency, jitter=omdb_jitter) as fake_omdb:
+        app_module = _import_app(workdir, None, fake_omdb)
+        from async_api import AsyncAPI
+        from datamanager.async_data_manager import AsyncSQLiteDataManager
+        from datamanager.omdb_client import AsyncOMDbClient
+        from benchmarks.concurrency import run_async_adds, run_sync_adds
+        app, manager = app_module.app, app_module.data_manager
+        with app.app_context():
+            user_ids = [manager.add_user(f"Benchmark User {number}").user_id for number in range(users)]
+
+        # One pooled OMDb connection per client, so the pool does not cap the lookups in flight
+        omdb_client = AsyncOMDbClient(fake_omdb.url, "benchmark", pool_size=clients,
+                                      breaker=manager.omdb_client.breaker)
+        asgi_app = AsyncAPI(app, AsyncSQLiteDataManager(manager, omdb_client=omdb_client))
+        results = {
+            "sync": run_sync_adds(app, user_ids, workers, total_requests, token="sync", report=click.echo),
+            "async": run_async_adds(asgi_app, user_ids, clients, total_requests, token="async", report=click.echo),
+        }
+        manager.enrichment_queue.shutdown()
+        manager.recommendation_updater.shutdown()
+
+    speedup = results["async"]["ops_per_second"] / results["sync"]["ops_per_second"]
+    click.echo(f"async/sync throughput: {speedup:.1f}x")
+    commit, dirty = _git_revision()
+    results["meta"] = {
+        "commit": commit,
+        "dirty": dirty,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "cpus": os.cpu_count(),
+        "parameters": {"workers": workers, "clients": clients, "requests": total_requests,
+                       "omdb_latency": omdb_latency, "omdb_jitter": omdb_jitter},
+        "omdb_requests": fake_omdb.requests,
+        "speedup": round(speedup, 2),
+    }
+    Path(output).write_text(json.dumps(results, indent=2))
+    click.echo(f"Results written to {output}")
+
+
+@cli.command('write-burst')
+@click.option('--users', default=200, show_default=True, help="Synthetic users.")
+@click.option('--movies-per-user', default=5, show_default=True, help="Movies in every user's list.")
+@click.option('--threads', default=32, show_default=True, help="Threads writing reviews at once.")
+@click.option('--reviews', default=4000, show_default=True, help="Reviews written per mode.")
+@click.option('--seed', default=0, show_default=True, help="Seed of the data and of the reviews.")
+@click.option('--output', default='write_burst.json', show_default=True, type=click.Path(dir_okay=False),
+              help="File the JSON results are written to.")
+def write_burst(users, movies_per_user, threads, reviews, seed, output):
+    """Compare bursts of concurrent review writes with and without the single writer thread."""
+    from flask import Flask
+    from datamanager.bulk_import import BulkImporter
+    from datamanager.data_models import db
+    from datamanager.sqllite_data_magager import SQLiteDataManager
+    from benchmarks.concurrency import run_review_burst
+
+    workdir = Path(tempfile.mkdtemp(prefix="moviweb-bench-"))
+    shape = dataset_shape(users, movies_per_user, 0, users * movies_per_user)
+    dataset = workdir / "dataset.ndjson.gz"
+    write_dataset(dataset, shape, seed)
+
+    results = []
+    for writer in (False, True):
+        app = Flask(__name__)
+        app.config.update(SQLALCHEMY_DATABASE_URI=f"sqlite:///{workdir / f'writer-{writer}.db'}",
+                          OMDB_CACHE_PATH=None, OMDB_MIRROR_PATH=None, SQLITE_WRITER=writer)
+        manager = SQLiteDataManager(app)
+        with app.app_context():
+            BulkImporter(db.engine, defer_indexes=True, report=None).run(str(dataset), 'ndjson', restart=True)
+        results.append(run_review_burst(manager, shape, threads, reviews, seed, report=click.echo))
+        manager.enrichment_queue.shutdown()
+        manager.recommendation_updater.shutdown()
+        manager.writer.shutdown()
+
+    commit, dirty = _git_revision()
+    Path(output).write_text(json.dumps({
+        "meta": {"commit": commit, "dirty": dirty, "python": sys.version.split()[0],
+                 "sqlite": sqlite3.sqlite_version, "cpus": os.cpu_count(),
+                 "parameters": {"threads": threads, "reviews": reviews, "seed": seed}},
+        "dataset": shape,
+        "results": results,
+    }, indent=2))
+    click.echo(f"Results written to {output}")
+
+
+@cli.command('serialization')
+@click.option('--movies', default=1000, show_default=True, help="Movies in the encoded page.")
+@click.option('--repeat', default=50, show_default=True, help="Timed runs of every variant; the best one counts.")
+@click.option('--seed', default=0, show_default=True, help="Seed of the synthetic movies.")
+@click.option('--output', default='serialization.json', show_default=True, type=click.Path(dir_okay=False),
+              help="File the JSON results are written to.")
+def serialization_command(movies, repeat, seed, output):
+    """Compare row building, encoders and compression of a movie list page: microseconds per movie and bytes."""
+    from benchmarks.serialization import run_serialization_benchmarks
+
+    results = run_serialization_benchmarks(movies, repeat, seed, report=click.echo)
+    commit, dirty = _git_revision()
+    Path(output).write_text(json.dumps({
+        "meta": {"commit": commit, "dirty": dirty, "python": sys.version.split()[0], "cpus": os.cpu_count(),
+                 "parameters": {"movies": movies, "repeat": repeat, "seed": seed}},
+        **results,
+    }, indent=2))
+    click.echo(f"Results written to {output}")
+
+
+def _change(before, after):
+    if not before or after is None:
+        return "n/a"
+    return f"{(after - before) / before * 100:+.1f}%"
+
+
+@cli.command()
+@click.argument('baseline', type=click.File())
+@click.argument('candidate', type=click.File())
+def compare(baseline, candidate):
+    """Compare the throughput and p50/p99 of two result files, such as two commits."""
+    before, after = json.load(baseline), json.load(candidate)
+    click.echo(f"{before['meta']['commit'] or '?'} -> {after['meta']['commit'] or '?'}")
+    click.echo(f"{'benchmark':<40} {'ops/s':>9} {'p50':>9} {'p99':>9}")
+    for section, key in (("micro", lambda r: r["name"]), ("load", lambda r: f"{r['name']} x{r['concurrency']}")):
+        baseline_results = {key(result): result for result in before.get(section, [])}
+        for result in after.get(section, []):
+            old = baseline_results.get(key(result))
+            if old is None:
+                continue
+            click.echo(f"{key(result):<40} {_change(old['ops_per_second'], result['ops_per_second']):>9} "
+                       f"{_change(old['p50_ms'], result['p50_ms']):>9} {_change(old['p99_ms'], result['p99_ms']):>9}")
+
+
+if __name__ == '__main__':
+    cli()
@@ -0,0 +1,148 @@
+import asyncio
+import json
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.stats import summarize
+from datamanager.data_models import db
+
+
+def _requests(user_ids, total_requests, token):
+    """The OMDb-bound request mix: every request adds a title nobody has added yet."""
+    return [(user_ids[i % len(user_ids)], f"Premiere {token} {i}") for i in range(total_requests)]
+
+
+async def asgi_post(app, path, body):
+    """Send one JSON POST through an ASGI app in-process and return the response status."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': 'POST',
+        'scheme': 'http', 'path': path, 'raw_path': path.encode(), 'root_path': '', 'query_string': b'',
+        'headers': [(b'content-type', b'application/json'), (b'host', b'localhost')],
+        'server': ('localhost', 80), 'client': ('127.0.0.1', 0),
+    }
+    messages = [{'type': 'http.request', 'body': json.dumps(body).encode(), 'more_body': False}]
+    status = []
+
+    async def receive():
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await app(scope, receive, send)
+    return status[0]
+
+
+async def asgi_shutdown(app):
+    """Run an ASGI app's lifespan shutdown, closing what it holds on the current event loop."""
+    messages = [{'type': 'lifespan.shutdown'}]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    await app({'type': 'lifespan', 'asgi': {'version': '3.0'}}, receive, send)
+
+
+def run_sync_adds(app, user_ids, workers=4, total_requests=256, token=0, report=print):
+    """
+    Add new titles through the Flask app with a fixed number of sync workers.
+
+    Each worker thread serves one request at a time, like the workers of a
+    WSGI server, so at most `workers` OMDb lookups are in flight.
+    """
+    client = app.test_client()
+
+    def add(request):
+        user_id, title = request
+        started = time.perf_counter()
+        status = client.post(f"/api/users/{user_id}/movies", json={"title": title}).status_code
+        return status, time.perf_counter() - started
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        outcomes = list(pool.map(add, _requests(user_ids, total_requests, token)))
+    result = _summarize("sync", outcomes, time.perf_counter() - started, workers=workers)
+    if report:
+        report(_line(result))
+    return result
+
+
+def run_async_adds(asgi_app, user_ids, clients=64, total_requests=256, token=0, report=print):
+    """
+    Add new titles through the ASGI app from `clients` concurrent in-process callers, on one event loop.
+
+    The app is shut down afterwards, as its connections belong to that loop.
+    """
+    async def main():
+        limit = asyncio.Semaphore(clients)
+
+        async def add(request):
+            user_id, title = request
+            async with limit:
+                started = time.perf_counter()
+                status = await asgi_post(asgi_app, f"/api/users/{user_id}/movies", {"title": title})
+                return status, time.perf_counter() - started
+
+        started = time.perf_counter()
+        outcomes = await asyncio.gather(*(add(request) for request in _requests(user_ids, total_requests, token)))
+        wall = time.perf_counter() - started
+        await asgi_shutdown(asgi_app)
+        return outcomes, wall
+
+    outcomes, wall = asyncio.run(main())
+    result = _summarize("async", outcomes, wall, clients=clients)
+    if report:
+        report(_line(result))
+    return result
+
+
+def run_review_burst(manager, shape, threads=32, total_reviews=4000, seed=0, report=print):
+    """
+    Write reviews from many threads at once through the data manager.
+
+    Every thread sends its share back to back, which is the bursty traffic
+    where SQLite's single write lock is contended most. Writes that fail
+    (such as "database is locked") are counted as errors.
+    """
+    def write(number):
+        rng = random.Random(seed + number)
+        outcomes = []
+        with manager.app.app_context():
+            for _ in range(number, total_reviews, threads):
+                started = time.perf_counter()
+                try:
+                    manager.add_review(rng.randint(1, shape["users"]), rng.randint(1, shape["movies"]),
+                                       "Burst review", rng.randint(1, 10))
+                    status = 201
+                except Exception:
+                    db.session.rollback()
+                    status = 500
+                outcomes.append((status, time.perf_counter() - started))
+        return outcomes
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        outcomes = [outcome for chunk in pool.map(write, range(threads)) for outcome in chunk]
+    name = "writer" if manager.writer.stats() is not None else "direct"
+    result = _summarize(name, outcomes, time.perf_counter() - started, threads=threads)
+    if report:
+        report(_line(result))
+    return result
+
+
+def _summarize(name, outcomes, wall, **extra):
+    timings = [elapsed for status, elapsed in outcomes if status < 500]
+    statuses = {}
+    for status, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return summarize(name, timings, wall, len(outcomes) - len(timings), statuses=statuses, **extra)
+
+
+def _line(result):
+    return (f"{result['name']:<6} {result['ops_per_second']} req/s  p50 {result['p50_ms']} ms  "
+            f"p99 {result['p99_ms']} ms  statuses {result['statuses']}")
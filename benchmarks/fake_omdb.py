@@ -0,0 +1,107 @@
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeOMDb:
+    """
+    Local stand-in for the OMDb API with configurable latency and failures.
+
+    Every title is "found" with details derived from the title itself, so
+    answers are stable across runs; titles containing "unknown" get OMDb's
+    "Movie not found!" answer. Point the app at it with API_URL=fake.url.
+
+    Use it as a context manager, or call start() and stop().
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, not_found_rate=0.0, seed=0,
+                 host='127.0.0.1', port=0):
+        """
+        Args:
+            latency (float): Seconds every answer is delayed by.
+            jitter (float): Up to this many extra seconds, drawn uniformly per request.
+            error_rate (float): Share of requests answered with HTTP 503.
+            not_found_rate (float): Share of requests answered with "Movie not found!".
+            seed (int): Seed of the random delays and failures.
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.not_found_rate = not_found_rate
+        self.requests = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            return self._rng.random(), self._rng.random(), self._rng.uniform(0, self.jitter)
+
+    @staticmethod
+    def details(title):
+        """Return the OMDb answer for a title; the same title always gets the same details."""
+        checksum = zlib.crc32(title.lower().encode())
+        return {
+            "Title": title,
+            "Year": str(1950 + checksum % 75),
+            "Director": f"Director {checksum % 997}",
+            "imdbRating": f"{1 + checksum % 90 / 10:.1f}",
+            "imdbID": f"tt{checksum % 10000000:07d}",
+            "Response": "True",
+        }
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                error_draw, not_found_draw, jitter = fake._draw()
+                time.sleep(fake.latency + jitter)
+                if error_draw < fake.error_rate:
+                    self._send(503, {"Error": "Service unavailable"})
+                    return
+                title = parse_qs(urlparse(self.path).query).get("t", [""])[0]
+                if not title or "unknown" in title.lower() or not_found_draw < fake.not_found_rate:
+                    self._send(200, {"Response": "False", "Error": "Movie not found!"})
+                    return
+                self._send(200, fake.details(title))
+
+            def _send(self, status, body):
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fake-omdb", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,147 @@
+import logging
+import random
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from werkzeug.serving import make_server
+
+from benchmarks.stats import summarize
+from benchmarks.synthetic import REVIEW_WORDS, title_for
+
+
+# Weighted request mixes: (weight, method, path template, JSON body template).
+# Templates are filled with a random {user}, {movie}, {title} (from the
+# dataset), {word} (for searches) and {new_title} (unknown to the catalog).
+SCENARIOS = {
+    "api_reads": [
+        (30, "GET", "/api/users/{user}/movies", None),
+        (20, "GET", "/api/users?limit=50", None),
+        (15, "GET", "/api/movies/{movie}/stats", None),
+        (10, "GET", "/api/users/{user}/stats", None),
+        (15, "GET", "/api/search?q={title}", None),
+        (10, "GET", "/api/search?type=reviews&q={word}", None),
+    ],
+    "pages": [
+        (10, "GET", "/", None),
+        (30, "GET", "/users", None),
+        (40, "GET", "/users/{user}", None),
+        (20, "GET", "/movies/{movie}/reviews", None),
+    ],
+    "mixed": [
+        (40, "GET", "/api/users/{user}/movies", None),
+        (20, "GET", "/api/users?limit=50", None),
+        (15, "GET", "/api/search?q={title}", None),
+        (10, "GET", "/api/movies/{movie}/stats", None),
+        (10, "POST", "/api/users/{user}/movies", {"title": "{title}"}),
+        (5, "POST", "/api/users/{user}/movies", {"title": "{new_title}"}),
+    ],
+}
+
+
+class AppServer:
+    """Serve a Flask app from a background thread on a free local port, one thread per request."""
+
+    def __init__(self, app, host='127.0.0.1'):
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)  # No access log line per request
+        self._server = make_server(host, 0, app, threaded=True)
+        self._thread = threading.Thread(target=self._server.serve_forever, name="benchmark-app", daemon=True)
+
+    @property
+    def url(self):
+        return f"http://{self._server.host}:{self._server.port}"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def _fill(template, values):
+    if isinstance(template, dict):
+        return {key: _fill(value, values) for key, value in template.items()}
+    return template.format(**values) if isinstance(template, str) else template
+
+
+def run_load(app, shape, scenario, concurrency=8, total_requests=2000, seed=0, timeout=30, report=print):
+    """
+    Run a weighted request mix against an app from concurrent clients.
+
+    Each client thread keeps its own HTTP session (keep-alive) and sends
+    its share of the requests back to back, so the throughput measured is
+    the most the app sustains at this concurrency.
+
+    Args:
+        app (Flask): The app under test.
+        shape (dict): The dataset shape (see synthetic.dataset_shape).
+        scenario (str): A key of SCENARIOS.
+        concurrency (int): Client threads.
+        total_requests (int): Requests over all clients.
+        seed (int): Seed of the request choices; client n uses seed + n.
+        timeout (float): Seconds a single request may take.
+        report (callable): Called with a one-line summary; None for silence.
+
+    Returns:
+        dict: The overall summary (see stats.summarize) with the status codes
+            and a summary per path template under "routes".
+    """
+    mix = SCENARIOS[scenario]
+    weights = [weight for weight, *_ in mix]
+    token = time.time_ns()
+
+    def client(number):
+        rng = random.Random(seed + number)
+        timings, statuses, errors = {}, Counter(), 0
+        with requests.Session() as session:
+            for i in range(number, total_requests, concurrency):
+                _, method, path, body = rng.choices(mix, weights)[0]
+                values = {
+                    "user": rng.randint(1, shape["users"]),
+                    "movie": rng.randint(1, shape["movies"]),
+                    "title": title_for(int(rng.random() ** 2 * shape["titles"])),
+                    "word": rng.choice(REVIEW_WORDS),
+                    "new_title": f"Premiere {token} {i}",
+                }
+                started = time.perf_counter()
+                try:
+                    response = session.request(method, server.url + _fill(path, values),
+                                               json=_fill(body, values), timeout=timeout)
+                except requests.RequestException:
+                    errors += 1
+                    continue
+                elapsed = time.perf_counter() - started
+                statuses[response.status_code] += 1
+                if response.status_code >= 500:
+                    errors += 1
+                else:
+                    timings.setdefault(f"{method} {path}", []).append(elapsed)
+        return timings, statuses, errors
+
+    with AppServer(app) as server:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(client, range(concurrency)))
+        wall = time.perf_counter() - started
+
+    routes, statuses, errors = {}, Counter(), 0
+    for client_timings, client_statuses, client_errors in outcomes:
+        for route, values in client_timings.items():
+            routes.setdefault(route, []).extend(values)
+        statuses.update(client_statuses)
+        errors += client_errors
+
+    result = summarize(
+        scenario, [value for values in routes.values() for value in values], wall, errors,
+        concurrency=concurrency,
+        statuses={str(status): count for status, count in sorted(statuses.items())},
+        routes=[summarize(route, values, wall) for route, values in sorted(routes.items())],
+    )
+    if report:
+        report(f"{scenario:<12} x{concurrency:<3} {result['ops_per_second']} req/s  "
+               f"p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms  errors {errors}")
+    return result
@@ -0,0 +1,133 @@
+import random
+import time
+
+from datamanager.data_models import db, ReviewStats
+from datamanager.sqllite_data_magager import MOVIE_REVIEWS_PLAN, USER_MOVIES_PLAN
+from datamanager.versions import USER
+from benchmarks.stats import summarize
+from benchmarks.synthetic import REVIEW_WORDS, title_for
+
+
+# Calls of whole-table reads are capped at this many, whatever the iteration count
+FULL_SCAN_ITERATIONS = 5
+
+
+def _distinct_ids(rng, count, wanted):
+    """Pick up to wanted distinct IDs out of 1..count, for operations that consume what they touch."""
+    return rng.sample(range(1, count + 1), min(wanted, count)) if count else []
+
+
+def micro_benchmarks(manager, shape, iterations, seed=0):
+    """
+    Build the micro-benchmarks of every SQLiteDataManager method.
+
+    Each benchmark is a (name, operation, arguments, calls) tuple; arguments(i)
+    picks the arguments of call i outside of the timing. Reads come first,
+    then writes, then deletes, so reads see the full dataset and deletes
+    never hit the same row twice.
+
+    Args:
+        manager (SQLiteDataManager): The data manager under test.
+        shape (dict): The dataset shape (see synthetic.dataset_shape).
+        iterations (int): Calls per benchmark.
+        seed (int): Seed of the ID choices.
+    """
+    rng = random.Random(seed)
+    # Titles nobody added before, so adds go all the way to (the fake) OMDb
+    token = time.time_ns()
+
+    def user(i=None):
+        return (rng.randint(1, shape["users"]),)
+
+    def movie(i=None):
+        return (rng.randint(1, shape["movies"]),)
+
+    def known_title():
+        return title_for(int(rng.random() ** 2 * shape["titles"]))
+
+    def new_title(i, n=0):
+        return f"Premiere {token} {i} {n}"
+
+    def review_text():
+        return " ".join(rng.choices(REVIEW_WORDS, k=8))
+
+    def consumed(count):
+        ids = _distinct_ids(rng, count, iterations)
+        return (lambda i: (ids[i],)), len(ids)
+
+    deleted_reviews, review_deletes = consumed(shape["reviews"])
+    deleted_movies, movie_deletes = consumed(shape["movies"])
+    deleted_users, user_deletes = consumed(shape["users"])
+
+    return [
+        ("get_all_users", manager.get_all_users, lambda i: (), FULL_SCAN_ITERATIONS),
+        ("get_user", manager.get_user, user, iterations),
+        ("get_user (with movies)", lambda u: manager.get_user(u, load=USER_MOVIES_PLAN), user, iterations),
+        ("get_user_movies", manager.get_user_movies, user, iterations),
+        ("get_movie", manager.get_movie, movie, iterations),
+        ("get_movie (with reviews)", lambda m: manager.get_movie(m, load=MOVIE_REVIEWS_PLAN), movie, iterations),
+        ("get_users_page", lambda u: manager.get_users_page(after_id=u), user, iterations),
+        ("get_users_page (fields)", lambda u: manager.get_users_page(after_id=u, fields=["user_id", "name"]),
+         user, iterations),
+        ("get_user_movies_page", manager.get_user_movies_page, user, iterations),
+        ("get_movie_reviews", manager.get_movie_reviews, movie, iterations),
+        ("get_user_reviews", manager.get_user_reviews, user, iterations),
+        ("get_review_stats", lambda m: manager.get_review_stats(ReviewStats.MOVIE, m), movie, iterations),
+        ("get_data_version", lambda u: manager.get_data_version(USER, u), user, iterations),
+        ("search movies", manager.search, lambda i: (known_title(),), iterations),
+        ("search reviews", lambda q: manager.search(q, kind="reviews"),
+         lambda i: (" ".join(rng.sample(REVIEW_WORDS, 2)),), iterations),
+        ("find_catalog_entry", manager.find_catalog_entry, lambda i: (known_title(),), iterations),
+        ("fetch_movie_details (OMDb)", manager.fetch_movie_details, lambda i: (new_title(i),), iterations),
+        ("add_user", manager.add_user, lambda i: (f"Benchmark User {i}",), iterations),
+        ("add_movie (catalog hit)", manager.add_movie, lambda i: (*user(), known_title()), iterations),
+        ("add_movie (OMDb)", manager.add_movie, lambda i: (*user(), new_title(i, 1)), iterations),
+        ("add_movies_bulk (10 titles)", manager.add_movies_bulk,
+         lambda i: (*user(), [new_title(i, n) if n % 2 else known_title() for n in range(10)]), iterations),
+        ("update_movie", manager.update_movie,
+         lambda i: (*movie(), new_title(i, 2), "Benchmark Director", "2024", "7.5"), iterations),
+        ("add_review", manager.add_review,
+         lambda i: (*user(), *movie(), review_text(), rng.randint(1, 10)), iterations),
+        ("delete_review", manager.delete_review, deleted_reviews, review_deletes),
+        ("delete_movie", manager.delete_movie, deleted_movies, movie_deletes),
+        ("delete_user", manager.delete_user, deleted_users, user_deletes),
+    ]
+
+
+def run_micro_benchmarks(manager, shape, iterations=200, seed=0, only=None, report=print):
+    """
+    Time every data manager method, one call per app context as in a request.
+
+    Args:
+        manager (SQLiteDataManager): The data manager under test.
+        shape (dict): The dataset shape (see synthetic.dataset_shape).
+        iterations (int): Calls per benchmark.
+        seed (int): Seed of the ID choices.
+        only (iterable or None): Names of the benchmarks to run; all by default.
+        report (callable): Called with one line per finished benchmark; None for silence.
+
+    Returns:
+        list: One summary dict per benchmark (see stats.summarize).
+    """
+    results = []
+    for name, operation, arguments, count in micro_benchmarks(manager, shape, iterations, seed):
+        if only and name not in only:
+            continue
+        timings, errors = [], 0
+        started = time.perf_counter()
+        for i in range(count):
+            with manager.app.app_context():
+                args = arguments(i)
+                call_started = time.perf_counter()
+                try:
+                    operation(*args)
+                except Exception:
+                    errors += 1
+                    db.session.rollback()
+                else:
+                    timings.append(time.perf_counter() - call_started)
+        result = summarize(name, timings, time.perf_counter() - started, errors)
+        results.append(result)
+        if report:
+            report(f"{name:<32} {result['operations']:>6} ops  p50 {result['p50_ms']} ms  p99 {result['p99_ms']} ms")
+    return results
@@ -0,0 +1,109 @@
+import random
+import time
+
+from flask import Flask, jsonify
+from sqlalchemy import Column, Float, Integer, MetaData, String, Table, create_engine, insert, select
+
+from benchmarks.synthetic import FIRST_NAMES, LAST_NAMES, title_for
+import serialization
+from serialization import JSON_MIMETYPE, MSGPACK_MIMETYPES, compress, offered_encodings, serialize
+
+
+def movie_table(movies, seed=0):
+    """Build an in-memory table holding the columns of a movie list page, with `movies` rows."""
+    rng = random.Random(seed)
+    engine = create_engine('sqlite://')
+    table = Table('movie_list', MetaData(),
+                  Column('movie_id', Integer, primary_key=True), Column('title', String),
+                  Column('director', String), Column('year', Integer), Column('rating', Float))
+    table.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(insert(table), [
+            {"movie_id": number + 1, "title": title_for(number),
+             "director": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             "year": rng.randint(1950, 2024), "rating": round(rng.uniform(1, 10), 1)}
+            for number in range(movies)
+        ])
+    return engine, table
+
+
+def _per_movie_us(function, movies, repeat):
+    """Best time of `repeat` calls of function, in microseconds per movie."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return round(best / movies * 1e6, 3), result
+
+
+def run_serialization_benchmarks(movies=1000, repeat=50, seed=0, report=print):
+    """
+    Compare the ways of building and encoding a page of `movies` movies.
+
+    Rows are read from an in-memory SQLite table, as dicts built from
+    result mappings (the previous path) and from plain tuples. The page is
+    then encoded with Flask's jsonify (the previous path), the stdlib
+    encoder, orjson and MessagePack (each when installed), and every body
+    is compressed with each available Content-Encoding.
+
+    Returns:
+        dict: "rows" and "encoders" results, with microseconds per movie and bytes on the wire.
+    """
+    engine, table = movie_table(movies, seed)
+    fields = [column.name for column in table.columns]
+    statement = select(table.c.movie_id.label('_cursor'), *table.columns)
+
+    def from_mappings():
+        with engine.connect() as connection:
+            rows = connection.execute(statement).mappings().all()
+            return [{field: row[field] for field in fields} for row in rows]
+
+    def from_tuples():
+        with engine.connect() as connection:
+            rows = connection.execute(statement).tuples().all()
+            return [dict(zip(fields, row[1:])) for row in rows]
+
+    row_results = []
+    for name, build in (("mappings (before)", from_mappings), ("tuples", from_tuples)):
+        us, page = _per_movie_us(build, movies, repeat)
+        row_results.append({"name": name, "us_per_movie": us})
+        if report:
+            report(f"rows     {name:<20} {us:>8} us/movie")
+
+    body = {"user_id": 1, "name": f"{FIRST_NAMES[0]} {LAST_NAMES[0]}", "movies": page,
+            "next_cursor": None, "next": None}
+    app = Flask(__name__)
+
+    def flask_jsonify():
+        with app.app_context():
+            return jsonify(body).get_data()
+
+    def stdlib_json():
+        fast, serialization.orjson = serialization.orjson, None
+        try:
+            return serialize(body, JSON_MIMETYPE)
+        finally:
+            serialization.orjson = fast
+
+    encoders = [("jsonify (before)", flask_jsonify), ("json", stdlib_json)]
+    if serialization.orjson is not None:
+        encoders.append(("orjson", lambda: serialize(body, JSON_MIMETYPE)))
+    if serialization.msgpack is not None:
+        encoders.append(("msgpack", lambda: serialize(body, MSGPACK_MIMETYPES[0])))
+
+    encoder_results = []
+    for name, encode in encoders:
+        us, data = _per_movie_us(encode, movies, repeat)
+        result = {"name": name, "us_per_movie": us, "bytes": len(data)}
+        for encoding in offered_encodings():
+            compress_us, compressed = _per_movie_us(lambda: compress(data, encoding), movies, max(repeat // 5, 1))
+            result[f"{encoding}_bytes"] = len(compressed)
+            result[f"{encoding}_us_per_movie"] = compress_us
+        encoder_results.append(result)
+        if report:
+            compressed = "  ".join(f"{encoding} {result[f'{encoding}_bytes']} B (+{result[f'{encoding}_us_per_movie']} us)"
+                                   for encoding in offered_encodings())
+            report(f"encode   {name:<20} {us:>8} us/movie  {len(data)} B  {compressed}")
+    return {"movies": movies, "rows": row_results, "encoders": encoder_results}
@@ -0,0 +1,49 @@
+import math
+
+
+def percentile(sorted_values, fraction):
+    """
+    Nearest-rank percentile of already sorted values.
+
+    Args:
+        sorted_values (list): Values in ascending order.
+        fraction (float): 0.5 for the median, 0.99 for p99.
+    """
+    if not sorted_values:
+        return None
+    rank = max(math.ceil(fraction * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def summarize(name, timings, wall_seconds, errors=0, **extra):
+    """
+    Summarize the latencies of one benchmark.
+
+    Args:
+        name (str): The benchmark name.
+        timings (list): Seconds taken by every successful operation.
+        wall_seconds (float): Elapsed time of the whole run, for the throughput.
+        errors (int): Operations that raised or answered with an error.
+        **extra: Further fields to keep in the result, such as the concurrency.
+
+    Returns:
+        dict: Counts, throughput and latency percentiles in milliseconds.
+    """
+    ordered = sorted(timings)
+
+    def ms(value):
+        return round(value * 1000, 3) if value is not None else None
+
+    return {
+        "name": name,
+        "operations": len(ordered),
+        "errors": errors,
+        "seconds": round(wall_seconds, 4),
+        "ops_per_second": round(len(ordered) / wall_seconds, 1) if wall_seconds else None,
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else None,
+        "p50_ms": ms(percentile(ordered, 0.50)),
+        "p90_ms": ms(percentile(ordered, 0.90)),
+        "p99_ms": ms(percentile(ordered, 0.99)),
+        "max_ms": ms(ordered[-1]) if ordered else None,
+        **extra,
+    }
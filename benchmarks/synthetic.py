@@ -0,0 +1,123 @@
+import gzip
+import json
+import random
+
+from sqlalchemy import text
+
+
+ADJECTIVES = ("Silent", "Crimson", "Lost", "Electric", "Hidden", "Broken", "Golden", "Frozen", "Wild", "Last",
+              "Midnight", "Distant", "Burning", "Hollow", "Secret", "Savage", "Quiet", "Endless", "Fallen", "Iron")
+NOUNS = ("River", "Empire", "Garden", "Signal", "Horizon", "Kingdom", "Mirror", "Harbor", "Protocol", "Voyage",
+         "Forest", "Machine", "Station", "Shadow", "Orchard", "Frontier", "Lantern", "Canyon", "Dynasty", "Echo")
+FIRST_NAMES = ("Ada", "Ben", "Chloe", "Dev", "Elena", "Farid", "Grace", "Hugo", "Iris", "Jonas", "Kemi", "Luca",
+               "Maya", "Noor", "Oscar", "Priya", "Quinn", "Rosa", "Sami", "Tara")
+LAST_NAMES = ("Abara", "Brandt", "Costa", "Dubois", "Eriksen", "Fischer", "Garcia", "Haddad", "Ito", "Jensen",
+              "Kowalski", "Lopez", "Moreau", "Nakamura", "Okafor", "Petrov", "Quist", "Rossi", "Silva", "Tanaka")
+REVIEW_WORDS = ("gripping", "slow", "beautiful", "score", "cast", "plot", "twist", "ending", "dialogue", "pacing",
+                "visuals", "acting", "story", "soundtrack", "characters", "cinematography", "funny", "dark",
+                "moving", "predictable", "original", "sequel", "director", "performance", "atmosphere")
+
+
+def title_for(index):
+    """Return the distinct title of catalog entry number index, such as 'Silent River' or 'Silent River 3'."""
+    adjective = ADJECTIVES[index % len(ADJECTIVES)]
+    noun = NOUNS[index // len(ADJECTIVES) % len(NOUNS)]
+    series = index // (len(ADJECTIVES) * len(NOUNS))
+    return f"{adjective} {noun} {series + 1}" if series else f"{adjective} {noun}"
+
+
+def imdb_id_for(index):
+    return f"tt{9000000 + index:07d}"
+
+
+def dataset_shape(users, movies_per_user, reviews_per_movie, titles):
+    """
+    Describe a synthetic dataset by the ID ranges it fills.
+
+    Movie m belongs to user (m - 1) // movies_per_user + 1, and review r is
+    about movie (r - 1) // reviews_per_movie + 1, so benchmarks can pick
+    valid IDs without querying.
+    """
+    movies = users * movies_per_user
+    return {
+        "users": users,
+        "movies_per_user": movies_per_user,
+        "movies": movies,
+        "reviews_per_movie": reviews_per_movie,
+        "reviews": movies * reviews_per_movie,
+        "titles": titles,
+    }
+
+
+def generate_records(shape, seed=0):
+    """
+    Yield the records of a synthetic dataset in the NDJSON import format.
+
+    The same shape and seed always produce the same records. Titles are
+    drawn from a pool of shape["titles"] catalog entries, so popular films
+    are shared by many users as in real data.
+
+    Args:
+        shape (dict): As returned by dataset_shape.
+        seed (int): Seed of the random choices.
+
+    Yields:
+        dict: One user, movie or review with its "type" field.
+    """
+    rng = random.Random(seed)
+    for user_id in range(1, shape["users"] + 1):
+        name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {user_id}"
+        yield {"type": "user", "user_id": user_id, "name": name}
+
+    for movie_id in range(1, shape["movies"] + 1):
+        # Squaring skews the choice towards the first titles, so some are far more popular
+        index = int(rng.random() ** 2 * shape["titles"])
+        yield {
+            "type": "movie",
+            "movie_id": movie_id,
+            "user_id": (movie_id - 1) // shape["movies_per_user"] + 1,
+            "title": title_for(index),
+            "director": f"{FIRST_NAMES[index % len(FIRST_NAMES)]} {LAST_NAMES[index // 7 % len(LAST_NAMES)]}",
+            "year": 1950 + index % 75,
+            "rating": round(1 + index % 90 / 10, 1),
+            "imdb_id": imdb_id_for(index),
+        }
+
+    for review_id in range(1, shape["reviews"] + 1):
+        yield {
+            "type": "review",
+            "review_id": review_id,
+            "user_id": rng.randint(1, shape["users"]),
+            "movie_id": (review_id - 1) // shape["reviews_per_movie"] + 1,
+            "rating": float(rng.randint(1, 10)),
+            "review_text": " ".join(rng.choices(REVIEW_WORDS, k=rng.randint(4, 16))).capitalize() + ".",
+        }
+
+
+def write_dataset(path, shape, seed=0):
+    """Write a synthetic dataset to a gzipped NDJSON file and return the number of records."""
+    count = 0
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=1) as file:
+        for record in generate_records(shape, seed):
+            file.write(json.dumps(record) + '\n')
+            count += 1
+    return count
+
+
+def read_shape(engine):
+    """Derive the shape of the dataset already in a database, for benchmarks run against an existing file."""
+    with engine.connect() as connection:
+        users, movies, reviews, titles = connection.execute(text(
+            "SELECT (SELECT COALESCE(MAX(user_id), 0) FROM users),"
+            " (SELECT COALESCE(MAX(movie_id), 0) FROM movies),"
+            " (SELECT COALESCE(MAX(review_id), 0) FROM reviews),"
+            " (SELECT COUNT(*) FROM catalog)"
+        )).one()
+    return {
+        "users": users,
+        "movies_per_user": max(movies // users, 1) if users else 0,
+        "movies": movies,
+        "reviews_per_movie": max(reviews // movies, 1) if movies else 0,
+        "reviews": reviews,
+        "titles": titles,
+    }
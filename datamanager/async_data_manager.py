@@ -0,0 +1,293 @@
+import asyncio
+import os
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+try:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    import aiosqlite
+except ImportError:  # Optional: only the async API tier needs it
+    aiosqlite = None
+
+from datamanager.data_manager_interface import DataManagerInterface
+from datamanager.data_models import User, Movie, Review, CatalogEntry, ReviewStats
+from datamanager.omdb_cache import OMDbCache, MISSING
+from datamanager.omdb_client import AsyncOMDbClient, OMDbUnavailableError
+from datamanager.metrics import OMDB_LOOKUPS
+from datamanager.sqllite_data_magager import (SQLiteDataManager, USER_FIELDS, MOVIE_FIELDS, OMDB_API_URL,
+                                              OMDB_API_KEY, dedupe_titles, find_known_titles, keyset_page,
+                                              store_bulk_movies)
+from datamanager.storage import install_pragmas, is_memory_database
+from datamanager.versions import read_version
+
+
+# Async data manager configuration
+load_dotenv()
+ASYNC_LOOKUP_CONCURRENCY = int(os.getenv('ASYNC_LOOKUP_CONCURRENCY', 64))
+
+
+class AsyncSQLiteDataManager(DataManagerInterface):
+    """
+    Coroutine version of SQLiteDataManager for the async API tier.
+
+    Reads and the OMDb-bound writes (add_movie, add_movies_bulk) run on
+    async SQLAlchemy over aiosqlite with the non-blocking OMDb client, so
+    slow lookups wait on the event loop instead of holding a worker, and no
+    database connection is held while OMDb is being asked. Rare writes with
+    cascades and aggregate bookkeeping (update, delete, reviews) reuse the
+    sync manager in a worker thread, so that logic lives in one place.
+
+    It shares the sync manager's database, OMDb cache, mirror and circuit
+    breaker, and never creates or migrates the schema itself.
+    """
+
+    def __init__(self, manager, lookup_concurrency=ASYNC_LOOKUP_CONCURRENCY, omdb_client=None):
+        """
+        Args:
+            manager (SQLiteDataManager): The sync manager of the same app.
+            lookup_concurrency (int): Maximum OMDb lookups in flight per batch.
+            omdb_client (AsyncOMDbClient, optional): Defaults to one sharing the sync client's breaker.
+
+        Raises:
+            RuntimeError: If aiosqlite is not installed.
+            ValueError: For in-memory databases, which cannot be shared with the sync manager.
+        """
+        if aiosqlite is None:
+            raise RuntimeError("The async API tier needs aiosqlite: pip install aiosqlite")
+        uri = manager.app.config['SQLALCHEMY_DATABASE_URI']
+        if is_memory_database(uri):
+            raise ValueError("The async API tier needs a database file")
+
+        profile = manager.storage_profile
+        self.sync_manager = manager
+        self.engine = create_async_engine(
+            make_url(uri).set(drivername='sqlite+aiosqlite'),
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=profile['pool_size'],
+            max_overflow=profile['max_overflow'],
+            connect_args={'timeout': profile['busy_timeout'] / 1000},
+        )
+        install_pragmas(self.engine.sync_engine, profile)
+        self.session = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.lookup_concurrency = lookup_concurrency
+        self.omdb_cache = manager.omdb_cache
+        self.omdb_mirror = manager.omdb_mirror
+        self.omdb_client = omdb_client or AsyncOMDbClient(OMDB_API_URL, OMDB_API_KEY,
+                                                          breaker=manager.omdb_client.breaker)
+
+    async def close(self):
+        """Close the connection pool and the OMDb client."""
+        await self.omdb_client.close()
+        await self.engine.dispose()
+
+    async def _in_sync_manager(self, method, *args):
+        """Run a method of the sync manager in a worker thread, inside an app context."""
+        def call():
+            with self.sync_manager.app.app_context():
+                return method(*args)
+        return await asyncio.to_thread(call)
+
+    async def get_all_users(self):
+        """Retrieve all users."""
+        async with self.session() as session:
+            return (await session.scalars(select(User))).all()
+
+    async def get_user(self, user_id):
+        """Retrieve a user by their ID."""
+        async with self.session() as session:
+            return await session.get(User, user_id)
+
+    async def get_user_movies(self, user_id):
+        """Retrieve all movies of a user, with their enrichment status."""
+        async with self.session() as session:
+            statement = select(Movie).options(joinedload(Movie.enrichment)).filter_by(user_id=user_id)
+            return (await session.scalars(statement)).unique().all()
+
+    async def get_movie(self, movie_id):
+        """Retrieve a movie by its ID, with its enrichment status."""
+        async with self.session() as session:
+            statement = select(Movie).options(joinedload(Movie.enrichment)).filter_by(movie_id=movie_id)
+            return (await session.scalars(statement)).first()
+
+    async def get_users_page(self, after_id=None, limit=50, fields=None):
+        """Retrieve one page of users ordered by ID (see SQLiteDataManager.get_users_page)."""
+        async with self.session() as session:
+            return await session.run_sync(keyset_page, User, User.user_id, USER_FIELDS, [], after_id, limit,
+                                          fields, (), ())
+
+    async def get_user_movies_page(self, user_id, after_id=None, limit=50, fields=None):
+        """Retrieve one page of a user's movies ordered by ID (see SQLiteDataManager.get_user_movies_page)."""
+        async with self.session() as session:
+            return await session.run_sync(keyset_page, Movie, Movie.movie_id, MOVIE_FIELDS,
+                                          [Movie.user_id == user_id], after_id, limit, fields,
+                                          (joinedload(Movie.enrichment),), (Movie.catalog,))
+
+    async def get_movie_reviews(self, movie_id):
+        """Retrieve all reviews of a movie."""
+        async with self.session() as session:
+            return (await session.scalars(select(Review).filter_by(movie_id=movie_id))).all()
+
+    async def get_user_reviews(self, user_id):
+        """Retrieve all reviews written by a user."""
+        async with self.session() as session:
+            return (await session.scalars(select(Review).filter_by(user_id=user_id))).all()
+
+    async def get_review_stats(self, scope, subject_id):
+        """Read the review aggregates of one movie or user; None if nothing has been reviewed yet."""
+        async with self.session() as session:
+            return await session.get(ReviewStats, (scope, subject_id))
+
+    async def get_data_version(self, scope, subject_id):
+        """Read a version counter (see SQLiteDataManager.get_data_version)."""
+        async with self.session() as session:
+            return await session.run_sync(read_version, scope, subject_id)
+
+    async def add_user(self, name):
+        """Add a user and return it."""
+        async with self.session() as session:
+            user = User(name=name)
+            session.add(user)
+            await session.commit()
+            return user
+
+    async def fetch_movie_details(self, movie_name):
+        """
+        Fetch movie details from the OMDb cache, the local OMDb mirror or OMDb, in that order.
+
+        The cache and mirror are blocking SQLite files, so they are read and
+        written in worker threads to keep the event loop free while a
+        writer holds their lock.
+
+        Raises:
+            OMDbUnavailableError: If OMDb is down or its circuit breaker is open.
+        """
+        cached = await asyncio.to_thread(self.omdb_cache.get, movie_name)
+        if cached is not MISSING and (cached is None or "imdb_id" in cached):
+            OMDB_LOOKUPS.inc(result='cache_hit' if cached else 'cache_not_found')
+            return cached
+
+        mirrored = await asyncio.to_thread(self.omdb_mirror.lookup, movie_name)
+        if mirrored is not None:
+            OMDB_LOOKUPS.inc(result='mirror')
+            return mirrored
+
+        try:
+            data = await self.omdb_client.lookup(movie_name)
+        except OMDbUnavailableError:
+            OMDB_LOOKUPS.inc(result='unavailable')
+            raise
+        return await asyncio.to_thread(self.sync_manager.remember_omdb_answer, movie_name, data)
+
+    async def find_catalog_entry(self, movie_name):
+        """Find a shared catalog entry whose title matches movie_name, without calling OMDb."""
+        async with self.session() as session:
+            return (await session.scalars(select(CatalogEntry).where(
+                CatalogEntry.title_key == OMDbCache.normalize_title(movie_name),
+                CatalogEntry.imdb_id.isnot(None)
+            ).limit(1))).first()
+
+    async def add_movie(self, user_id, movie_name):
+        """
+        Add a movie to a user's favourites, looking the title up on OMDb if nobody added it before.
+
+        Returns:
+            Movie or None: None if OMDb does not know the title.
+        """
+        entry = await self.find_catalog_entry(movie_name)
+        values = None
+        if entry is None:
+            movie_data = await self.fetch_movie_details(movie_name)
+            if not movie_data:
+                return None
+            values = SQLiteDataManager.catalog_values(movie_data)
+
+        async with self.session() as session:
+            if values is not None:
+                entry = await self._catalog_entry_for(session, values)
+            movie = Movie(user_id=user_id, catalog_id=entry.catalog_id)
+            session.add(movie)
+            await session.commit()
+            movie.catalog = entry
+        self.sync_manager.recommendation_updater.submit(user_id, movie.catalog_id)
+        return movie
+
+    @staticmethod
+    async def _catalog_entry_for(session, values):
+        """Return the catalog entry with these values' IMDb ID, creating it if needed (see catalog_entry_for)."""
+        if values["imdb_id"]:
+            entry = (await session.scalars(select(CatalogEntry).filter_by(imdb_id=values["imdb_id"]))).first()
+            if entry:
+                return entry
+
+        entry = CatalogEntry(**values)
+        session.add(entry)
+        try:
+            await session.flush()
+        except IntegrityError:
+            await session.rollback()
+            entry = (await session.scalars(select(CatalogEntry).filter_by(imdb_id=values["imdb_id"]))).one()
+        return entry
+
+    async def add_movies_bulk(self, user_id, movie_names):
+        """
+        Add many movies to a user's collection at once (see SQLiteDataManager.add_movies_bulk).
+
+        The OMDb lookups of unknown titles all run concurrently, at most
+        lookup_concurrency at a time, on the event loop.
+        """
+        unique_names, duplicates = dedupe_titles(movie_names)
+        async with self.session() as session:
+            known = await session.run_sync(find_known_titles, unique_names)
+
+        limit = asyncio.Semaphore(self.lookup_concurrency)
+
+        async def lookup(name):
+            async with limit:
+                try:
+                    return await self.fetch_movie_details(name), None
+                except OMDbUnavailableError as e:
+                    return None, f"OMDb unavailable: {str(e)}"
+
+        names = [name for key, name in unique_names.items() if key not in known]
+        lookups = dict(zip(names, await asyncio.gather(*(lookup(name) for name in names))))
+
+        async with self.session() as session:
+            results = await session.run_sync(store_bulk_movies, user_id, unique_names, known, lookups)
+        for result in results:
+            if result["status"] == "added":
+                self.sync_manager.recommendation_updater.submit(user_id, result["movie"]["catalog_id"])
+        return results, duplicates
+
+    async def update_movie(self, movie_id, movie_name, director, year, rating):
+        """Update a movie's details (see SQLiteDataManager.update_movie); None if it or the title is unknown."""
+        def update():
+            movie = self.sync_manager.update_movie(movie_id, movie_name, director, year, rating)
+            return movie.movie_id if movie else None
+
+        updated_id = await self._in_sync_manager(update)
+        return await self.get_movie(updated_id) if updated_id else None
+
+    async def delete_movie(self, movie_id):
+        """Delete a movie with its reviews; False if it does not exist."""
+        return await self._in_sync_manager(self.sync_manager.delete_movie, movie_id)
+
+    async def delete_user(self, user_id):
+        """Delete a user with their movies and reviews; False if they do not exist."""
+        return await self._in_sync_manager(self.sync_manager.delete_user, user_id)
+
+    async def add_review(self, user_id, movie_id, review_text, rating):
+        """Add a review (see SQLiteDataManager.add_review); None if the user or movie does not exist."""
+        def add():
+            review = self.sync_manager.add_review(user_id, movie_id, review_text, rating)
+            return review.review_id if review else None
+
+        review_id = await self._in_sync_manager(add)
+        if review_id is None:
+            return None
+        async with self.session() as session:
+            return await session.get(Review, review_id)
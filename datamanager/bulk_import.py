@@ -0,0 +1,387 @@
+import csv
+import gzip
+import itertools
+import json
+import os
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import insert, select, text
+
+from datamanager.data_models import db, User, Movie, Review, CatalogEntry
+from datamanager.leaderboards import rebuild_leaderboards
+from datamanager.omdb_cache import OMDbCache
+from datamanager.recommendations import rebuild_recommendations
+from datamanager.review_stats import rebuild_review_stats
+from datamanager.search import create_search_index, drop_search_triggers, search_triggers_installed
+
+
+# Bulk import configuration
+load_dotenv()
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', 10000))
+IMPORT_LOOKUP_CHUNK_SIZE = 500
+
+# Entities in the order they are written within a batch, so references resolve
+IMPORT_ENTITIES = ('users', 'movies', 'reviews')
+# Tables whose secondary indexes may be dropped during a load and rebuilt after it
+DEFERRABLE_TABLES = ('catalog', 'movies', 'reviews')
+
+
+class ImportRowError(ValueError):
+    """Raised for an input row that cannot be imported."""
+
+
+def _integer(row, field, required=True):
+    value = row.get(field)
+    if value is None or value == '':
+        if required:
+            raise ImportRowError(f"{field} is required")
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} must be a whole number, got {value!r}")
+
+
+def _number(row, field, required=True):
+    value = row.get(field)
+    if value is None or value == '':
+        if required:
+            raise ImportRowError(f"{field} is required")
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ImportRowError(f"{field} must be a number, got {value!r}")
+
+
+def _string(row, field, required=True, max_length=255):
+    value = row.get(field)
+    if value is None or str(value).strip() == '':
+        if required:
+            raise ImportRowError(f"{field} is required")
+        return None
+    value = str(value)
+    if max_length and len(value) > max_length:
+        raise ImportRowError(f"{field} is longer than {max_length} characters")
+    return value
+
+
+def validate_row(entity, row):
+    """
+    Check an input row and convert it to column values.
+
+    Rows use the columns of the export (see EXPORT_COLUMNS); CSV values
+    arrive as strings and empty strings count as missing.
+
+    Returns:
+        dict: Values ready to insert.
+
+    Raises:
+        ImportRowError: If a field is missing or malformed.
+    """
+    if not isinstance(row, dict):
+        raise ImportRowError("Expected an object")
+
+    if entity == 'users':
+        return {"user_id": _integer(row, "user_id"), "name": _string(row, "name", max_length=100)}
+
+    if entity == 'movies':
+        return {
+            "movie_id": _integer(row, "movie_id"),
+            "user_id": _integer(row, "user_id"),
+            "title": _string(row, "title"),
+            "director": _string(row, "director", required=False),
+            "year": _integer(row, "year", required=False),
+            "rating": _number(row, "rating", required=False),
+            "imdb_id": _string(row, "imdb_id", required=False, max_length=20),
+        }
+
+    rating = _number(row, "rating")
+    if not 1 <= rating <= 10:
+        raise ImportRowError(f"rating must be between 1.0 and 10.0, got {rating}")
+    return {
+        "review_id": _integer(row, "review_id", required=False),
+        "user_id": _integer(row, "user_id"),
+        "movie_id": _integer(row, "movie_id"),
+        "rating": rating,
+        "review_text": _string(row, "review_text", required=False, max_length=None),
+        "created_at": None,  # Imported reviews are not recent activity, so they stay out of trending
+    }
+
+
+def detect_format(path):
+    """Guess 'csv' or 'ndjson' from a file name such as movies.csv or export.ndjson.gz."""
+    suffixes = [suffix for suffix in Path(path).suffixes if suffix != '.gz']
+    return 'csv' if suffixes and suffixes[-1] == '.csv' else 'ndjson'
+
+
+def detect_entity(path):
+    """Guess the entity of a CSV file from its name (users.csv holds users), or return None."""
+    stem = Path(path).name.split('.')[0]
+    return stem if stem in IMPORT_ENTITIES else None
+
+
+def _open(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def read_records(path, file_format, entity=None, skip=0):
+    """
+    Stream the records of an input file.
+
+    NDJSON lines name their entity in a "type" field ("user", "movie" or
+    "review", as written by the export) unless entity is given. A CSV file
+    holds a single entity. Gzipped files (.gz) are read transparently.
+
+    Args:
+        skip (int): Number of records to pass over without parsing them, to resume a load.
+
+    Yields:
+        tuple: (record number, entity, row dict or ImportRowError).
+    """
+    with _open(path) as handle:
+        if file_format == 'csv':
+            rows = itertools.islice(csv.DictReader(handle), skip, None)
+            for number, row in enumerate(rows, start=skip + 1):
+                yield number, entity, row
+            return
+
+        lines = (line for line in handle if line.strip())
+        for number, line in enumerate(itertools.islice(lines, skip, None), start=skip + 1):
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield number, entity, ImportRowError(f"Invalid JSON: {e}")
+                continue
+            row_entity = entity
+            if row_entity is None and isinstance(row, dict):
+                row_entity = f"{row.get('type')}s"
+            yield number, row_entity, row
+
+
+class BulkImporter:
+    """
+    Loads users, movies and reviews from CSV or NDJSON files without going through OMDb.
+
+    Rows are validated, grouped into batches and written with one
+    executemany per table. Every batch is its own transaction and records
+    how far into the file it got in the import_checkpoints table, so an
+    interrupted load resumes after the last committed batch. Rows carry
+    their IDs, so movies and reviews can refer to users and movies of the
+    same file, and rows whose ID is already taken are skipped.
+    """
+
+    def __init__(self, engine, batch_size=IMPORT_BATCH_SIZE, defer_indexes=False, report=print):
+        """
+        Args:
+            engine (Engine): The engine of the database to load into.
+            batch_size (int): Records per batch and transaction.
+            defer_indexes (bool): Drop secondary indexes and search triggers during the load
+                and rebuild them once at the end.
+            report (callable): Called with progress messages; None for silence.
+        """
+        self.engine = engine
+        self.batch_size = batch_size
+        self.defer_indexes = defer_indexes
+        self.report = report or (lambda message: None)
+
+    def run(self, path, file_format=None, entity=None, restart=False):
+        """
+        Import one file.
+
+        Args:
+            path (str): The CSV or NDJSON file, optionally gzipped.
+            file_format (str or None): 'csv' or 'ndjson'; guessed from the file name if None.
+            entity (str or None): Entity of every row; required for CSV unless the file name tells.
+            restart (bool): Ignore a checkpoint left by an earlier run of the same file.
+
+        Returns:
+            dict: Counts of records read, rows inserted, skipped and invalid, and the rate.
+        """
+        file_format = file_format or detect_format(path)
+        entity = entity or (detect_entity(path) if file_format == 'csv' else None)
+        if file_format == 'csv' and entity not in IMPORT_ENTITIES:
+            raise ValueError(f"Pass the entity of a CSV file: one of {', '.join(IMPORT_ENTITIES)}")
+        if entity is not None and entity not in IMPORT_ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}'. Choose one of: {', '.join(IMPORT_ENTITIES)}")
+
+        source = self.source_key(path)
+        with self.engine.begin() as connection:
+            ensure_checkpoints_table(connection)
+            if restart:
+                connection.execute(text("DELETE FROM import_checkpoints WHERE source = :source"),
+                                   {"source": source})
+            checkpoint = connection.execute(
+                text("SELECT position, finished_at FROM import_checkpoints WHERE source = :source"),
+                {"source": source}
+            ).first()
+
+        summary = {"read": 0, "inserted": 0, "skipped": 0, "invalid": 0, "rows_per_second": 0.0}
+        if checkpoint and checkpoint.finished_at:
+            self.report(f"{path} was already imported; pass restart to load it again")
+            return summary
+
+        position = checkpoint.position if checkpoint else 0
+        if position:
+            self.report(f"Resuming {path} after record {position}")
+
+        if self.defer_indexes:
+            self._drop_indexes()
+
+        started = time.perf_counter()
+        batch = {name: [] for name in IMPORT_ENTITIES}
+        pending = 0
+        for number, row_entity, row in read_records(path, file_format, entity, skip=position):
+            summary["read"] += 1
+            try:
+                if isinstance(row, ImportRowError):
+                    raise row
+                if row_entity not in IMPORT_ENTITIES:
+                    raise ImportRowError(f"Unknown record type {row.get('type')!r}")
+                batch[row_entity].append(validate_row(row_entity, row))
+            except ImportRowError as e:
+                summary["invalid"] += 1
+                self.report(f"Record {number}: {e}")
+
+            pending += 1
+            if pending >= self.batch_size:
+                self._write_batch(source, number, batch, summary)
+                self._report_progress(summary, started)
+                batch = {name: [] for name in IMPORT_ENTITIES}
+                pending = 0
+
+        self._write_batch(source, position + summary["read"], batch, summary, finished=True)
+        self._finish()
+        summary["rows_per_second"] = self._rate(summary, started)
+        self._report_progress(summary, started, done=True)
+        return summary
+
+    @staticmethod
+    def source_key(path):
+        """Identify an input file by its absolute path and size."""
+        resolved = Path(path).resolve()
+        return f"{resolved}:{resolved.stat().st_size}"
+
+    def _write_batch(self, source, position, batch, summary, finished=False):
+        with self.engine.begin() as connection:
+            # Writing the checkpoint first takes SQLite's write lock for the whole batch
+            connection.execute(text(
+                "INSERT INTO import_checkpoints (source, position, finished_at)"
+                " VALUES (:source, :position, CASE WHEN :finished THEN CURRENT_TIMESTAMP END)"
+                " ON CONFLICT (source) DO UPDATE SET position = excluded.position,"
+                " finished_at = excluded.finished_at, updated_at = CURRENT_TIMESTAMP"
+            ), {"source": source, "position": position, "finished": finished})
+
+            inserted = 0
+            if batch["users"]:
+                inserted += connection.execute(insert(User).prefix_with("OR IGNORE"), batch["users"]).rowcount
+            if batch["movies"]:
+                inserted += self._insert_movies(connection, batch["movies"])
+            if batch["reviews"]:
+                inserted += connection.execute(insert(Review).prefix_with("OR IGNORE"), batch["reviews"]).rowcount
+
+        rows = sum(len(rows) for rows in batch.values())
+        summary["inserted"] += inserted
+        summary["skipped"] += rows - inserted
+
+    @staticmethod
+    def _select_in(connection, columns, key_column, keys):
+        found = []
+        keys = list(keys)
+        for start in range(0, len(keys), IMPORT_LOOKUP_CHUNK_SIZE):
+            chunk = keys[start:start + IMPORT_LOOKUP_CHUNK_SIZE]
+            found.extend(connection.execute(select(*columns).where(key_column.in_(chunk))).all())
+        return found
+
+    def _insert_movies(self, connection, rows):
+        """Link movies to catalog entries (shared by IMDb ID, private otherwise) and insert them."""
+        unique_rows = {}
+        for row in rows:
+            unique_rows.setdefault(row["movie_id"], row)
+        existing_movies = {row[0] for row in self._select_in(
+            connection, (Movie.movie_id,), Movie.movie_id, unique_rows)}
+        rows = [row for movie_id, row in unique_rows.items() if movie_id not in existing_movies]
+        if not rows:
+            return 0
+
+        catalog_ids = dict(self._select_in(
+            connection, (CatalogEntry.imdb_id, CatalogEntry.catalog_id), CatalogEntry.imdb_id,
+            {row["imdb_id"] for row in rows if row["imdb_id"]}))
+
+        # The batch holds the write lock, so IDs can be handed out here
+        # instead of reading every new one back.
+        next_id = connection.execute(text("SELECT COALESCE(MAX(catalog_id), 0) + 1 FROM catalog")).scalar()
+        new_entries, links = [], []
+        for row in rows:
+            catalog_id = catalog_ids.get(row["imdb_id"]) if row["imdb_id"] else None
+            if catalog_id is None:
+                catalog_id = next_id
+                next_id += 1
+                new_entries.append({
+                    "catalog_id": catalog_id,
+                    "imdb_id": row["imdb_id"],
+                    "title": row["title"],
+                    "title_key": OMDbCache.normalize_title(row["title"]),
+                    "director": row["director"],
+                    "year": row["year"],
+                    "rating": row["rating"],
+                })
+                if row["imdb_id"]:
+                    catalog_ids[row["imdb_id"]] = catalog_id
+            links.append({"movie_id": row["movie_id"], "user_id": row["user_id"], "catalog_id": catalog_id})
+
+        if new_entries:
+            connection.execute(insert(CatalogEntry), new_entries)
+        return connection.execute(insert(Movie), links).rowcount
+
+    def _deferrable_indexes(self):
+        return [index for name in DEFERRABLE_TABLES
+                for index in db.metadata.tables[name].indexes if not index.unique]
+
+    def _drop_indexes(self):
+        with self.engine.begin() as connection:
+            for index in self._deferrable_indexes():
+                index.drop(connection, checkfirst=True)
+            drop_search_triggers(connection)
+        self.report("Dropped secondary indexes and search triggers for the load")
+
+    def _finish(self):
+        """Rebuild what the load did not maintain row by row."""
+        started = time.perf_counter()
+        with self.engine.begin() as connection:
+            # Also repairs what an interrupted load with deferred indexes left behind
+            for index in self._deferrable_indexes():
+                index.create(connection, checkfirst=True)
+            if self.defer_indexes or not search_triggers_installed(connection):
+                create_search_index(connection)
+            rebuild_review_stats(connection)
+            rebuild_leaderboards(connection)
+            rebuild_recommendations(connection)
+        self.report(f"Rebuilt indexes, review aggregates, leaderboards and recommendations"
+                    f" in {time.perf_counter() - started:.1f} s")
+
+    @staticmethod
+    def _rate(summary, started):
+        elapsed = time.perf_counter() - started
+        return summary["read"] / elapsed if elapsed else 0.0
+
+    def _report_progress(self, summary, started, done=False):
+        self.report(
+            f"{'Imported' if done else 'Progress:'} {summary['read']} records, {summary['inserted']} inserted, "
+            f"{summary['skipped']} already present, {summary['invalid']} invalid "
+            f"({self._rate(summary, started):,.0f} rows/s)"
+        )
+
+
+def ensure_checkpoints_table(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS import_checkpoints ("
+        " source VARCHAR(1024) PRIMARY KEY,"
+        " position INTEGER NOT NULL,"
+        " finished_at DATETIME,"
+        " updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP)"
+    ))
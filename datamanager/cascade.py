@@ -0,0 +1,68 @@
+from sqlalchemy import delete, or_, select
+
+from datamanager.data_models import EnrichmentJob, Movie, Review, User
+from datamanager.leaderboards import apply_leaderboard_deltas, grouped_leaderboard_deltas
+from datamanager.recommendations import remove_likes
+from datamanager.review_stats import apply_deltas, grouped_deltas
+
+
+# What delete_cascade() deletes, in its result's keys
+DELETABLE = ('users', 'movies', 'reviews')
+
+
+def _delete(session, model, criteria):
+    return session.execute(delete(model).where(criteria).execution_options(synchronize_session=False)).rowcount
+
+
+def delete_cascade(session, users=(), movies=(), reviews=()):
+    """
+    Delete users, movies and reviews with everything that depends on them, in a fixed number of statements.
+
+    A user takes their movies, their reviews and the reviews of their
+    movies along; a movie takes its reviews and enrichment job. The review
+    aggregates and leaderboards are updated from one grouped read of the
+    doomed reviews, likes nothing backs any more are taken out of the
+    recommendation tables (see recommendations.remove_likes), and the rows
+    are then removed with one DELETE ... WHERE per table, instead of
+    loading every row into the session. Catalog
+    entries left without movies are not touched (see
+    SQLiteDataManager._purge_private_catalog_entries).
+
+    Args:
+        session (Session): The session of the transaction to delete in.
+        users (list): User IDs.
+        movies (list): Movie IDs.
+        reviews (list): Review IDs.
+
+    Returns:
+        dict: Rows deleted per table ("users", "movies", "reviews"), cascades included.
+    """
+    deleted = dict.fromkeys(DELETABLE, 0)
+    movie_clauses = []
+    if movies:
+        movie_clauses.append(Movie.movie_id.in_(movies))
+    if users:
+        movie_clauses.append(Movie.user_id.in_(users))
+    doomed_movies = or_(*movie_clauses) if movie_clauses else None
+    review_clauses = []
+    if reviews:
+        review_clauses.append(Review.review_id.in_(reviews))
+    if users:
+        review_clauses.append(Review.user_id.in_(users))
+    if doomed_movies is not None:
+        review_clauses.append(Review.movie_id.in_(select(Movie.movie_id).where(doomed_movies)))
+    if not review_clauses:
+        return deleted
+
+    doomed_reviews = or_(*review_clauses)
+    apply_deltas(session, grouped_deltas(session, (doomed_reviews,)))
+    apply_leaderboard_deltas(session, grouped_leaderboard_deltas(session, (doomed_reviews,)))
+    remove_likes(session, list(users), doomed_movies, doomed_reviews)
+    deleted["reviews"] = _delete(session, Review, doomed_reviews)
+
+    if doomed_movies is not None:
+        _delete(session, EnrichmentJob, EnrichmentJob.movie_id.in_(select(Movie.movie_id).where(doomed_movies)))
+        deleted["movies"] = _delete(session, Movie, doomed_movies)
+    if users:
+        deleted["users"] = _delete(session, User, User.user_id.in_(users))
+    return deleted
@@ -1,7 +1,51 @@
+from datetime import datetime, timezone
+
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from flask_sqlalchemy.session import Session
+
+
+def utcnow():
+    return datetime.now(timezone.utc)
+
+
+class WriterSession(Session):
+    """
+    Flask-SQLAlchemy session that cooperates with a SQLiteWriter.
+
+    While the app has a writer running, the writer thread's sessions use
+    the writer's connection and every other session reads from the
+    read-only pool. Inside a write job, commit() only flushes (the writer
+    commits the whole batch at once) and rollback() undoes just that job.
+    Without a writer it behaves exactly like Flask-SQLAlchemy's session.
+    """
 
+    @staticmethod
+    def _writer():
+        return current_app.extensions.get('sqlite_writer') if has_app_context() else None
 
-db = SQLAlchemy()
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        writer = self._writer()
+        if writer is not None and bind is None:
+            return writer.engine if writer.in_writer_thread() else writer.read_engine
+        return super().get_bind(mapper, clause, bind, **kwargs)
+
+    def commit(self):
+        writer = self._writer()
+        if writer is not None and writer.in_job():
+            self.flush()  # Committed with the rest of the batch
+            return
+        super().commit()
+
+    def rollback(self):
+        writer = self._writer()
+        if writer is not None and writer.in_job():
+            writer.rollback_job()
+            return
+        super().rollback()
+
+
+db = SQLAlchemy(session_options={'class_': WriterSession})
 
 class User(db.Model):
 
@@ -16,18 +60,67 @@ class User(db.Model):
     def __str__(self):
         return f"users(user_id = {self.user_id}, name = {self.name})"
 
+class CatalogEntry(db.Model):
+    """
+    A film, stored once and shared by every user who added it.
+
+    Entries resolved through OMDb are keyed by their IMDb ID. Entries without
+    one are private to a single movie: details a user edited by hand, rows
+    carried over from before the catalog existed, or placeholders waiting for
+    a background OMDb lookup (whose details are still empty).
+    """
+
+    __tablename__ = 'catalog'
+
+    catalog_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    imdb_id = db.Column(db.String(20), unique=True, nullable=True)
+    title = db.Column(db.String(255), nullable=False)
+    title_key = db.Column(db.String(255), nullable=False, index=True)
+    director = db.Column(db.String(255), nullable=True)
+    year = db.Column(db.Integer, nullable=True)
+    rating = db.Column(db.Float, nullable=True)
+
+    def __str__(self):
+        return f"catalog(id={self.catalog_id}, imdb_id={self.imdb_id}, title={self.title})"
+
+
 class Movie(db.Model):
+    """A movie in a user's favourites: a link between a user and a catalog entry."""
 
     __tablename__ = 'movies'
+    __table_args__ = (
+        db.Index('ix_movies_user_id_movie_id', 'user_id', 'movie_id'),
+        db.Index('ix_movies_catalog_id', 'catalog_id'),
+    )
 
     movie_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
-    movie_name = db.Column(db.String(255), nullable=False)
-    director = db.Column(db.String(255), nullable = False)
-    year = db.Column(db.Integer, nullable=False)
-    rating = db.Column(db.Float, nullable=False)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable=False)
+    catalog_id = db.Column(db.Integer, db.ForeignKey('catalog.catalog_id'), nullable=False)
 
+    catalog = db.relationship('CatalogEntry', lazy='joined', innerjoin=True)
     reviews = db.relationship('Review', backref= 'movie', cascade = "all, delete-orphan")
+    enrichment = db.relationship('EnrichmentJob', backref='movie', uselist=False, cascade="all, delete-orphan")
+
+    @property
+    def movie_name(self):
+        return self.catalog.title
+
+    @property
+    def director(self):
+        return self.catalog.director
+
+    @property
+    def year(self):
+        return self.catalog.year
+
+    @property
+    def rating(self):
+        return self.catalog.rating
+
+    @property
+    def status(self):
+        """OMDb enrichment status: 'pending', 'failed' or 'enriched'."""
+        return self.enrichment.status if self.enrichment else EnrichmentJob.ENRICHED
 
     def __str__(self):
         return (
@@ -39,11 +132,18 @@ class Movie(db.Model):
 
 class Review(db.Model):
     __tablename__ = 'reviews'
+    __table_args__ = (
+        db.Index('ix_reviews_movie_id_review_id', 'movie_id', 'review_id'),
+        db.Index('ix_reviews_user_id_review_id', 'user_id', 'review_id'),
+    )
+
     review_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     user_id = db.Column(db.Integer, db.ForeignKey('users.user_id'), nullable = False)
     movie_id = db.Column(db.Integer, db.ForeignKey('movies.movie_id'), nullable = False)
     review_text = db.Column(db.Text,  nullable=True)
     rating = db.Column(db.Float, nullable=False)
+    # Null for reviews written before review times were recorded
+    created_at = db.Column(db.DateTime, nullable=True, default=utcnow)
 
 
     def __str__(self):
@@ -52,3 +152,185 @@ class Review(db.Model):
                 f"rating={self.rating})"
         )
 
+
+class ReviewStats(db.Model):
+    """
+    Review count, rating sum and rating histogram of one movie or one user.
+
+    Kept up to date by the data manager in the same transaction as every
+    review write, so pages can show averages without loading the reviews.
+    Rows whose count drops to zero are removed.
+    """
+
+    __tablename__ = 'review_stats'
+
+    MOVIE = 'movie'
+    USER = 'user'
+
+    scope = db.Column(db.String(10), primary_key=True)
+    subject_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+    # Number of ratings in [n, n + 1), with 10.0 counted in h10
+    h1 = db.Column(db.Integer, nullable=False, default=0)
+    h2 = db.Column(db.Integer, nullable=False, default=0)
+    h3 = db.Column(db.Integer, nullable=False, default=0)
+    h4 = db.Column(db.Integer, nullable=False, default=0)
+    h5 = db.Column(db.Integer, nullable=False, default=0)
+    h6 = db.Column(db.Integer, nullable=False, default=0)
+    h7 = db.Column(db.Integer, nullable=False, default=0)
+    h8 = db.Column(db.Integer, nullable=False, default=0)
+    h9 = db.Column(db.Integer, nullable=False, default=0)
+    h10 = db.Column(db.Integer, nullable=False, default=0)
+
+    @property
+    def average_rating(self):
+        return self.rating_sum / self.review_count if self.review_count else None
+
+    @property
+    def histogram(self):
+        return {bucket: getattr(self, f'h{bucket}') for bucket in range(1, 11)}
+
+    def __str__(self):
+        return f"review_stats({self.scope}={self.subject_id}, count={self.review_count}, sum={self.rating_sum})"
+
+
+class UserLike(db.Model):
+    """
+    A film a user likes: one in their favourites, or one they rated well.
+
+    The like signal behind recommendations; kept by the recommendation
+    updater as likes happen and rebuilt from movies and reviews in batch.
+    """
+
+    __tablename__ = 'user_likes'
+    __table_args__ = (db.Index('ix_user_likes_catalog_id', 'catalog_id'),)
+
+    user_id = db.Column(db.Integer, primary_key=True)
+    catalog_id = db.Column(db.Integer, primary_key=True)
+
+    def __str__(self):
+        return f"user_like(user_id={self.user_id}, catalog_id={self.catalog_id})"
+
+
+class LikeCount(db.Model):
+    """Number of users who like a film."""
+
+    __tablename__ = 'like_counts'
+
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    like_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return f"like_count(catalog_id={self.catalog_id}, likes={self.like_count})"
+
+
+class MovieNeighbor(db.Model):
+    """
+    One of the films most similar to a catalog entry, for recommendations.
+
+    shared is the number of users who like both films and score the cosine
+    similarity of the two films' sets of users. Only the top-k neighbours
+    of every film are kept.
+    """
+
+    __tablename__ = 'movie_neighbors'
+
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    neighbor_id = db.Column(db.Integer, primary_key=True)
+    shared = db.Column(db.Integer, nullable=False)
+    score = db.Column(db.Float, nullable=False)
+
+    def __str__(self):
+        return f"movie_neighbor({self.catalog_id} -> {self.neighbor_id}, score={self.score})"
+
+
+class FilmRating(db.Model):
+    """
+    Review count and rating sum of one catalog entry, over every user's copy of the film.
+
+    average is only set once the film has LEADERBOARD_MIN_REVIEWS reviews,
+    and is indexed so the top-rated leaderboard reads just its first rows.
+    """
+
+    __tablename__ = 'film_ratings'
+    __table_args__ = (db.Index('ix_film_ratings_average', 'average', 'catalog_id'),)
+
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+    rating_sum = db.Column(db.Float, nullable=False, default=0.0)
+    average = db.Column(db.Float, nullable=True)
+
+    def __str__(self):
+        return f"film_rating(catalog_id={self.catalog_id}, count={self.review_count}, average={self.average})"
+
+
+class ReviewBucket(db.Model):
+    """
+    Number of reviews a catalog entry received in one time bucket (an hour), within a trending window.
+
+    Every window keeps its own buckets, and drops them as they leave it.
+    """
+
+    __tablename__ = 'review_buckets'
+
+    period = db.Column(db.String(10), primary_key=True)
+    bucket = db.Column(db.Integer, primary_key=True)
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return (f"review_bucket({self.period}, bucket={self.bucket}, catalog_id={self.catalog_id},"
+                f" count={self.review_count})")
+
+
+class TrendingPeriod(db.Model):
+    """
+    A trending window, such as the last day or week.
+
+    Its counts and buckets cover the reviews from start_bucket on; older
+    buckets are subtracted and dropped as the window moves forward.
+    """
+
+    __tablename__ = 'trending_periods'
+
+    period = db.Column(db.String(10), primary_key=True)
+    start_bucket = db.Column(db.Integer, nullable=False)
+
+    def __str__(self):
+        return f"trending_period({self.period}, start_bucket={self.start_bucket})"
+
+
+class TrendingCount(db.Model):
+    """Number of reviews a catalog entry received within a trending window."""
+
+    __tablename__ = 'trending_counts'
+    __table_args__ = (db.Index('ix_trending_counts_rank', 'period', 'review_count', 'catalog_id'),)
+
+    period = db.Column(db.String(10), primary_key=True)
+    catalog_id = db.Column(db.Integer, primary_key=True)
+    review_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __str__(self):
+        return f"trending_count({self.period}, catalog_id={self.catalog_id}, count={self.review_count})"
+
+
+class EnrichmentJob(db.Model):
+    """Tracks the background OMDb lookup for a movie that was added before its details were known."""
+
+    __tablename__ = 'enrichment_jobs'
+
+    PENDING = 'pending'
+    ENRICHED = 'enriched'
+    FAILED = 'failed'
+
+    job_id = db.Column(db.Integer, primary_key=True, autoincrement=True)
+    movie_id = db.Column(db.Integer, db.ForeignKey('movies.movie_id'), nullable=False, unique=True)
+    title = db.Column(db.String(255), nullable=False)
+    status = db.Column(db.String(20), nullable=False, default=PENDING)
+    error = db.Column(db.Text, nullable=True)
+    created_at = db.Column(db.DateTime, nullable=False, default=utcnow)
+    updated_at = db.Column(db.DateTime, nullable=False, default=utcnow, onupdate=utcnow)
+
+    def __str__(self):
+        return f"enrichment_job(id={self.job_id}, movie_id={self.movie_id}, status={self.status})"
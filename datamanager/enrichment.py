@@ -0,0 +1,80 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+
+
+# Background enrichment configuration
+load_dotenv()
+ENRICHMENT_WORKERS = int(os.getenv('ENRICHMENT_WORKERS', 4))
+ENRICHMENT_QUEUE_SIZE = int(os.getenv('ENRICHMENT_QUEUE_SIZE', 100))
+# Seconds a pending job must sit untouched before a starting worker takes it over
+ENRICHMENT_CLAIM_TIMEOUT = int(os.getenv('ENRICHMENT_CLAIM_TIMEOUT', 300))
+
+
+class EnrichmentQueueFull(Exception):
+    """Raised when too many OMDb lookups are already waiting to run."""
+
+
+class EnrichmentQueue:
+    """
+    Bounded worker pool that runs OMDb lookups outside the request.
+
+    At most max_pending jobs may be queued or running at once; further
+    submissions are refused with EnrichmentQueueFull, so a burst of adds
+    queues up to a limit instead of piling up without bound.
+    """
+
+    def __init__(self, app, enrich, workers=ENRICHMENT_WORKERS, max_pending=ENRICHMENT_QUEUE_SIZE):
+        """
+        Args:
+            app (Flask): The app whose context the workers run in.
+            enrich (callable): Called with a job ID to perform the lookup.
+            workers (int): Number of worker threads.
+            max_pending (int): Maximum number of queued or running jobs.
+        """
+        self.app = app
+        self.enrich = enrich
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='omdb-enrichment')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self):
+        """Number of jobs queued or running."""
+        return self._pending
+
+    def submit(self, job_id):
+        """
+        Queue a job for enrichment.
+
+        Returns:
+            Future: Resolves once the job has been processed.
+
+        Raises:
+            EnrichmentQueueFull: If max_pending jobs are already waiting.
+        """
+        if not self._slots.acquire(blocking=False):
+            raise EnrichmentQueueFull(f"{self.max_pending} movies are already waiting for OMDb")
+
+        with self._lock:
+            self._pending += 1
+        future = self._executor.submit(self._run, job_id)
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, job_id):
+        with self.app.app_context():
+            return self.enrich(job_id)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def shutdown(self, wait=True):
+        """Stop accepting jobs and optionally wait for queued ones to finish."""
+        self._executor.shutdown(wait=wait)
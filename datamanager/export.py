@@ -0,0 +1,122 @@
+import csv
+import io
+import json
+import os
+import zlib
+
+from dotenv import load_dotenv
+from sqlalchemy import select
+
+from datamanager.data_models import User, Movie, Review, CatalogEntry
+
+
+# Export configuration
+load_dotenv()
+EXPORT_BATCH_SIZE = int(os.getenv('EXPORT_BATCH_SIZE', 1000))
+EXPORT_CHUNK_BYTES = int(os.getenv('EXPORT_CHUNK_BYTES', 64 * 1024))
+EXPORT_GZIP_LEVEL = int(os.getenv('EXPORT_GZIP_LEVEL', 6))
+
+# Exported columns of every entity, keyed by their output names
+EXPORT_COLUMNS = {
+    "users": {
+        "user_id": User.user_id,
+        "name": User.name,
+    },
+    "movies": {
+        "movie_id": Movie.movie_id,
+        "user_id": Movie.user_id,
+        "title": CatalogEntry.title,
+        "director": CatalogEntry.director,
+        "year": CatalogEntry.year,
+        "rating": CatalogEntry.rating,
+        "imdb_id": CatalogEntry.imdb_id,
+    },
+    "reviews": {
+        "review_id": Review.review_id,
+        "user_id": Review.user_id,
+        "movie_id": Review.movie_id,
+        "rating": Review.rating,
+        "review_text": Review.review_text,
+    },
+}
+EXPORT_FORMATS = ('ndjson', 'csv')
+
+
+def export_query(entity, user_id=None):
+    """
+    Build the query reading one entity for an export, in primary key order.
+
+    Args:
+        entity (str): "users", "movies" or "reviews".
+        user_id (int or None): Only export this user, their movies or the reviews they wrote.
+    """
+    columns = EXPORT_COLUMNS[entity]
+    query = select(*(column.label(name) for name, column in columns.items()))
+    key = next(iter(columns.values()))
+
+    if entity == "movies":
+        query = query.join(CatalogEntry, CatalogEntry.catalog_id == Movie.catalog_id)
+    if user_id is not None:
+        query = query.where(columns["user_id"] == user_id)
+    return query.order_by(key)
+
+
+def iter_export_rows(session, entity, user_id=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream the rows of one entity without loading them all.
+
+    The rows are fetched batch_size at a time from a server-side cursor and
+    are never added to the session, so memory use stays flat however many
+    rows there are.
+
+    Yields:
+        dict: One row, keyed by the column names of EXPORT_COLUMNS.
+    """
+    query = export_query(entity, user_id).execution_options(yield_per=batch_size)
+    for partition in session.execute(query).mappings().partitions():
+        for row in partition:
+            yield dict(row)
+
+
+def ndjson_chunks(records, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """
+    Encode (entity, row) pairs as NDJSON, one object per line with a "type" field.
+
+    Lines are gathered into chunks of about chunk_bytes so the response is
+    not written one tiny line at a time.
+    """
+    buffer, size = [], 0
+    for entity, row in records:
+        line = json.dumps({"type": entity[:-1], **row}, default=str) + '\n'
+        buffer.append(line)
+        size += len(line)
+        if size >= chunk_bytes:
+            yield ''.join(buffer).encode()
+            buffer, size = [], 0
+    if buffer:
+        yield ''.join(buffer).encode()
+
+
+def csv_chunks(columns, rows, chunk_bytes=EXPORT_CHUNK_BYTES):
+    """Encode rows as CSV with a header line, in chunks of about chunk_bytes."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns), lineterminator='\n')
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        if buffer.tell() >= chunk_bytes:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def gzip_chunks(chunks, level=EXPORT_GZIP_LEVEL):
+    """Gzip a stream of byte chunks on the fly."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
@@ -0,0 +1,260 @@
+import calendar
+import os
+import time
+
+from dotenv import load_dotenv
+from sqlalchemy import Integer, bindparam, case, cast, delete, func, insert, literal, select, text, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from datamanager.data_models import (CatalogEntry, FilmRating, Movie, Review, ReviewBucket, TrendingCount,
+                                     TrendingPeriod)
+
+
+# Leaderboard configuration
+load_dotenv()
+LEADERBOARD_MIN_REVIEWS = int(os.getenv('LEADERBOARD_MIN_REVIEWS', 3))
+
+BUCKET_SECONDS = 3600
+# Trending windows, in buckets
+TRENDING_PERIODS = {'day': 24, 'week': 7 * 24}
+
+# Counts reviews in their bucket of every trending window the bucket falls in
+BUMP_BUCKET = text(
+    "INSERT INTO review_buckets (period, bucket, catalog_id, review_count)"
+    " SELECT period, :bucket, :catalog_id, :review_count FROM trending_periods WHERE start_bucket <= :bucket"
+    " ON CONFLICT (period, bucket, catalog_id) DO UPDATE SET review_count = review_count + excluded.review_count"
+)
+
+# Counts reviews in every trending window their bucket falls in
+BUMP_TRENDING = text(
+    "INSERT INTO trending_counts (period, catalog_id, review_count)"
+    " SELECT period, :catalog_id, :review_count FROM trending_periods WHERE start_bucket <= :bucket"
+    " ON CONFLICT (period, catalog_id) DO UPDATE SET review_count = review_count + excluded.review_count"
+)
+
+# Takes the buckets that left a trending window out of its counts (then they are deleted)
+EXPIRE_TRENDING = text(
+    "UPDATE trending_counts SET review_count = trending_counts.review_count - expired.review_count"
+    " FROM (SELECT catalog_id, SUM(review_count) AS review_count FROM review_buckets"
+    "       WHERE period = :window AND bucket < :start GROUP BY catalog_id) AS expired"
+    " WHERE trending_counts.period = :window AND trending_counts.catalog_id = expired.catalog_id"
+)
+
+
+def bucket_of(moment):
+    """Return the time bucket of a datetime (naive ones are taken as UTC), or None for None."""
+    if moment is None:
+        return None
+    return calendar.timegm(moment.utctimetuple()) // BUCKET_SECONDS
+
+
+def current_bucket():
+    return int(time.time()) // BUCKET_SECONDS
+
+
+def period_start(period, bucket):
+    """Return the first bucket of a trending window ending with bucket."""
+    return bucket - TRENDING_PERIODS[period] + 1
+
+
+def _bucket_column():
+    return cast(func.strftime('%s', Review.created_at), Integer) // BUCKET_SECONDS
+
+
+def review_delta(review, catalog_id, sign=1):
+    """
+    Build the leaderboard change for adding (sign=1) or removing (sign=-1) one review.
+
+    Args:
+        review (Review): The review, with its rating and creation time set.
+        catalog_id (int): The catalog entry of the reviewed movie.
+        sign (int): 1 or -1.
+
+    Returns:
+        list: One delta, ready for apply_leaderboard_deltas().
+    """
+    return [{"catalog_id": catalog_id, "bucket": bucket_of(review.created_at),
+             "review_count": sign, "rating_sum": sign * review.rating}]
+
+
+def grouped_leaderboard_deltas(connection, criteria, sign=-1):
+    """
+    Build the leaderboard changes for every review matching criteria, grouped per film and bucket.
+
+    Args:
+        connection (Connection or Session): Where to read the reviews.
+        criteria (tuple): WHERE clauses selecting the reviews.
+        sign (int): -1 to take the reviews out of the leaderboards, 1 to add them.
+
+    Returns:
+        list: Deltas ready for apply_leaderboard_deltas().
+    """
+    bucket = _bucket_column()
+    query = (select(Movie.catalog_id, bucket, func.count(Review.review_id), func.sum(Review.rating))
+             .join(Movie, Movie.movie_id == Review.movie_id)
+             .where(*criteria)
+             .group_by(Movie.catalog_id, bucket))
+    return [{"catalog_id": catalog_id, "bucket": bucket, "review_count": sign * count, "rating_sum": sign * total}
+            for catalog_id, bucket, count, total in connection.execute(query)]
+
+
+def apply_leaderboard_deltas(connection, deltas, min_reviews=LEADERBOARD_MIN_REVIEWS):
+    """
+    Add review changes to the film ratings, review buckets and trending counts.
+
+    Call it in the same transaction as the review writes it describes.
+    Trending counts left at zero are cleaned up as their window moves on.
+    """
+    if not deltas:
+        return
+
+    count = FilmRating.review_count
+    total = FilmRating.rating_sum
+    upsert = sqlite_insert(FilmRating)
+    new_count = count + upsert.excluded.review_count
+    new_total = total + upsert.excluded.rating_sum
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=['catalog_id'],
+        set_={'review_count': new_count, 'rating_sum': new_total,
+              'average': case((new_count >= min_reviews, new_total / new_count), else_=None)}
+    ), [{"catalog_id": delta["catalog_id"], "review_count": delta["review_count"], "rating_sum": delta["rating_sum"],
+         "average": delta["rating_sum"] / delta["review_count"] if delta["review_count"] >= min_reviews else None}
+        for delta in deltas])
+
+    emptied = {delta["catalog_id"] for delta in deltas if delta["review_count"] < 0}
+    if emptied:
+        connection.execute(
+            delete(FilmRating).where(FilmRating.review_count <= 0, FilmRating.catalog_id.in_(emptied))
+            .execution_options(synchronize_session=False)
+        )
+
+    bucketed = [delta for delta in deltas if delta["bucket"] is not None]
+    if bucketed:
+        connection.execute(BUMP_BUCKET, bucketed)
+        connection.execute(BUMP_TRENDING, bucketed)
+
+
+def trending_is_stale(connection, period, bucket=None):
+    """Return True if the trending window has not moved forward to the current bucket yet."""
+    start = connection.execute(select(TrendingPeriod.start_bucket).where(TrendingPeriod.period == period)).scalar()
+    return start is not None and start < period_start(period, bucket or current_bucket())
+
+
+def advance_trending(connection, bucket=None):
+    """
+    Move every trending window forward to end with the current bucket.
+
+    The buckets that left a window are subtracted from its counts and
+    deleted in one transaction, so a window that another process moved
+    at the same time is not moved twice.
+
+    Returns:
+        int: Number of windows moved.
+    """
+    bucket = bucket or current_bucket()
+    starts = [{"window": period, "start": period_start(period, bucket)} for period in TRENDING_PERIODS]
+    buckets, periods = ReviewBucket.__table__, TrendingPeriod.__table__  # Core statements, run once per window
+    connection.execute(EXPIRE_TRENDING, starts)
+    connection.execute(
+        delete(buckets).where(buckets.c.period == bindparam('window'), buckets.c.bucket < bindparam('start')), starts
+    )
+    connection.execute(
+        delete(TrendingCount).where(TrendingCount.review_count <= 0).execution_options(synchronize_session=False)
+    )
+    return connection.execute(
+        update(periods).where(periods.c.period == bindparam('window'), periods.c.start_bucket < bindparam('start'))
+        .values(start_bucket=bindparam('start')), starts
+    ).rowcount
+
+
+def rebuild_leaderboards(connection, min_reviews=LEADERBOARD_MIN_REVIEWS, bucket=None):
+    """
+    Recompute the film ratings, review buckets and trending counts from the reviews.
+
+    Reviews without a creation time count for the ratings but not for trending.
+
+    Returns:
+        int: Number of film rating and trending rows written.
+    """
+    for model in (FilmRating, ReviewBucket, TrendingCount, TrendingPeriod):
+        connection.execute(delete(model).execution_options(synchronize_session=False))
+
+    bucket = bucket or current_bucket()
+    starts = {period: period_start(period, bucket) for period in TRENDING_PERIODS}
+    connection.execute(insert(TrendingPeriod), [
+        {"period": period, "start_bucket": start} for period, start in starts.items()
+    ])
+
+    count = func.count(Review.review_id)
+    total = func.sum(Review.rating)
+    written = connection.execute(insert(FilmRating).from_select(
+        ['catalog_id', 'review_count', 'rating_sum', 'average'],
+        select(Movie.catalog_id, count, total, case((count >= min_reviews, total / count), else_=None))
+        .join(Movie, Movie.movie_id == Review.movie_id)
+        .group_by(Movie.catalog_id)
+    )).rowcount
+
+    review_bucket = _bucket_column()
+    for period, start in starts.items():
+        connection.execute(insert(ReviewBucket).from_select(
+            ['period', 'bucket', 'catalog_id', 'review_count'],
+            select(literal(period), review_bucket, Movie.catalog_id, func.count(Review.review_id))
+            .join(Movie, Movie.movie_id == Review.movie_id)
+            .where(Review.created_at.isnot(None), review_bucket >= start)
+            .group_by(review_bucket, Movie.catalog_id)
+        ))
+        written += connection.execute(insert(TrendingCount).from_select(
+            ['period', 'catalog_id', 'review_count'],
+            select(literal(period), ReviewBucket.catalog_id, func.sum(ReviewBucket.review_count))
+            .where(ReviewBucket.period == period)
+            .group_by(ReviewBucket.catalog_id)
+        )).rowcount
+    return written
+
+
+def _film_columns():
+    return CatalogEntry.catalog_id, CatalogEntry.title, CatalogEntry.director, CatalogEntry.year, CatalogEntry.rating
+
+
+def top_rated(connection, limit=10):
+    """
+    Read the films with the best average review rating, among those with LEADERBOARD_MIN_REVIEWS reviews.
+
+    Only the first `limit` entries of the average index are read.
+
+    Returns:
+        list: Dicts with the catalog ID, title, director, year, IMDb rating,
+        review count and average rating, best first.
+    """
+    query = (
+        select(*_film_columns(), FilmRating.review_count, FilmRating.average)
+        .select_from(FilmRating)
+        .join(CatalogEntry, CatalogEntry.catalog_id == FilmRating.catalog_id)
+        .where(FilmRating.average.isnot(None))
+        .order_by(FilmRating.average.desc(), FilmRating.catalog_id.desc())
+        .limit(limit)
+    )
+    fields = ('catalog_id', 'title', 'director', 'year', 'rating', 'review_count', 'average_rating')
+    return [dict(zip(fields, row)) for row in connection.execute(query).tuples()]
+
+
+def trending(connection, period, limit=10):
+    """
+    Read the films reviewed most within a trending window.
+
+    Only the first `limit` entries of the window's count index are read.
+
+    Returns:
+        list: Dicts with the catalog ID, title, director, year, IMDb rating
+        and review count in the window, most reviewed first.
+    """
+    query = (
+        select(*_film_columns(), TrendingCount.review_count)
+        .select_from(TrendingCount)
+        .join(CatalogEntry, CatalogEntry.catalog_id == TrendingCount.catalog_id)
+        .where(TrendingCount.period == period, TrendingCount.review_count > 0)
+        .order_by(TrendingCount.review_count.desc(), TrendingCount.catalog_id.desc())
+        .limit(limit)
+    )
+    fields = ('catalog_id', 'title', 'director', 'year', 'rating', 'review_count')
+    return [dict(zip(fields, row)) for row in connection.execute(query).tuples()]
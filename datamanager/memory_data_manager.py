@@ -0,0 +1,466 @@
+import os
+import threading
+from collections import OrderedDict
+
+from dotenv import load_dotenv
+
+from datamanager.data_manager_interface import DataManagerInterface
+from datamanager.data_models import EnrichmentJob
+from datamanager.metrics import Counter, Gauge
+
+
+# In-memory data manager configuration
+load_dotenv()
+MEMORY_DATA_MANAGER = os.getenv('MEMORY_DATA_MANAGER', '').lower() in ('1', 'true', 'yes')
+MEMORY_MAX_RECORDS = int(os.getenv('MEMORY_MAX_RECORDS', 200000))
+
+
+class UserRecord:
+    """A user as kept in memory: its columns only, without a session or relationships."""
+
+    __slots__ = ('user_id', 'name')
+
+    def __init__(self, user_id, name):
+        self.user_id = user_id
+        self.name = name
+
+    @classmethod
+    def from_model(cls, user):
+        return cls(user.user_id, user.name)
+
+    def __str__(self):
+        return f"users(user_id = {self.user_id}, name = {self.name})"
+
+
+class MovieRecord:
+    """A movie as kept in memory, with its catalog details and enrichment status flattened in."""
+
+    __slots__ = ('movie_id', 'user_id', 'movie_name', 'director', 'year', 'rating', 'status')
+
+    def __init__(self, movie_id, user_id, movie_name, director, year, rating, status):
+        self.movie_id = movie_id
+        self.user_id = user_id
+        self.movie_name = movie_name
+        self.director = director
+        self.year = year
+        self.rating = rating
+        self.status = status
+
+    @classmethod
+    def from_model(cls, movie):
+        return cls(movie.movie_id, movie.user_id, movie.movie_name, movie.director, movie.year, movie.rating,
+                   movie.status)
+
+    def __str__(self):
+        return f"movies(id = {self.movie_id}, movie_name={self.movie_name}, status={self.status})"
+
+
+class ReviewRecord:
+    """A review as kept in memory."""
+
+    __slots__ = ('review_id', 'user_id', 'movie_id', 'review_text', 'rating')
+
+    def __init__(self, review_id, user_id, movie_id, review_text, rating):
+        self.review_id = review_id
+        self.user_id = user_id
+        self.movie_id = movie_id
+        self.review_text = review_text
+        self.rating = rating
+
+    @classmethod
+    def from_model(cls, review):
+        return cls(review.review_id, review.user_id, review.movie_id, review.review_text, review.rating)
+
+    def __str__(self):
+        return f"review(id= {self.review_id}, review_text={self.review_text}, rating={self.rating})"
+
+
+class _Partition:
+    """
+    Everything kept in memory about one user; the unit of eviction.
+
+    movies holds the user's movies read so far, keyed by ID, and complete
+    says whether that is all of them. movie_reviews maps some of those
+    movie IDs to all of their reviews; reviews holds every review the user
+    wrote, or is None until they are read. Reviews are keyed by ID, so
+    storing one twice is harmless.
+    """
+
+    __slots__ = ('user', 'movies', 'complete', 'movie_reviews', 'reviews', 'size')
+
+    def __init__(self):
+        self.user = None
+        self.movies = {}
+        self.complete = False
+        self.movie_reviews = {}
+        self.reviews = None
+        self.size = 0
+
+    def count(self):
+        """Number of records held, for the memory cap."""
+        return ((self.user is not None) + len(self.movies) + len(self.reviews or ())
+                + sum(len(reviews) for reviews in self.movie_reviews.values()))
+
+
+class InMemoryDataManager(DataManagerInterface):
+    """
+    Write-through in-memory copy of the hot data of a SQLiteDataManager.
+
+    Users, movies and reviews are kept as compact __slots__ records, grouped
+    per user (by the owner for movies and their reviews, by the author for a
+    user's reviews) and indexed by user ID and movie ID. A read that hits is
+    a couple of dictionary lookups, with no SQL and no ORM objects; a miss
+    reads through the wrapped manager and keeps the result. Writes go to
+    SQLite through the wrapped manager first and then update the records
+    they touch. Past max_records records, the least recently used users are
+    evicted with everything kept about them.
+
+    Movies waiting for their OMDb details are never kept, since the
+    background lookup finishes them behind this manager's back. Every other
+    method (pages, aggregates, search, export, ...) is the wrapped manager's.
+
+    Each process keeps its own copy and only sees the writes made through
+    it, so use it with a single app process, and without writes through the
+    async API tier.
+    """
+
+    def __init__(self, manager, max_records=MEMORY_MAX_RECORDS):
+        """
+        Args:
+            manager (SQLiteDataManager): The manager whose data is kept in memory.
+            max_records (int): Records kept at most before users are evicted.
+        """
+        self.manager = manager
+        self.max_records = max_records
+        self._partitions = OrderedDict()
+        self._movie_owners = {}
+        self._records = 0
+        # Bumped by every write; reads only keep what they loaded if no write happened meanwhile
+        self._version = 0
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        return getattr(self.manager, name)
+
+    def _partition(self, user_id):
+        """Return a user's partition, creating it, as the most recently used one. Call with the lock held."""
+        partition = self._partitions.get(user_id)
+        if partition is None:
+            partition = self._partitions[user_id] = _Partition()
+        else:
+            self._partitions.move_to_end(user_id)
+        return partition
+
+    def _hit(self, user_id):
+        self._partitions.move_to_end(user_id)
+        self._counters["hits"] += 1
+
+    def _account(self, *partitions):
+        """Recount the records of changed partitions and evict users while over the cap."""
+        for partition in partitions:
+            size = partition.count()
+            self._records += size - partition.size
+            partition.size = size
+        while self._records > self.max_records and len(self._partitions) > 1:
+            _, evicted = self._partitions.popitem(last=False)
+            for movie_id in (*evicted.movies, *evicted.movie_reviews):
+                self._movie_owners.pop(movie_id, None)
+            self._records -= evicted.size
+            self._counters["evictions"] += 1
+
+    def _store_movie(self, record):
+        partition = self._partition(record.user_id)
+        partition.movies[record.movie_id] = record
+        self._movie_owners[record.movie_id] = record.user_id
+        return partition
+
+    def _drop_reviews(self, matches):
+        """Forget every kept review for which matches(review) is true. Call with the lock held."""
+        for partition in list(self._partitions.values()):
+            for reviews in (partition.reviews or {}, *partition.movie_reviews.values()):
+                for review_id in [review_id for review_id, review in reviews.items() if matches(review)]:
+                    del reviews[review_id]
+            self._account(partition)
+
+    def get_all_users(self, load=()):
+        """Retrieve all users from the database; the full list is read through and not kept."""
+        users = self.manager.get_all_users(load)
+        return users if load else [UserRecord.from_model(user) for user in users]
+
+    def get_user(self, user_id, load=()):
+        """Retrieve a user by their ID; with a loading plan, as an ORM object read through."""
+        if load:
+            return self.manager.get_user(user_id, load)
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None and partition.user is not None:
+                self._hit(user_id)
+                return partition.user
+            self._counters["misses"] += 1
+            version = self._version
+
+        user = self.manager.get_user(user_id)
+        if user is None:
+            return None
+        record = UserRecord.from_model(user)
+        with self._lock:
+            if self._version == version:
+                partition = self._partition(record.user_id)
+                partition.user = record
+                self._account(partition)
+        return record
+
+    def get_user_movies(self, user_id, load=()):
+        """Retrieve all movies of a specific user by their user ID."""
+        if load:
+            return self.manager.get_user_movies(user_id, load)
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None and partition.complete:
+                self._hit(user_id)
+                return list(partition.movies.values())
+            self._counters["misses"] += 1
+            version = self._version
+
+        records = [MovieRecord.from_model(movie) for movie in self.manager.get_user_movies(user_id)]
+        with self._lock:
+            if self._version == version:
+                partition = self._partition(user_id)
+                partition.movies = {record.movie_id: record for record in records
+                                    if record.status != EnrichmentJob.PENDING}
+                partition.complete = len(partition.movies) == len(records)
+                self._movie_owners.update(dict.fromkeys(partition.movies, user_id))
+                self._account(partition)
+        return records
+
+    def get_movie(self, movie_id, load=()):
+        """Retrieve a specific movie by its ID; with a loading plan, as an ORM object read through."""
+        if load:
+            return self.manager.get_movie(movie_id, load)
+        with self._lock:
+            owner = self._movie_owners.get(movie_id)
+            record = self._partitions[owner].movies.get(movie_id) if owner is not None else None
+            if record is not None:
+                self._hit(owner)
+                return record
+            self._counters["misses"] += 1
+            version = self._version
+
+        movie = self.manager.get_movie(movie_id)
+        if movie is None:
+            return None
+        record = MovieRecord.from_model(movie)
+        with self._lock:
+            if self._version == version and record.status != EnrichmentJob.PENDING:
+                self._account(self._store_movie(record))
+        return record
+
+    def get_movie_reviews(self, movie_id, load=()):
+        """
+        Retrieves all reviews for a specific movie.
+
+        Args:
+            movie_id (int): The ID of the movie for which reviews are being fetched.
+            load (tuple): Loading plan; when given, ORM reviews are read through instead.
+
+        Returns:
+            list: The reviews of the movie, oldest first.
+        """
+        if load:
+            return self.manager.get_movie_reviews(movie_id, load)
+        with self._lock:
+            owner = self._movie_owners.get(movie_id)
+            reviews = self._partitions[owner].movie_reviews.get(movie_id) if owner is not None else None
+            if reviews is not None:
+                self._hit(owner)
+                return list(reviews.values())
+            self._counters["misses"] += 1
+            version = self._version
+
+        movie = self.get_movie(movie_id)
+        records = [ReviewRecord.from_model(review) for review in self.manager.get_movie_reviews(movie_id)]
+        with self._lock:
+            if movie is not None and self._version == version:
+                partition = self._partition(movie.user_id)
+                partition.movie_reviews[movie_id] = {record.review_id: record for record in records}
+                self._movie_owners[movie_id] = movie.user_id
+                self._account(partition)
+        return records
+
+    def get_user_reviews(self, user_id, load=()):
+        """
+        Retrieves all reviews submitted by a specific user.
+
+        Args:
+            user_id (int): The ID of the user for which reviews are being fetched.
+            load (tuple): Loading plan; when given, ORM reviews are read through instead.
+
+        Returns:
+            list: The reviews the user wrote, oldest first.
+        """
+        if load:
+            return self.manager.get_user_reviews(user_id, load)
+        with self._lock:
+            partition = self._partitions.get(user_id)
+            if partition is not None and partition.reviews is not None:
+                self._hit(user_id)
+                return list(partition.reviews.values())
+            self._counters["misses"] += 1
+            version = self._version
+
+        records = [ReviewRecord.from_model(review) for review in self.manager.get_user_reviews(user_id)]
+        with self._lock:
+            if self._version == version:
+                partition = self._partition(user_id)
+                partition.reviews = {record.review_id: record for record in records}
+                self._account(partition)
+        return records
+
+    def add_user(self, name):
+        """Add a new user to the database and keep them, with their (empty) movie list and reviews."""
+        record = UserRecord.from_model(self.manager.add_user(name))
+        with self._lock:
+            self._version += 1
+            partition = self._partition(record.user_id)
+            partition.user = record
+            partition.complete = True
+            partition.reviews = {}
+            self._account(partition)
+        return record
+
+    def add_movie(self, user_id, movie_name):
+        """Add a new movie to the database (see SQLiteDataManager.add_movie) and keep it."""
+        movie = self.manager.add_movie(user_id, movie_name)
+        if movie is None:
+            return None
+        record = MovieRecord.from_model(movie)
+        with self._lock:
+            self._version += 1
+            partition = self._store_movie(record)
+            partition.movie_reviews[record.movie_id] = {}
+            self._account(partition)
+        return record
+
+    def add_movie_async(self, user_id, movie_name):
+        """Add a movie whose details are looked up in the background; it is not kept until they are known."""
+        record = MovieRecord.from_model(self.manager.add_movie_async(user_id, movie_name))
+        self._forget_movie_list(user_id)
+        return record
+
+    def add_movies_bulk(self, user_id, movie_names, **kwargs):
+        """Add many movies to a user's collection at once (see SQLiteDataManager.add_movies_bulk)."""
+        try:
+            return self.manager.add_movies_bulk(user_id, movie_names, **kwargs)
+        finally:
+            self._forget_movie_list(user_id)
+
+    def _forget_movie_list(self, user_id):
+        with self._lock:
+            self._version += 1
+            partition = self._partitions.get(user_id)
+            if partition is not None:
+                partition.complete = False
+
+    def update_movie(self, movie_id, new_movie_name, new_director, new_year, new_rating):
+        """Update the details of a specific movie (see SQLiteDataManager.update_movie) and keep the result."""
+        movie = self.manager.update_movie(movie_id, new_movie_name, new_director, new_year, new_rating)
+        if movie is None:
+            return None
+        record = MovieRecord.from_model(movie)
+        with self._lock:
+            self._version += 1
+            self._account(self._store_movie(record))
+        return record
+
+    def delete_movie(self, movie_id):
+        """Delete a specific movie from the database and forget it along with its reviews."""
+        deleted = self.manager.delete_movie(movie_id)
+        with self._lock:
+            self._version += 1
+            owner = self._movie_owners.pop(movie_id, None)
+            if owner is not None:
+                partition = self._partitions[owner]
+                partition.movies.pop(movie_id, None)
+                partition.movie_reviews.pop(movie_id, None)
+                self._account(partition)
+            if deleted:
+                self._drop_reviews(lambda review: review.movie_id == movie_id)
+        return deleted
+
+    def delete_user(self, user_id):
+        """Delete a specific user from the database and forget them, their movies and the reviews that went."""
+        movie_ids = {movie.movie_id for movie in self.manager.get_user_movies(user_id, load=())}
+        deleted = self.manager.delete_user(user_id)
+        with self._lock:
+            self._version += 1
+            partition = self._partitions.pop(user_id, None)
+            if partition is not None:
+                for movie_id in (*partition.movies, *partition.movie_reviews):
+                    self._movie_owners.pop(movie_id, None)
+                self._records -= partition.size
+            if deleted:
+                self._drop_reviews(lambda review: review.user_id == user_id or review.movie_id in movie_ids)
+        return deleted
+
+    def delete_many(self, users=(), movies=(), reviews=(), **kwargs):
+        """Delete many users, movies and reviews (see SQLiteDataManager.delete_many) and forget everything held."""
+        deleted = self.manager.delete_many(users, movies, reviews, **kwargs)
+        with self._lock:
+            self._version += 1
+            self._partitions.clear()
+            self._movie_owners.clear()
+            self._records = 0
+        return deleted
+
+    def add_review(self, user_id, movie_id, review_text, rating):
+        """Add a new review (see SQLiteDataManager.add_review) and keep it wherever the lists it belongs to are."""
+        review = self.manager.add_review(user_id, movie_id, review_text, rating)
+        if review is None:
+            return None
+        record = ReviewRecord.from_model(review)
+        with self._lock:
+            self._version += 1
+            author = self._partitions.get(record.user_id)
+            if author is not None and author.reviews is not None:
+                author.reviews[record.review_id] = record
+                self._account(author)
+            owner = self._movie_owners.get(record.movie_id)
+            reviews = self._partitions[owner].movie_reviews.get(record.movie_id) if owner is not None else None
+            if reviews is not None:
+                reviews[record.review_id] = record
+                self._account(self._partitions[owner])
+        return record
+
+    def delete_review(self, review_id):
+        """Delete a review by its ID and forget it."""
+        deleted = self.manager.delete_review(review_id)
+        with self._lock:
+            self._version += 1
+            for partition in list(self._partitions.values()):
+                if partition.reviews is not None and partition.reviews.pop(review_id, None) is not None:
+                    self._account(partition)
+                for reviews in partition.movie_reviews.values():
+                    if reviews.pop(review_id, None) is not None:
+                        self._account(partition)
+        return deleted
+
+    def stats(self):
+        """Return the hit/miss counters, the hit ratio, the records held and the users they belong to."""
+        with self._lock:
+            stats = dict(self._counters, entries=self._records, users=len(self._partitions))
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def collect_metrics(self):
+        """Report the wrapped manager's metrics together with those of the in-memory records."""
+        stats = self.stats()
+        lookups = Counter('memory_lookups_total', 'In-memory data manager reads, by whether they hit.', ('result',))
+        lookups.inc(stats["hits"], result='hit')
+        lookups.inc(stats["misses"], result='miss')
+        records = Gauge('memory_records', 'Users, movies and reviews held by the in-memory data manager.')
+        records.set(stats["entries"])
+        evictions = Counter('memory_evictions_total', 'Users evicted from the in-memory data manager.')
+        evictions.inc(stats["evictions"])
+        return [*self.manager.collect_metrics(), lookups, records, evictions]
@@ -0,0 +1,291 @@
+import math
+import threading
+import time
+
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.pool import QueuePool
+
+from datamanager.data_models import db
+
+
+PROMETHEUS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+SQL_LATENCY_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1)
+SQL_COUNT_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, extra=()):
+    pairs = [*zip(names, values), *extra]
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.label_names):
+            raise ValueError(f"{self.name} takes the labels {', '.join(self.label_names)}")
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """A value that only goes up, such as a number of requests."""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            values = dict(self._values)
+        return self.header() + [f"{self.name}{_labels(self.label_names, key)} {_format_value(value)}"
+                                for key, value in sorted(values.items())]
+
+
+class Gauge(Counter):
+    """A value that goes up and down, such as requests in flight."""
+
+    kind = 'gauge'
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def render(self):
+        with self._lock:
+            values = {key: (list(counts), total) for key, (counts, total) in self._values.items()}
+        lines = self.header()
+        for key, (counts, total) in sorted(values.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _labels(self.label_names, key, [('le', _format_value(bound))])
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    The metrics of one process, rendered in the Prometheus text format.
+    """
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, documentation, labels=()):
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=()):
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name, documentation, labels=(), buckets=LATENCY_BUCKETS):
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self, collectors=()):
+        """
+        Render every metric.
+
+        Args:
+            collectors (iterable): Callables run now that return extra metrics,
+                for values such as cache hit ratios that are read rather than counted.
+        """
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+        for collect in collectors:
+            for metric in collect():
+                lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter(
+    'http_requests_total', 'HTTP requests handled.', ('method', 'endpoint', 'status'))
+HTTP_REQUEST_SECONDS = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Time spent handling HTTP requests.', ('method', 'endpoint'))
+HTTP_IN_FLIGHT = REGISTRY.gauge(
+    'http_requests_in_flight', 'HTTP requests being handled right now.', ('endpoint',))
+REQUEST_SQL_STATEMENTS = REGISTRY.histogram(
+    'http_request_sql_statements', 'SQL statements run per HTTP request.', ('endpoint',), SQL_COUNT_BUCKETS)
+REQUEST_SQL_SECONDS = REGISTRY.histogram(
+    'http_request_sql_duration_seconds', 'Time spent in SQL per HTTP request.', ('endpoint',))
+SQL_STATEMENT_SECONDS = REGISTRY.histogram(
+    'sql_statement_duration_seconds', 'Time spent running single SQL statements.', (), SQL_LATENCY_BUCKETS)
+POOL_CHECKOUT_SECONDS = REGISTRY.histogram(
+    'db_pool_checkout_wait_seconds', 'Time spent waiting for a pooled database connection.', (),
+    SQL_LATENCY_BUCKETS)
+OMDB_REQUEST_SECONDS = REGISTRY.histogram(
+    'omdb_request_duration_seconds', 'Duration of single HTTP calls to OMDb, by outcome.', ('outcome',))
+OMDB_LOOKUPS = REGISTRY.counter(
+    'omdb_lookups_total', 'Movie detail lookups, by where the answer came from.', ('result',))
+
+
+def omdb_outcome(status_code=None):
+    """Name the outcome of an OMDb HTTP call: '2xx', '4xx', '5xx', or 'error' for transport errors."""
+    return f"{status_code // 100}xx" if status_code else 'error'
+
+
+def cache_metrics(caches):
+    """
+    Turn cache stats() dicts into metrics labelled with the cache name.
+
+    Args:
+        caches (dict): Cache name to its stats(), which hold hits, misses, hit_ratio and entries.
+    """
+    hits = Counter('cache_hits_total', 'Cache lookups answered from the cache.', ('cache',))
+    misses = Counter('cache_misses_total', 'Cache lookups that had to be computed.', ('cache',))
+    ratio = Gauge('cache_hit_ratio', 'Share of cache lookups answered from the cache.', ('cache',))
+    entries = Gauge('cache_entries', 'Entries held by the cache.', ('cache',))
+    for name, stats in caches.items():
+        hits.inc(stats["hits"], cache=name)
+        misses.inc(stats["misses"], cache=name)
+        ratio.set(stats["hit_ratio"], cache=name)
+        entries.set(stats["entries"], cache=name)
+    return [hits, misses, ratio, entries]
+
+
+def pool_metrics(pool):
+    """Report how many pooled database connections are in use and idle."""
+    if not isinstance(pool, QueuePool):
+        return []
+    checked_out = Gauge('db_pool_checked_out', 'Pooled database connections in use.')
+    checked_out.set(pool.checkedout())
+    idle = Gauge('db_pool_idle', 'Pooled database connections waiting to be used.')
+    idle.set(pool.checkedin())
+    return [checked_out, idle]
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that reports how long every checkout waited for a connection."""
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_SECONDS.observe(time.perf_counter() - started)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('_metrics_started', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.get('_metrics_started')
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+    SQL_STATEMENT_SECONDS.observe(elapsed)
+    if has_request_context() and '_metrics_sql_seconds' in g:
+        g._metrics_sql_seconds += elapsed
+
+
+def _endpoint():
+    return request.endpoint or 'unmatched'
+
+
+def init_metrics(app, collectors=()):
+    """
+    Instrument an app and its database engine, and serve the metrics at /metrics.
+
+    Args:
+        app (Flask): The app to instrument.
+        collectors (iterable): Callables returning extra metrics at scrape time.
+    """
+    collectors = list(collectors)
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, 'before_cursor_execute', _before_cursor_execute):
+        event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', _after_cursor_execute)
+
+    @app.before_request
+    def start_request_metrics():
+        g._metrics_started = time.perf_counter()
+        g._metrics_sql_seconds = 0.0
+        g._metrics_endpoint = _endpoint()
+        HTTP_IN_FLIGHT.inc(endpoint=g._metrics_endpoint)
+
+    @app.after_request
+    def record_request_metrics(response):
+        started = g.pop('_metrics_started', None)
+        if started is None:
+            return response
+        endpoint = g._metrics_endpoint
+        HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method, endpoint=endpoint)
+        HTTP_REQUESTS.inc(method=request.method, endpoint=endpoint, status=response.status_code)
+        statements = g.get('_sql_statements')
+        if statements is not None:
+            REQUEST_SQL_STATEMENTS.observe(statements.count, endpoint=endpoint)
+        REQUEST_SQL_SECONDS.observe(g._metrics_sql_seconds, endpoint=endpoint)
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(error=None):
+        if '_metrics_endpoint' in g:
+            HTTP_IN_FLIGHT.dec(endpoint=g.pop('_metrics_endpoint'))
+
+    @app.route('/metrics')
+    def metrics():
+        """Expose the process's metrics in the Prometheus text format."""
+        return Response(REGISTRY.render(collectors), mimetype=PROMETHEUS_MIMETYPE)
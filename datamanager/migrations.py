@@ -0,0 +1,220 @@
+import time
+
+from sqlalchemy import text
+
+from datamanager.data_models import (FilmRating, LikeCount, MovieNeighbor, ReviewBucket, ReviewStats, TrendingCount,
+                                     TrendingPeriod, UserLike)
+from datamanager.leaderboards import rebuild_leaderboards
+from datamanager.omdb_cache import OMDbCache
+from datamanager.recommendations import rebuild_recommendations
+from datamanager.review_stats import rebuild_review_stats
+from datamanager.search import create_search_index
+from datamanager.versions import create_version_triggers
+
+
+# Registered migrations as (version, name, upgrade function), in version order.
+MIGRATIONS = []
+
+
+def migration(version, name):
+    """
+    Register a schema migration.
+
+    The decorated function receives a SQLAlchemy connection inside the
+    migration's transaction. Migrations must be safe to run on a database
+    that db.create_all() has already brought up to date, so use
+    IF NOT EXISTS (or check the schema) for everything they create.
+    """
+
+    def register(upgrade):
+        if any(existing[0] == version for existing in MIGRATIONS):
+            raise ValueError(f"Duplicate migration version {version}")
+        MIGRATIONS.append((version, name, upgrade))
+        MIGRATIONS.sort(key=lambda entry: entry[0])
+        return upgrade
+
+    return register
+
+
+@migration(1, "index foreign keys and list orders")
+def add_foreign_key_indexes(connection):
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_movies_user_id_movie_id ON movies (user_id, movie_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_reviews_movie_id_review_id ON reviews (movie_id, review_id)"))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_reviews_user_id_review_id ON reviews (user_id, review_id)"))
+
+
+@migration(2, "shared movie catalog")
+def fold_movies_into_catalog(connection):
+    """
+    Move movie details out of the per-user movies table into the shared catalog.
+
+    Rows with identical details (title, director, year and rating) are
+    folded into one catalog entry. Rows whose details differ, such as a
+    rating a user edited by hand, keep their own private entry, so no
+    user's details are overwritten by another's. Movies still waiting for
+    enrichment each get their own placeholder entry.
+    The movies table is then rebuilt as a slim user-to-catalog link table,
+    keeping every movie_id so reviews stay attached.
+    """
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(movies)"))}
+    if "catalog_id" in columns:
+        return  # Created by db.create_all() with the current schema
+
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS catalog ("
+        " catalog_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " imdb_id VARCHAR(20) UNIQUE,"
+        " title VARCHAR(255) NOT NULL,"
+        " title_key VARCHAR(255) NOT NULL,"
+        " director VARCHAR(255),"
+        " year INTEGER,"
+        " rating FLOAT)"
+    ))
+    connection.execute(text("CREATE INDEX IF NOT EXISTS ix_catalog_title_key ON catalog (title_key)"))
+
+    pending = {row[0] for row in connection.execute(
+        text("SELECT movie_id FROM enrichment_jobs WHERE status != 'enriched'")
+    )}
+    insert_entry = text(
+        "INSERT INTO catalog (title, title_key, director, year, rating)"
+        " VALUES (:title, :title_key, :director, :year, :rating)"
+    )
+
+    folded, links = {}, []
+    rows = connection.execute(text(
+        "SELECT movie_id, user_id, movie_name, director, year, rating FROM movies ORDER BY movie_id"
+    )).all()
+    for movie_id, user_id, movie_name, director, year, rating in rows:
+        title_key = OMDbCache.normalize_title(movie_name)
+        if movie_id in pending:
+            entry = {"title": movie_name, "title_key": title_key, "director": None, "year": None, "rating": None}
+            catalog_id = connection.execute(insert_entry, entry).lastrowid
+        else:
+            fold_key = (movie_name, director, year, rating)
+            catalog_id = folded.get(fold_key)
+            if catalog_id is None:
+                entry = {"title": movie_name, "title_key": title_key, "director": director,
+                         "year": year, "rating": rating}
+                catalog_id = folded[fold_key] = connection.execute(insert_entry, entry).lastrowid
+        links.append({"movie_id": movie_id, "user_id": user_id, "catalog_id": catalog_id})
+
+    connection.execute(text(
+        "CREATE TABLE movies_new ("
+        " movie_id INTEGER PRIMARY KEY AUTOINCREMENT,"
+        " user_id INTEGER NOT NULL REFERENCES users (user_id),"
+        " catalog_id INTEGER NOT NULL REFERENCES catalog (catalog_id))"
+    ))
+    if links:
+        connection.execute(
+            text("INSERT INTO movies_new (movie_id, user_id, catalog_id) VALUES (:movie_id, :user_id, :catalog_id)"),
+            links
+        )
+    connection.execute(text("DROP TABLE movies"))
+    connection.execute(text("ALTER TABLE movies_new RENAME TO movies"))
+    connection.execute(text("CREATE INDEX ix_movies_user_id_movie_id ON movies (user_id, movie_id)"))
+    connection.execute(text("CREATE INDEX ix_movies_catalog_id ON movies (catalog_id)"))
+
+
+@migration(3, "review aggregates")
+def backfill_review_stats(connection):
+    """Create review_stats and fill it from the existing reviews."""
+    ReviewStats.__table__.create(connection, checkfirst=True)
+    rebuild_review_stats(connection)
+
+
+@migration(4, "full-text search")
+def add_search_index(connection):
+    """Create the FTS5 indexes over catalog titles, directors and review texts."""
+    create_search_index(connection)
+
+
+@migration(5, "version counters")
+def add_version_counters(connection):
+    """Create the data_versions table behind ETag / Last-Modified and its triggers."""
+    create_version_triggers(connection)
+
+
+@migration(6, "recommendations")
+def add_recommendations(connection):
+    """Create the likes and neighbour list tables and fill them from the movies and reviews."""
+    for model in (UserLike, LikeCount, MovieNeighbor):
+        model.__table__.create(connection, checkfirst=True)
+    rebuild_recommendations(connection)
+
+
+@migration(7, "leaderboards")
+def add_leaderboards(connection):
+    """Record review times and create and fill the top-rated and trending tables."""
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(reviews)"))}
+    if "created_at" not in columns:
+        connection.execute(text("ALTER TABLE reviews ADD COLUMN created_at DATETIME"))
+    for model in (FilmRating, ReviewBucket, TrendingPeriod, TrendingCount):
+        model.__table__.create(connection, checkfirst=True)
+    rebuild_leaderboards(connection)
+
+
+def ensure_migrations_table(connection):
+    connection.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_migrations ("
+        " version INTEGER PRIMARY KEY,"
+        " name VARCHAR(255) NOT NULL,"
+        " applied_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,"
+        " duration_ms FLOAT)"
+    ))
+
+
+def applied_versions(engine):
+    """Return the set of migration versions already applied to the database."""
+    with engine.begin() as connection:
+        ensure_migrations_table(connection)
+        return {row[0] for row in connection.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def run_migrations(engine, report=print):
+    """
+    Apply every pending migration, each in its own transaction.
+
+    Each migration first claims its row in schema_migrations; that write
+    takes SQLite's write lock, so when several workers start at once only
+    one of them runs a given migration and the others skip it.
+
+    Args:
+        engine (Engine): The engine of the database to upgrade.
+        report (callable): Called with a message for every applied migration.
+
+    Returns:
+        list: (version, name, duration in ms) for every migration applied by this call.
+    """
+    applied = []
+    done = applied_versions(engine)
+
+    for version, name, upgrade in MIGRATIONS:
+        if version in done:
+            continue
+
+        started = time.perf_counter()
+        with engine.begin() as connection:
+            claimed = connection.execute(
+                text("INSERT OR IGNORE INTO schema_migrations (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name}
+            ).rowcount
+            if not claimed:
+                continue
+            upgrade(connection)
+            duration_ms = (time.perf_counter() - started) * 1000
+            connection.execute(
+                text("UPDATE schema_migrations SET duration_ms = :duration WHERE version = :version"),
+                {"duration": duration_ms, "version": version}
+            )
+
+        applied.append((version, name, duration_ms))
+        if report:
+            report(f"Applied migration {version} ({name}) in {duration_ms:.1f} ms")
+
+    return applied
+
+
+def migration_status(engine):
+    """Return (version, name, applied) for every known migration."""
+    done = applied_versions(engine)
+    return [(version, name, version in done) for version, name, _ in MIGRATIONS]
@@ -0,0 +1,175 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+# Cache configuration
+load_dotenv()
+basedir = Path(__file__).resolve().parent.parent
+default_cache_path = os.path.join(basedir, 'db', 'omdb_cache.db')
+
+OMDB_CACHE_PATH = os.getenv('OMDB_CACHE_PATH', default_cache_path)
+OMDB_CACHE_TTL = int(os.getenv('OMDB_CACHE_TTL', 7 * 24 * 60 * 60))
+OMDB_CACHE_NEGATIVE_TTL = int(os.getenv('OMDB_CACHE_NEGATIVE_TTL', 60 * 60))
+OMDB_CACHE_SIZE = int(os.getenv('OMDB_CACHE_SIZE', 1024))
+
+# Returned by OMDbCache.get when a title has no usable entry.
+MISSING = object()
+
+
+class OMDbCache:
+    """
+    Two-level cache for OMDb lookups.
+
+    An in-process LRU sits in front of a SQLite table on disk, so lookups
+    survive restarts and are shared between worker processes. Titles that
+    OMDb reported as not found are cached as well (negative caching), with
+    their own, usually shorter, TTL.
+    """
+
+    def __init__(self, path=OMDB_CACHE_PATH, ttl=OMDB_CACHE_TTL,
+                 negative_ttl=OMDB_CACHE_NEGATIVE_TTL, max_entries=OMDB_CACHE_SIZE,
+                 clock=time.time):
+        """
+        Args:
+            path (str or None): SQLite file for the on-disk store. None keeps the cache in memory only.
+            ttl (int): Seconds a found movie stays cached.
+            negative_ttl (int): Seconds a "not found" answer stays cached.
+            max_entries (int): Size of the in-process LRU.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.path = path
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "negative_hits": 0,
+                          "memory_hits": 0, "disk_hits": 0}
+
+        if self.path:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "CREATE TABLE IF NOT EXISTS omdb_cache ("
+                    " title_key TEXT PRIMARY KEY,"
+                    " details TEXT,"
+                    " expires_at REAL NOT NULL)"
+                )
+
+    @staticmethod
+    def normalize_title(title):
+        """Build the cache key for a title (case and whitespace insensitive)."""
+        return " ".join(str(title).casefold().split())
+
+    def _connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, title):
+        """
+        Look up a title.
+
+        Returns:
+            dict: Cached movie details,
+            None: if OMDb is known not to have the title,
+            MISSING: if there is no fresh entry and OMDb has to be asked.
+        """
+        key = self.normalize_title(title)
+        now = self.clock()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return self._hit(entry[1])
+            if entry is not None:
+                del self._memory[key]
+
+        entry = self._disk_get(key, now)
+
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return MISSING
+            self._remember(key, entry)
+            self._counters["disk_hits"] += 1
+            return self._hit(entry[1])
+
+    def set(self, title, details):
+        """
+        Store the OMDb answer for a title.
+
+        Args:
+            title (str): The title that was looked up.
+            details (dict or None): Movie details, or None if OMDb did not find the title.
+        """
+        key = self.normalize_title(title)
+        ttl = self.ttl if details is not None else self.negative_ttl
+        entry = (self.clock() + ttl, dict(details) if details is not None else None)
+
+        with self._lock:
+            self._remember(key, entry)
+
+        if self.path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO omdb_cache (title_key, details, expires_at) VALUES (?, ?, ?)",
+                    (key, json.dumps(entry[1]), entry[0])
+                )
+
+    def clear(self):
+        """Drop every cached entry, in memory and on disk."""
+        with self._lock:
+            self._memory.clear()
+        if self.path:
+            with closing(self._connect()) as conn, conn:
+                conn.execute("DELETE FROM omdb_cache")
+
+    def purge_expired(self):
+        """Remove expired rows from the on-disk store and return how many were removed."""
+        if not self.path:
+            return 0
+        with closing(self._connect()) as conn, conn:
+            return conn.execute("DELETE FROM omdb_cache WHERE expires_at <= ?", (self.clock(),)).rowcount
+
+    def stats(self):
+        """Return the hit/miss counters together with the overall hit ratio."""
+        with self._lock:
+            stats = dict(self._counters)
+            stats["entries"] = len(self._memory)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _hit(self, details):
+        self._counters["hits"] += 1
+        if details is None:
+            self._counters["negative_hits"] += 1
+            return None
+        return dict(details)
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _disk_get(self, key, now):
+        if not self.path:
+            return None
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT details, expires_at FROM omdb_cache WHERE title_key = ?", (key,)
+            ).fetchone()
+        if row is None or row[1] <= now:
+            return None
+        return row[1], json.loads(row[0])
@@ -0,0 +1,286 @@
+import asyncio
+import os
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    import httpx
+except ImportError:  # Optional: only AsyncOMDbClient uses it
+    httpx = None
+
+from dotenv import load_dotenv
+
+from datamanager.metrics import OMDB_REQUEST_SECONDS, omdb_outcome
+
+
+# OMDb HTTP client configuration
+load_dotenv()
+OMDB_CONNECT_TIMEOUT = float(os.getenv('OMDB_CONNECT_TIMEOUT', 3.05))
+OMDB_READ_TIMEOUT = float(os.getenv('OMDB_READ_TIMEOUT', 5))
+OMDB_MAX_RETRIES = int(os.getenv('OMDB_MAX_RETRIES', 2))
+OMDB_RETRY_BACKOFF = float(os.getenv('OMDB_RETRY_BACKOFF', 0.2))
+OMDB_POOL_SIZE = int(os.getenv('OMDB_POOL_SIZE', 20))
+OMDB_BREAKER_THRESHOLD = int(os.getenv('OMDB_BREAKER_THRESHOLD', 5))
+OMDB_BREAKER_RESET = float(os.getenv('OMDB_BREAKER_RESET', 30))
+
+
+class OMDbUnavailableError(Exception):
+    """Raised when OMDb cannot be reached or the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Stops calling OMDb for a while after repeated failures.
+
+    The breaker is "closed" while calls succeed. After failure_threshold
+    consecutive failures it "opens" and every call fails fast. Once
+    reset_timeout seconds have passed it goes "half_open" and lets a single
+    trial call through: success closes it again, failure re-opens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=OMDB_BREAKER_THRESHOLD, reset_timeout=OMDB_BREAKER_RESET,
+                 clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        """Current breaker state: closed, open or half_open."""
+        with self._lock:
+            return self._state()
+
+    def _state(self):
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow_request(self):
+        """Return True if a call may go out now."""
+        with self._lock:
+            state = self._state()
+            if state == self.CLOSED:
+                return True
+            if state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the breaker after a successful call."""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """Count a failed call, opening the breaker once the threshold is reached."""
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_flight or self.failures >= self.failure_threshold:
+                self.opened_at = self.clock()
+            self._trial_in_flight = False
+
+    def snapshot(self):
+        """Return the breaker state as a JSON-friendly dict."""
+        with self._lock:
+            state = self._state()
+            retry_in = 0.0
+            if state == self.OPEN:
+                retry_in = max(0.0, self.reset_timeout - (self.clock() - self.opened_at))
+            return {
+                "state": state,
+                "consecutive_failures": self.failures,
+                "failure_threshold": self.failure_threshold,
+                "retry_in": round(retry_in, 3),
+            }
+
+
+class OMDbClient:
+    """
+    HTTP client for the OMDb API.
+
+    All lookups share one requests.Session, so connections are kept alive and
+    reused instead of paying a new TCP+TLS handshake per call. 5xx answers,
+    timeouts and other transport errors are retried with jittered exponential
+    backoff, and a CircuitBreaker makes calls fail fast while OMDb is down.
+    """
+
+    def __init__(self, api_url, api_key, connect_timeout=OMDB_CONNECT_TIMEOUT, read_timeout=OMDB_READ_TIMEOUT,
+                 max_retries=OMDB_MAX_RETRIES, backoff=OMDB_RETRY_BACKOFF, pool_size=OMDB_POOL_SIZE,
+                 breaker=None, session=None):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        self.session = session or self._build_session(pool_size)
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        # Retries are handled in lookup() so the circuit breaker sees every attempt.
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def lookup(self, title, timeout=None):
+        """
+        Look up a movie by title.
+
+        Args:
+            title (str): The movie title to search for.
+            timeout (tuple, optional): (connect, read) timeout in seconds for this call.
+
+        Returns:
+            dict or None: The decoded OMDb answer, or None if OMDb rejected the request (4xx).
+
+        Raises:
+            OMDbUnavailableError: If the breaker is open or every attempt failed.
+        """
+        if not self.breaker.allow_request():
+            raise OMDbUnavailableError("OMDb circuit breaker is open")
+
+        params = {"t": title, "apikey": self.api_key}
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            started = time.perf_counter()
+            try:
+                response = self.session.get(self.api_url, params=params, timeout=timeout or self.timeout)
+            except requests.RequestException as e:
+                OMDB_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome=omdb_outcome())
+                last_error = e
+                continue
+            OMDB_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome=omdb_outcome(response.status_code))
+
+            if response.status_code >= 500:
+                last_error = requests.HTTPError(f"OMDb returned {response.status_code}")
+                continue
+            if response.status_code != 200:
+                self.breaker.record_success()
+                return None
+            try:
+                data = response.json()
+            except ValueError as e:  # Not JSON, e.g. an HTML error page from a proxy
+                last_error = e
+                continue
+
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure()
+        raise OMDbUnavailableError(f"OMDb lookup failed: {last_error}")
+
+    def close(self):
+        """Close pooled connections."""
+        self.session.close()
+
+
+class AsyncOMDbClient:
+    """
+    Non-blocking OMDb client for the async API tier.
+
+    Behaves like OMDbClient (same retries, backoff, timeouts and circuit
+    breaker semantics) but awaits the HTTP calls, so one process can have
+    many slow lookups in flight at once. Uses httpx when it is installed;
+    otherwise every call runs the blocking OMDbClient in a worker thread.
+    """
+
+    def __init__(self, api_url, api_key, connect_timeout=OMDB_CONNECT_TIMEOUT, read_timeout=OMDB_READ_TIMEOUT,
+                 max_retries=OMDB_MAX_RETRIES, backoff=OMDB_RETRY_BACKOFF, pool_size=OMDB_POOL_SIZE,
+                 breaker=None):
+        """
+        Args:
+            breaker (CircuitBreaker, optional): Share the sync client's breaker so both tiers
+                stop calling OMDb together.
+        """
+        self.api_url = api_url
+        self.api_key = api_key
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.breaker = breaker or CircuitBreaker()
+        if httpx is not None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+            )
+            self.fallback = None
+        else:
+            self.client = None
+            self.fallback = OMDbClient(api_url, api_key, connect_timeout, read_timeout, max_retries, backoff,
+                                       pool_size, breaker=self.breaker)
+
+    async def lookup(self, title):
+        """
+        Look up a movie by title.
+
+        Returns:
+            dict or None: The decoded OMDb answer, or None if OMDb rejected the request (4xx).
+
+        Raises:
+            OMDbUnavailableError: If the breaker is open or every attempt failed.
+        """
+        if self.client is None:
+            return await asyncio.to_thread(self.fallback.lookup, title)
+
+        if not self.breaker.allow_request():
+            raise OMDbUnavailableError("OMDb circuit breaker is open")
+
+        params = {"t": title, "apikey": self.api_key}
+        last_error = None
+
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, self.backoff * 2 ** (attempt - 1)))
+            started = time.perf_counter()
+            try:
+                response = await self.client.get(self.api_url, params=params)
+            except httpx.HTTPError as e:
+                OMDB_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome=omdb_outcome())
+                last_error = e
+                continue
+            OMDB_REQUEST_SECONDS.observe(time.perf_counter() - started, outcome=omdb_outcome(response.status_code))
+
+            if response.status_code >= 500:
+                last_error = f"OMDb returned {response.status_code}"
+                continue
+            if response.status_code != 200:
+                self.breaker.record_success()
+                return None
+            try:
+                data = response.json()
+            except ValueError as e:  # Not JSON, e.g. an HTML error page from a proxy
+                last_error = e
+                continue
+
+            self.breaker.record_success()
+            return data
+
+        self.breaker.record_failure()
+        raise OMDbUnavailableError(f"OMDb lookup failed: {last_error}")
+
+    async def close(self):
+        """Close pooled connections."""
+        if self.client is not None:
+            await self.client.aclose()
+        else:
+            self.fallback.close()
@@ -0,0 +1,330 @@
+import csv
+import gzip
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from contextlib import closing
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+# Mirror configuration
+load_dotenv()
+basedir = Path(__file__).resolve().parent.parent
+default_mirror_path = os.path.join(basedir, 'db', 'omdb_mirror.db')
+
+OMDB_MIRROR_PATH = os.getenv('OMDB_MIRROR_PATH', default_mirror_path)
+OMDB_MIRROR_RECHECK = float(os.getenv('OMDB_MIRROR_RECHECK', 30))
+MIRROR_BATCH_SIZE = 10000
+
+# IMDb title types that OMDb answers title lookups with
+MIRROR_TITLE_TYPES = {'movie', 'tvMovie', 'tvSeries', 'tvMiniSeries', 'video'}
+
+MIRROR_SCHEMA = (
+    "CREATE TABLE titles ("
+    " imdb_id TEXT PRIMARY KEY,"
+    " title TEXT NOT NULL,"
+    " title_key TEXT NOT NULL,"
+    " year INTEGER,"
+    " director TEXT,"
+    " rating REAL,"
+    " votes INTEGER NOT NULL DEFAULT 0"
+    ") WITHOUT ROWID",
+    "CREATE TABLE mirror_info (key TEXT PRIMARY KEY, value)",
+)
+MIRROR_INDEXES = (
+    "CREATE INDEX ix_titles_title_key ON titles (title_key, votes DESC)",
+)
+
+_YEAR_SUFFIX = re.compile(r'^(?P<title>.*?)\s*\(?\b(?P<year>(18|19|20)\d{2})\)?\s*$')
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+
+
+def normalize_title(title):
+    """
+    Build the lookup key of a title: case, accent, punctuation and whitespace insensitive.
+
+    "Amélie", "amelie" and "AMÉLIE!" share a key, as do "Spider-Man" and
+    "Spider Man"; "&" counts as "and".
+    """
+    title = unicodedata.normalize('NFKD', str(title).replace('&', ' and '))
+    title = ''.join(char for char in title if not unicodedata.combining(char))
+    return ' '.join(_PUNCTUATION.sub(' ', title.casefold()).split())
+
+
+def split_year(title):
+    """
+    Split a trailing release year off a title, as in "Dune (2021)" or "Dune 1984".
+
+    Returns:
+        tuple: (title, year or None). A title that is only a year, such as "1917", is kept whole.
+    """
+    match = _YEAR_SUFFIX.match(str(title).strip())
+    if not match or not match.group('title'):
+        return str(title).strip(), None
+    return match.group('title'), int(match.group('year'))
+
+
+class OMDbMirror:
+    """
+    Read-only local copy of OMDb/IMDb title data, consulted before the live API.
+
+    The mirror is a SQLite file built offline by build_mirror (see the
+    omdb-mirror-import command). Every thread keeps one read-only connection
+    to it, so a lookup is a single indexed query with no network round trip.
+    A rebuilt file is swapped in atomically and picked up within
+    recheck_interval seconds, without a restart.
+
+    Without a mirror file every lookup returns None and callers go on to OMDb.
+    """
+
+    def __init__(self, path=OMDB_MIRROR_PATH, recheck_interval=OMDB_MIRROR_RECHECK, clock=time.monotonic):
+        """
+        Args:
+            path (str or None): The mirror file; None disables the mirror.
+            recheck_interval (float): Seconds between checks for a rebuilt file.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.path = path
+        self.recheck_interval = recheck_interval
+        self.clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0}
+
+    def _file_id(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def _connection(self):
+        """Return this thread's connection, reopening it if the file was rebuilt since it was opened."""
+        if not self.path:
+            return None
+        local = self._local
+        now = self.clock()
+        if getattr(local, 'checked_at', None) is not None and now - local.checked_at < self.recheck_interval:
+            return local.connection
+
+        local.checked_at = now
+        file_id = self._file_id()
+        if file_id != getattr(local, 'file_id', None) or not hasattr(local, 'connection'):
+            if getattr(local, 'connection', None) is not None:
+                local.connection.close()
+            local.connection = None
+            local.file_id = file_id
+            if file_id is not None:
+                local.connection = sqlite3.connect(f"{Path(self.path).resolve().as_uri()}?mode=ro", uri=True)
+        return local.connection
+
+    @property
+    def available(self):
+        """True if a mirror file is present."""
+        return self._connection() is not None
+
+    def lookup(self, title):
+        """
+        Resolve a title to movie details.
+
+        An exact title match wins over a normalized one, and a trailing year
+        ("Dune (2021)") picks that release; among the remaining candidates
+        the title with the most votes wins, as OMDb does for t= lookups.
+
+        Returns:
+            dict or None: Details in the shape of fetch_movie_details, or None if the
+                mirror does not have the title (or there is no mirror).
+        """
+        connection = self._connection()
+        if connection is None:
+            return None
+
+        name, year = split_year(title)
+        row = self._best_match(connection, name, year)
+        if row is None and year is not None:
+            row = self._best_match(connection, str(title).strip(), None)  # Years can be part of titles
+
+        with self._lock:
+            self._counters["hits" if row else "misses"] += 1
+        if row is None:
+            return None
+        imdb_id, matched_title, matched_year, director, rating = row
+        return {
+            "movie_name": matched_title,
+            "director": director,
+            "year": str(matched_year),
+            "rating": str(rating),
+            "imdb_id": imdb_id,
+        }
+
+    @staticmethod
+    def _best_match(connection, title, year):
+        query = ("SELECT imdb_id, title, year, director, rating FROM titles WHERE title_key = ?"
+                 + (" AND year = ?" if year is not None else "")
+                 + " ORDER BY title = ? DESC, votes DESC LIMIT 1")
+        params = (normalize_title(title),) + ((year,) if year is not None else ()) + (title,)
+        return connection.execute(query, params).fetchone()
+
+    def stats(self):
+        """Return the hit/miss counters, the hit ratio and the number of titles in the mirror."""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        connection = self._connection()
+        info = dict(connection.execute("SELECT key, value FROM mirror_info")) if connection else {}
+        stats["entries"] = info.get("titles", 0)
+        stats["built_at"] = info.get("built_at")
+        return stats
+
+
+def _open(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _number(value, convert):
+    if value in (None, '', 'N/A', '\\N'):
+        return None
+    try:
+        return convert(str(value).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _year(value):
+    # OMDb gives series years as "2008–2013"; the first year is the release
+    return _number(str(value)[:4] if value else None, int)
+
+
+def _omdb_record(row):
+    """Convert a row with OMDb's field names (Title, Year, Director, imdbRating, imdbID, imdbVotes)."""
+    if row.get("Response", "True") != "True" or not row.get("imdbID") or not row.get("Title"):
+        return None
+    director = row.get("Director")
+    return (row["imdbID"], row["Title"], _year(row.get("Year")),
+            director if director not in (None, '', 'N/A') else None,
+            _number(row.get("imdbRating"), float), _number(row.get("imdbVotes"), int) or 0)
+
+
+def _imdb_record(row):
+    """Convert a row of IMDb's title.basics.tsv (tconst, titleType, primaryTitle, startYear, ...)."""
+    if row.get("titleType") not in MIRROR_TITLE_TYPES or not row.get("primaryTitle"):
+        return None
+    return row["tconst"], row["primaryTitle"], _year(row.get("startYear")), None, None, 0
+
+
+def read_dump(path, file_format=None):
+    """
+    Read an OMDb/IMDb-style dump.
+
+    Args:
+        path (str): NDJSON of OMDb answers, a TSV with OMDb's column names, or
+            IMDb's title.basics.tsv; optionally gzipped.
+        file_format (str or None): 'ndjson' or 'tsv'; guessed from the file name if None.
+
+    Yields:
+        tuple: (imdb_id, title, year, director, rating, votes) per usable title.
+    """
+    if file_format is None:
+        suffixes = [suffix for suffix in Path(path).suffixes if suffix != '.gz']
+        file_format = 'tsv' if suffixes and suffixes[-1] in ('.tsv', '.txt') else 'ndjson'
+
+    with _open(path) as file:
+        if file_format == 'ndjson':
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            rows = csv.DictReader(file, delimiter='\t', quoting=csv.QUOTE_NONE)
+        for row in rows:
+            record = _imdb_record(row) if "tconst" in row else _omdb_record(row)
+            if record is not None:
+                yield record
+
+
+def read_ratings(path):
+    """
+    Read IMDb's title.ratings.tsv (tconst, averageRating, numVotes).
+
+    Yields:
+        tuple: (rating, votes, imdb_id).
+    """
+    with _open(path) as file:
+        for row in csv.DictReader(file, delimiter='\t', quoting=csv.QUOTE_NONE):
+            yield _number(row.get("averageRating"), float), _number(row.get("numVotes"), int) or 0, row["tconst"]
+
+
+def _batches(rows, size=MIRROR_BATCH_SIZE):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build_mirror(path, dumps, ratings=(), report=print):
+    """
+    Build a mirror file from dumps, replacing the current one atomically.
+
+    The new mirror is written next to the old one and renamed over it once
+    complete, so running apps keep answering from the old file until they
+    notice the new one. Titles without a year or a rating are left out:
+    the catalog needs both, so OMDb is asked for those instead.
+
+    Args:
+        path (str): The mirror file to (re)build.
+        dumps (iterable): Paths of title dumps (see read_dump); later files win for duplicate IMDb IDs.
+        ratings (iterable): Paths of IMDb title.ratings.tsv files to merge in.
+        report (callable): Called with progress messages; None for silence.
+
+    Returns:
+        int: Number of titles in the new mirror.
+    """
+    report = report or (lambda message: None)
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    building = f"{path}.building"
+    if os.path.exists(building):
+        os.remove(building)
+
+    with closing(sqlite3.connect(building)) as conn:
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        for statement in MIRROR_SCHEMA:
+            conn.execute(statement)
+
+        for dump in dumps:
+            for batch in _batches(read_dump(dump)):
+                conn.executemany(
+                    "INSERT OR REPLACE INTO titles (imdb_id, title, title_key, year, director, rating, votes)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    [(imdb_id, title, normalize_title(title), year, director, rating, votes)
+                     for imdb_id, title, year, director, rating, votes in batch]
+                )
+            report(f"Read {dump}")
+        for ratings_path in ratings:
+            for batch in _batches(read_ratings(ratings_path)):
+                conn.executemany("UPDATE titles SET rating = ?, votes = ? WHERE imdb_id = ?", batch)
+            report(f"Merged ratings from {ratings_path}")
+
+        conn.execute("DELETE FROM titles WHERE year IS NULL OR rating IS NULL")
+        for statement in MIRROR_INDEXES:
+            conn.execute(statement)
+        count = conn.execute("SELECT COUNT(*) FROM titles").fetchone()[0]
+        conn.executemany("INSERT INTO mirror_info (key, value) VALUES (?, ?)",
+                         [("titles", count), ("built_at", time.time())])
+        conn.execute("ANALYZE")
+        conn.commit()
+        conn.execute("VACUUM")
+
+    os.replace(building, path)
+    report(f"Mirror {path} holds {count} titles")
+    return count
@@ -0,0 +1,105 @@
+import threading
+from contextlib import contextmanager
+
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+from datamanager.data_models import db
+
+
+class SQLStatementBudgetExceeded(AssertionError):
+    """Raised when a request runs more SQL statements than SQL_STATEMENT_BUDGET allows."""
+
+
+class StatementCounter:
+    """Collects the SQL statements one thread runs while it is active."""
+
+    def __init__(self):
+        self.statements = []
+        self.thread = threading.get_ident()
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def __str__(self):
+        return "\n".join(self.statements)
+
+
+_active_counters = []
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    thread = threading.get_ident()
+    for counter in _active_counters:
+        if counter.thread == thread:
+            counter.statements.append(statement)
+    if has_request_context() and "_sql_statements" in g:
+        g._sql_statements.statements.append(statement)
+
+
+@contextmanager
+def count_statements():
+    """
+    Count the SQL statements the calling thread runs inside the with block.
+
+    Background workers (enrichment, recommendation updates) are not counted.
+
+    Example:
+        with count_statements() as counter:
+            data_manager.get_user_movies(user_id)
+        assert counter.count == 1
+    """
+    counter = StatementCounter()
+    _active_counters.append(counter)
+    try:
+        yield counter
+    finally:
+        _active_counters.remove(counter)
+
+
+def exempt_from_statement_budget(view):
+    """
+    Let a view run any number of SQL statements.
+
+    For endpoints whose work grows with the request by design, such as
+    bulk deletes; they should still run a fixed number of statements per
+    chunk of work.
+    """
+    view.statement_budget_exempt = True
+    return view
+
+
+def init_statement_budget(app):
+    """
+    Count SQL statements per request and enforce app.config['SQL_STATEMENT_BUDGET'].
+
+    With a budget configured (tests set one), a request that runs more
+    statements than allowed raises SQLStatementBudgetExceeded, so N+1 query
+    regressions fail loudly. Without a budget the count is kept in
+    g._sql_statements for instrumentation only.
+    """
+    app.config.setdefault('SQL_STATEMENT_BUDGET', None)
+
+    with app.app_context():
+        engine = db.engine
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+
+    @app.before_request
+    def start_statement_count():
+        g._sql_statements = StatementCounter()
+
+    @app.after_request
+    def check_statement_budget(response):
+        budget = app.config.get('SQL_STATEMENT_BUDGET')
+        counter = g.get('_sql_statements')
+        view = current_app.view_functions.get(request.endpoint)
+        if getattr(view, 'statement_budget_exempt', False):
+            return response
+        if budget is not None and counter is not None and counter.count > budget:
+            raise SQLStatementBudgetExceeded(
+                f"{request.method} {request.path} ran {counter.count} SQL statements "
+                f"(budget {budget}):\n{counter}"
+            )
+        return response
@@ -0,0 +1,393 @@
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from dotenv import load_dotenv
+from sqlalchemy import and_, bindparam, delete, exists, func, insert, not_, or_, select, text, union, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import aliased
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # Optional: the batch rebuild falls back to plain Python
+    np = sparse = None
+
+from datamanager.data_models import CatalogEntry, LikeCount, Movie, MovieNeighbor, Review, UserLike
+
+
+# Recommendation configuration
+load_dotenv()
+RECOMMEND_TOP_K = int(os.getenv('RECOMMEND_TOP_K', 50))
+RECOMMEND_LIKE_RATING = float(os.getenv('RECOMMEND_LIKE_RATING', 7))
+RECOMMEND_QUEUE_SIZE = int(os.getenv('RECOMMEND_QUEUE_SIZE', 10000))
+
+# Films whose similarities are computed per sparse product in the batch rebuild
+SIMILARITY_BLOCK = 4096
+
+# Keeps the top_k best neighbours of one film and deletes the rest
+TRIM_NEIGHBORS = text(
+    "DELETE FROM movie_neighbors WHERE catalog_id = :catalog_id AND neighbor_id NOT IN ("
+    " SELECT neighbor_id FROM movie_neighbors WHERE catalog_id = :catalog_id"
+    " ORDER BY score DESC, neighbor_id LIMIT :top_k)"
+)
+
+
+def likes_query(like_rating=RECOMMEND_LIKE_RATING):
+    """Select the distinct (user_id, catalog_id) likes: favourites, and films reviewed with like_rating or more."""
+    favourites = select(Movie.user_id, Movie.catalog_id)
+    reviewed = (select(Review.user_id, Movie.catalog_id)
+                .join(Movie, Movie.movie_id == Review.movie_id)
+                .where(Review.rating >= like_rating))
+    return union(favourites, reviewed)
+
+
+def similarity(shared, likes_a, likes_b):
+    """Cosine similarity of two films liked by likes_a and likes_b users, shared of whom like both."""
+    return shared / math.sqrt(likes_a * likes_b)
+
+
+def top_neighbors(likes, top_k=RECOMMEND_TOP_K):
+    """
+    Compute the top_k most similar films of every film from the likes.
+
+    With NumPy and SciPy the likes become a sparse user x film matrix M and
+    the co-occurrence counts M.T @ M are computed in blocks of films;
+    without them, by counting the pairs in every user's likes.
+
+    Args:
+        likes (list): Distinct (user_id, catalog_id) pairs.
+        top_k (int): Neighbours kept per film.
+
+    Returns:
+        list: (catalog_id, neighbor_id, shared, score) tuples ordered by film,
+        then best score first (ties broken by the lower neighbour ID).
+    """
+    if not likes:
+        return []
+    if sparse is not None:
+        return _top_neighbors_sparse(likes, top_k)
+    return _top_neighbors_python(likes, top_k)
+
+
+def _top_neighbors_sparse(likes, top_k):
+    pairs = np.asarray(likes, dtype=np.int64)
+    users, user_index = np.unique(pairs[:, 0], return_inverse=True)
+    films, film_index = np.unique(pairs[:, 1], return_inverse=True)
+    matrix = sparse.csr_matrix((np.ones(len(pairs)), (user_index, film_index)), shape=(len(users), len(films)))
+    like_counts = np.asarray(matrix.sum(axis=0)).ravel()
+    by_film = matrix.T.tocsr()
+
+    neighbors = []
+    for start in range(0, len(films), SIMILARITY_BLOCK):
+        block = (by_film[start:start + SIMILARITY_BLOCK] @ matrix).tocoo()
+        rows, columns, shared = block.row + start, block.col, block.data
+        other = rows != columns
+        rows, columns, shared = rows[other], columns[other], shared[other]
+        scores = shared / np.sqrt(like_counts[rows] * like_counts[columns])
+
+        # Order by film, best score first, then neighbour; keep each film's first top_k
+        order = np.lexsort((columns, -scores, rows))
+        rows, columns, shared, scores = rows[order], columns[order], shared[order], scores[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        kept = rank < top_k
+        neighbors.extend(zip(films[rows[kept]].tolist(), films[columns[kept]].tolist(),
+                             shared[kept].astype(np.int64).tolist(), scores[kept].tolist()))
+    return neighbors
+
+
+def _top_neighbors_python(likes, top_k):
+    liked_by_user = defaultdict(list)
+    like_counts = Counter()
+    for user_id, catalog_id in likes:
+        liked_by_user[user_id].append(catalog_id)
+        like_counts[catalog_id] += 1
+
+    shared = defaultdict(Counter)
+    for liked in liked_by_user.values():
+        for film in liked:
+            row = shared[film]
+            for other in liked:
+                if other != film:
+                    row[other] += 1
+
+    neighbors = []
+    for film in sorted(shared):
+        scored = sorted(((other, count, similarity(count, like_counts[film], like_counts[other]))
+                         for other, count in shared[film].items()), key=lambda item: (-item[2], item[0]))
+        neighbors.extend((film, other, count, score) for other, count, score in scored[:top_k])
+    return neighbors
+
+
+def rebuild_recommendations(connection, top_k=RECOMMEND_TOP_K, like_rating=RECOMMEND_LIKE_RATING):
+    """
+    Recompute the likes, like counts and neighbour lists from movies and reviews.
+
+    Returns:
+        int: Number of neighbour rows written.
+    """
+    for model in (MovieNeighbor, LikeCount, UserLike):
+        connection.execute(delete(model).execution_options(synchronize_session=False))
+    connection.execute(insert(UserLike).from_select(['user_id', 'catalog_id'], likes_query(like_rating)))
+    connection.execute(insert(LikeCount).from_select(
+        ['catalog_id', 'like_count'], select(UserLike.catalog_id, func.count()).group_by(UserLike.catalog_id)
+    ))
+
+    likes = connection.execute(select(UserLike.user_id, UserLike.catalog_id)).all()
+    neighbors = top_neighbors(likes, top_k)
+    if neighbors:
+        connection.execute(insert(MovieNeighbor), [
+            {"catalog_id": film, "neighbor_id": other, "shared": shared, "score": score}
+            for film, other, shared, score in neighbors
+        ])
+    return len(neighbors)
+
+
+def add_like(connection, user_id, catalog_id, top_k=RECOMMEND_TOP_K):
+    """
+    Count a new like in the like counts and neighbour lists.
+
+    The shared count of the film with each of the user's other liked films
+    goes up by one and their similarities are recomputed, in both films'
+    lists, which are then trimmed back to top_k. Similarities of pairs the
+    like does not touch keep the like counts they were computed with, and a
+    pair that was trimmed away restarts from one shared user, until the
+    next rebuild.
+
+    Returns:
+        bool: False if the user already liked the film.
+    """
+    added = connection.execute(
+        sqlite_insert(UserLike).values(user_id=user_id, catalog_id=catalog_id).on_conflict_do_nothing()
+    ).rowcount
+    if not added:
+        return False
+
+    count = sqlite_insert(LikeCount).values(catalog_id=catalog_id, like_count=1)
+    connection.execute(count.on_conflict_do_update(index_elements=['catalog_id'],
+                                                   set_={'like_count': LikeCount.like_count + 1}))
+    others = connection.execute(
+        select(UserLike.catalog_id).where(UserLike.user_id == user_id, UserLike.catalog_id != catalog_id)
+    ).scalars().all()
+    if not others:
+        return True
+
+    like_counts = dict(connection.execute(
+        select(LikeCount.catalog_id, LikeCount.like_count).where(LikeCount.catalog_id.in_([catalog_id, *others]))
+    ).all())
+    existing = {(film, other): shared for film, other, shared in connection.execute(
+        select(MovieNeighbor.catalog_id, MovieNeighbor.neighbor_id, MovieNeighbor.shared).where(or_(
+            and_(MovieNeighbor.catalog_id == catalog_id, MovieNeighbor.neighbor_id.in_(others)),
+            and_(MovieNeighbor.neighbor_id == catalog_id, MovieNeighbor.catalog_id.in_(others)),
+        ))
+    )}
+
+    rows = []
+    for other in others:
+        for pair in ((catalog_id, other), (other, catalog_id)):
+            shared = existing.get(pair, 0) + 1
+            rows.append({"catalog_id": pair[0], "neighbor_id": pair[1], "shared": shared,
+                         "score": similarity(shared, like_counts[pair[0]], like_counts[pair[1]])})
+    upsert = sqlite_insert(MovieNeighbor)
+    connection.execute(upsert.on_conflict_do_update(
+        index_elements=['catalog_id', 'neighbor_id'],
+        set_={'shared': upsert.excluded.shared, 'score': upsert.excluded.score}
+    ), rows)
+    connection.execute(TRIM_NEIGHBORS, [{"catalog_id": film, "top_k": top_k} for film in (catalog_id, *others)])
+    return True
+
+
+def _lost_like(like, users, movies, reviews, like_rating):
+    """WHERE clause: the like is of an affected user and no movie or review outside the doomed ones backs it."""
+    kept_movies = select(Movie.movie_id).where(Movie.user_id == like.user_id, Movie.catalog_id == like.catalog_id)
+    if movies is not None:
+        kept_movies = kept_movies.where(not_(movies))
+    kept_reviews = (select(Review.review_id)
+                    .join(Movie, Movie.movie_id == Review.movie_id)
+                    .where(Review.user_id == like.user_id, Movie.catalog_id == like.catalog_id,
+                           Review.rating >= like_rating, not_(reviews)))
+    return and_(like.user_id.in_(users), ~exists(kept_movies), ~exists(kept_reviews))
+
+
+def remove_likes(connection, users, movies, reviews, like_rating=RECOMMEND_LIKE_RATING):
+    """
+    Take the likes that only rest on doomed movies and reviews out of the likes, like counts and neighbour lists.
+
+    Call it before deleting the doomed rows, in the same transaction. The
+    shared count of every kept neighbour pair that loses a common user goes
+    down and its similarity is recomputed; pairs left without common users
+    are dropped. As with add_like, pairs a lost like does not touch keep the
+    like counts their similarity was computed with until the next rebuild.
+
+    Args:
+        connection (Connection or Session): Where to read and write.
+        users (list): IDs of users being deleted.
+        movies: WHERE clause selecting the doomed movies, or None.
+        reviews: WHERE clause selecting the doomed reviews.
+        like_rating (float): Smallest review rating that counts as a like.
+
+    Returns:
+        int: Number of likes removed.
+    """
+    owners = [select(Review.user_id).where(reviews), select(UserLike.user_id).where(UserLike.user_id.in_(users))]
+    if movies is not None:
+        owners.append(select(Movie.user_id).where(movies))
+    affected = union(*owners).scalar_subquery()
+
+    lost = connection.execute(
+        select(UserLike.user_id, UserLike.catalog_id)
+        .where(_lost_like(UserLike, affected, movies, reviews, like_rating))
+    ).all()
+    if not lost:
+        return 0
+
+    # Kept neighbour pairs and the number of common users they lose
+    film_like, other_like = aliased(UserLike), aliased(UserLike)
+    film_count, other_count = aliased(LikeCount), aliased(LikeCount)
+    touched = connection.execute(
+        select(MovieNeighbor.catalog_id, MovieNeighbor.neighbor_id, MovieNeighbor.shared, func.count(),
+               film_count.like_count, other_count.like_count)
+        .join(film_like, film_like.catalog_id == MovieNeighbor.catalog_id)
+        .join(other_like, and_(other_like.user_id == film_like.user_id,
+                               other_like.catalog_id == MovieNeighbor.neighbor_id))
+        .outerjoin(film_count, film_count.catalog_id == MovieNeighbor.catalog_id)
+        .outerjoin(other_count, other_count.catalog_id == MovieNeighbor.neighbor_id)
+        .where(film_like.user_id.in_(affected),
+               or_(_lost_like(film_like, affected, movies, reviews, like_rating),
+                   _lost_like(other_like, affected, movies, reviews, like_rating)))
+        .group_by(MovieNeighbor.catalog_id, MovieNeighbor.neighbor_id)
+    ).all()
+
+    likes, counts, neighbors = UserLike.__table__, LikeCount.__table__, MovieNeighbor.__table__  # Core executemany
+    connection.execute(
+        delete(likes).where(likes.c.user_id == bindparam('liker'), likes.c.catalog_id == bindparam('film')),
+        [{"liker": user_id, "film": catalog_id} for user_id, catalog_id in lost]
+    )
+    lost_counts = Counter(catalog_id for _, catalog_id in lost)
+    connection.execute(
+        update(counts).where(counts.c.catalog_id == bindparam('film'))
+        .values(like_count=counts.c.like_count - bindparam('lost')),
+        [{"film": catalog_id, "lost": count} for catalog_id, count in lost_counts.items()]
+    )
+    connection.execute(delete(LikeCount).where(LikeCount.like_count <= 0).execution_options(synchronize_session=False))
+
+    rescored, dropped = [], []
+    for film, other, shared, common_lost, film_likes, other_likes in touched:
+        shared -= common_lost
+        film_likes = (film_likes or 0) - lost_counts[film]
+        other_likes = (other_likes or 0) - lost_counts[other]
+        pair = {"film": film, "other": other}
+        if shared <= 0 or film_likes <= 0 or other_likes <= 0:
+            dropped.append(pair)
+        else:
+            rescored.append({**pair, "common": shared, "similarity": similarity(shared, film_likes, other_likes)})
+    pair_criteria = (neighbors.c.catalog_id == bindparam('film'), neighbors.c.neighbor_id == bindparam('other'))
+    if rescored:
+        connection.execute(
+            update(neighbors).where(*pair_criteria).values(shared=bindparam('common'), score=bindparam('similarity')),
+            rescored
+        )
+    if dropped:
+        connection.execute(delete(neighbors).where(*pair_criteria), dropped)
+    return len(lost)
+
+
+def recommend(connection, user_id, limit=10):
+    """
+    Rank the films most similar to what a user likes, leaving out the ones they like or have.
+
+    A film's score is the sum of its similarities to the user's liked films,
+    read from the precomputed neighbour lists.
+
+    Returns:
+        list: Dicts with the catalog ID, title, director, year, IMDb rating and score, best first.
+    """
+    liked = select(UserLike.catalog_id).where(UserLike.user_id == user_id)
+    owned = select(Movie.catalog_id).where(Movie.user_id == user_id)
+    score = func.sum(MovieNeighbor.score).label('score')
+    query = (
+        select(CatalogEntry.catalog_id, CatalogEntry.title, CatalogEntry.director, CatalogEntry.year,
+               CatalogEntry.rating, score)
+        .join(MovieNeighbor, MovieNeighbor.neighbor_id == CatalogEntry.catalog_id)
+        .where(MovieNeighbor.catalog_id.in_(liked), MovieNeighbor.neighbor_id.not_in(liked),
+               MovieNeighbor.neighbor_id.not_in(owned))
+        .group_by(CatalogEntry.catalog_id)
+        .order_by(score.desc(), CatalogEntry.catalog_id)
+        .limit(limit)
+    )
+    fields = ('catalog_id', 'title', 'director', 'year', 'rating', 'score')
+    return [dict(zip(fields, row)) for row in connection.execute(query).tuples()]
+
+
+class RecommendationUpdater:
+    """
+    Single background thread that counts new likes in the neighbour lists.
+
+    Updating the lists takes a handful of statements per like, so it runs
+    after the request instead of in it. One thread applies the likes one
+    at a time, so updates of the same pair never race, and a like already
+    waiting is not queued twice. Once max_pending
+    likes are waiting, further ones are dropped (and counted) until the
+    next rebuild picks them up.
+    """
+
+    def __init__(self, app, store_like, max_pending=RECOMMEND_QUEUE_SIZE):
+        """
+        Args:
+            app (Flask): The app whose context the thread runs in.
+            store_like (callable): Called with (user_id, catalog_id) to apply and commit one like.
+            max_pending (int): Maximum number of likes waiting.
+        """
+        self.app = app
+        self.store_like = store_like
+        self.max_pending = max_pending
+        self.dropped = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='recommendations')
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._queued = set()
+
+    @property
+    def pending(self):
+        """Number of likes waiting or being applied."""
+        return self._pending
+
+    def submit(self, user_id, catalog_id):
+        """Queue a like; returns its Future, or None if it is already waiting or the queue was full."""
+        with self._lock:
+            if (user_id, catalog_id) in self._queued:
+                return None
+            if not self._slots.acquire(blocking=False):
+                self.dropped += 1
+                return None
+            self._queued.add((user_id, catalog_id))
+            self._pending += 1
+        future = self._executor.submit(self._run, user_id, catalog_id)
+        future.add_done_callback(self._release)
+        return future
+
+    def _run(self, user_id, catalog_id):
+        with self._lock:
+            self._queued.discard((user_id, catalog_id))
+        with self.app.app_context():
+            try:
+                return self.store_like(user_id, catalog_id)
+            except Exception:
+                self.app.logger.exception("Could not update recommendations for a like of %s by %s",
+                                          catalog_id, user_id)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+        self._slots.release()
+
+    def wait(self):
+        """Block until every like queued so far has been applied."""
+        self._executor.submit(lambda: None).result()
+
+    def shutdown(self, wait=True):
+        """Stop accepting likes and optionally wait for the queued ones."""
+        self._executor.shutdown(wait=wait)
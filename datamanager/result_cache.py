@@ -0,0 +1,211 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+
+# Result cache configuration
+load_dotenv()
+basedir = Path(__file__).resolve().parent.parent
+default_cache_path = os.path.join(basedir, 'db', 'result_cache.db')
+
+RESULT_CACHE_BACKEND = os.getenv('RESULT_CACHE_BACKEND', 'memory')
+RESULT_CACHE_PATH = os.getenv('RESULT_CACHE_PATH', default_cache_path)
+RESULT_CACHE_SIZE = int(os.getenv('RESULT_CACHE_SIZE', 512))
+RESULT_CACHE_TTL = int(os.getenv('RESULT_CACHE_TTL', 60 * 60))
+
+# DiskBackend trims expired and surplus entries once every this many writes
+DISK_TRIM_INTERVAL = 64
+
+# Returned by a backend's get when it has no fresh entry.
+MISSING = object()
+
+
+class MemoryBackend:
+    """In-process LRU; every worker process keeps its own."""
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, clock=time.time):
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            if entry[0] <= self.clock():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (self.clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class DiskBackend:
+    """
+    SQLite file shared by every worker process on the host.
+
+    Values are pickled; keys are hashed. When the table grows past
+    max_entries the entries closest to expiry are dropped.
+    """
+
+    def __init__(self, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_SIZE * 16, clock=time.time):
+        self.path = path
+        self.max_entries = max_entries
+        self.clock = clock
+        self._writes = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS result_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_result_cache_expires_at ON result_cache (expires_at)")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=5)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.execute("PRAGMA synchronous = OFF")  # A lost entry is only a cache miss
+        return conn
+
+    @staticmethod
+    def _hash(key):
+        return hashlib.sha1(repr(key).encode()).hexdigest()
+
+    def get(self, key):
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT value FROM result_cache WHERE key = ? AND expires_at > ?", (self._hash(key), self.clock())
+            ).fetchone()
+        return pickle.loads(row[0]) if row else MISSING
+
+    def set(self, key, value, ttl):
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO result_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (self._hash(key), pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), self.clock() + ttl)
+            )
+            self._writes += 1
+            if self._writes % DISK_TRIM_INTERVAL:
+                return
+            conn.execute("DELETE FROM result_cache WHERE expires_at <= ?", (self.clock(),))
+            conn.execute(
+                "DELETE FROM result_cache WHERE key IN (SELECT key FROM result_cache"
+                " ORDER BY expires_at DESC LIMIT -1 OFFSET ?)", (self.max_entries,)
+            )
+
+    def clear(self):
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM result_cache")
+
+    def __len__(self):
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT COUNT(*) FROM result_cache").fetchone()[0]
+
+
+class NullBackend:
+    """Caches nothing; RESULT_CACHE_BACKEND=none."""
+
+    def get(self, key):
+        return MISSING
+
+    def set(self, key, value, ttl):
+        pass
+
+    def clear(self):
+        pass
+
+    def __len__(self):
+        return 0
+
+
+class ResultCache:
+    """
+    Cache for query results and rendered pages.
+
+    Callers put the version of the data into the key (see the ETag built
+    from data_versions), so a write anywhere, in any worker, changes the
+    key of exactly the entries it affects and they are never served again.
+    Entries left behind under old versions age out of the backend.
+    """
+
+    def __init__(self, backend, ttl=RESULT_CACHE_TTL):
+        """
+        Args:
+            backend: MemoryBackend, DiskBackend or NullBackend.
+            ttl (int): Seconds an entry is kept at most.
+        """
+        self.backend = backend
+        self.ttl = ttl
+        self._counters = {"hits": 0, "misses": 0}
+        self._lock = threading.Lock()
+
+    def get_or_set(self, key, build):
+        """
+        Return the cached value for key, or build, store and return it.
+
+        Args:
+            key (tuple): Identifies the value, including the version of the data it was built from.
+            build (callable): Produces the value on a miss. It must be picklable for DiskBackend.
+        """
+        value = self.backend.get(key)
+        with self._lock:
+            self._counters["hits" if value is not MISSING else "misses"] += 1
+        if value is MISSING:
+            value = build()
+            self.backend.set(key, value, self.ttl)
+        return value
+
+    def clear(self):
+        self.backend.clear()
+
+    def stats(self):
+        """Return the hit/miss counters together with the hit ratio and the number of entries."""
+        with self._lock:
+            stats = dict(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        stats["entries"] = len(self.backend)
+        stats["backend"] = type(self.backend).__name__
+        return stats
+
+
+def make_result_cache(backend=RESULT_CACHE_BACKEND, path=RESULT_CACHE_PATH, max_entries=RESULT_CACHE_SIZE,
+                      ttl=RESULT_CACHE_TTL):
+    """
+    Build the cache configured by RESULT_CACHE_BACKEND: 'memory', 'disk' or 'none'.
+
+    Raises:
+        ValueError: If the backend name is unknown.
+    """
+    if backend == 'memory':
+        return ResultCache(MemoryBackend(max_entries), ttl)
+    if backend == 'disk':
+        return ResultCache(DiskBackend(path, max_entries * 16), ttl)
+    if backend == 'none':
+        return ResultCache(NullBackend(), ttl)
+    raise ValueError(f"Unknown RESULT_CACHE_BACKEND '{backend}'. Choose one of: memory, disk, none")
@@ -0,0 +1,110 @@
+from sqlalchemy import Integer, case, cast, delete, func, insert, literal, select, tuple_
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+from datamanager.data_models import Review, ReviewStats
+
+
+HISTOGRAM_BUCKETS = range(1, 11)
+COUNTERS = ('review_count', 'rating_sum') + tuple(f'h{bucket}' for bucket in HISTOGRAM_BUCKETS)
+
+# (scope, reviews column) for every kind of aggregate kept in review_stats
+SCOPES = (
+    (ReviewStats.MOVIE, Review.movie_id),
+    (ReviewStats.USER, Review.user_id),
+)
+
+
+def rating_bucket(rating):
+    """Return the histogram bucket (1-10) a rating is counted in."""
+    return min(10, max(1, int(rating)))
+
+
+def review_deltas(review, sign=1):
+    """
+    Build the counter changes for adding (sign=1) or removing (sign=-1) one review.
+
+    Returns:
+        list: One delta per scope, ready for apply_deltas().
+    """
+    deltas = []
+    for scope, column in SCOPES:
+        delta = dict.fromkeys(COUNTERS, 0)
+        delta.update(scope=scope, subject_id=getattr(review, column.key), review_count=sign,
+                     rating_sum=sign * review.rating)
+        delta[f'h{rating_bucket(review.rating)}'] = sign
+        deltas.append(delta)
+    return deltas
+
+
+def _aggregate_columns():
+    bucket = func.min(10, func.max(1, cast(Review.rating, Integer)))
+    return (
+        func.count(Review.review_id),
+        func.sum(Review.rating),
+        *(func.sum(case((bucket == value, 1), else_=0)) for value in HISTOGRAM_BUCKETS),
+    )
+
+
+def grouped_deltas(connection, criteria, sign=-1):
+    """
+    Build the counter changes for every review matching criteria, grouped per movie and per user.
+
+    Args:
+        connection (Connection or Session): Where to read the reviews.
+        criteria (tuple): WHERE clauses selecting the reviews.
+        sign (int): -1 to take the reviews out of the aggregates, 1 to add them.
+
+    Returns:
+        list: Deltas ready for apply_deltas().
+    """
+    deltas = []
+    for scope, column in SCOPES:
+        query = select(column, *_aggregate_columns()).where(*criteria).group_by(column)
+        for subject_id, *values in connection.execute(query):
+            delta = {counter: sign * value for counter, value in zip(COUNTERS, values)}
+            delta.update(scope=scope, subject_id=subject_id)
+            deltas.append(delta)
+    return deltas
+
+
+def apply_deltas(connection, deltas):
+    """
+    Add counter changes to review_stats with one upsert, then drop rows left without reviews.
+
+    Call it in the same transaction as the review writes it describes.
+    """
+    if not deltas:
+        return
+
+    upsert = sqlite_insert(ReviewStats)
+    upsert = upsert.on_conflict_do_update(
+        index_elements=['scope', 'subject_id'],
+        set_={counter: getattr(ReviewStats, counter) + getattr(upsert.excluded, counter) for counter in COUNTERS}
+    )
+    connection.execute(upsert, deltas)
+
+    emptied = [(delta['scope'], delta['subject_id']) for delta in deltas if delta['review_count'] < 0]
+    if emptied:
+        connection.execute(
+            delete(ReviewStats)
+            .where(ReviewStats.review_count <= 0,
+                   tuple_(ReviewStats.scope, ReviewStats.subject_id).in_(emptied))
+            .execution_options(synchronize_session=False)
+        )
+
+
+def rebuild_review_stats(connection):
+    """
+    Recompute review_stats from the reviews table, replacing whatever it held.
+
+    Returns:
+        int: Number of aggregate rows written.
+    """
+    connection.execute(delete(ReviewStats).execution_options(synchronize_session=False))
+    written = 0
+    for scope, column in SCOPES:
+        query = select(literal(scope), column, *_aggregate_columns()).group_by(column)
+        written += connection.execute(
+            insert(ReviewStats).from_select(['scope', 'subject_id', *COUNTERS], query)
+        ).rowcount
+    return written
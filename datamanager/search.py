@@ -0,0 +1,197 @@
+import html
+import re
+
+from sqlalchemy import text
+
+
+# Full-text indexes over the catalog and reviews. Both are external-content
+# FTS5 tables: they store only the index and read the text from the base
+# table, and the triggers below keep them in sync with every write.
+SEARCH_SCHEMA = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_fts USING fts5("
+    " title, director, content='catalog', content_rowid='catalog_id',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='3')",
+    "CREATE VIRTUAL TABLE IF NOT EXISTS reviews_fts USING fts5("
+    " review_text, content='reviews', content_rowid='review_id',"
+    " tokenize='unicode61 remove_diacritics 2', prefix='3')",
+
+    "CREATE TRIGGER IF NOT EXISTS catalog_fts_insert AFTER INSERT ON catalog BEGIN"
+    " INSERT INTO catalog_fts (rowid, title, director) VALUES (new.catalog_id, new.title, new.director);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_fts_delete AFTER DELETE ON catalog BEGIN"
+    " INSERT INTO catalog_fts (catalog_fts, rowid, title, director)"
+    " VALUES ('delete', old.catalog_id, old.title, old.director);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS catalog_fts_update AFTER UPDATE OF title, director ON catalog BEGIN"
+    " INSERT INTO catalog_fts (catalog_fts, rowid, title, director)"
+    " VALUES ('delete', old.catalog_id, old.title, old.director);"
+    " INSERT INTO catalog_fts (rowid, title, director) VALUES (new.catalog_id, new.title, new.director);"
+    " END",
+
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_insert AFTER INSERT ON reviews BEGIN"
+    " INSERT INTO reviews_fts (rowid, review_text) VALUES (new.review_id, new.review_text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_delete AFTER DELETE ON reviews BEGIN"
+    " INSERT INTO reviews_fts (reviews_fts, rowid, review_text) VALUES ('delete', old.review_id, old.review_text);"
+    " END",
+    "CREATE TRIGGER IF NOT EXISTS reviews_fts_update AFTER UPDATE OF review_text ON reviews BEGIN"
+    " INSERT INTO reviews_fts (reviews_fts, rowid, review_text) VALUES ('delete', old.review_id, old.review_text);"
+    " INSERT INTO reviews_fts (rowid, review_text) VALUES (new.review_id, new.review_text);"
+    " END",
+)
+
+SEARCH_TRIGGERS = ('catalog_fts_insert', 'catalog_fts_delete', 'catalog_fts_update',
+                   'reviews_fts_insert', 'reviews_fts_delete', 'reviews_fts_update')
+
+SEARCH_KINDS = ('movies', 'reviews')
+
+# snippet() wraps matches in these control characters; they are turned into
+# <mark> tags only after the text around them has been HTML-escaped.
+_MATCH_START, _MATCH_END = '\x02', '\x03'
+SNIPPET_TOKENS = 16
+
+_TERM = re.compile(r'\w+', re.UNICODE)
+
+# The last word of a query is matched as a prefix once it is this long.
+# Shorter prefixes expand to so many terms that ranking them gets slow.
+MIN_PREFIX_LENGTH = 3
+
+
+def create_search_index(connection):
+    """Create the FTS5 tables and triggers (if missing) and index the existing rows."""
+    for statement in SEARCH_SCHEMA:
+        connection.execute(text(statement))
+    rebuild_search_index(connection)
+
+
+def rebuild_search_index(connection):
+    """Re-read every catalog entry and review into the full-text indexes."""
+    connection.execute(text("INSERT INTO catalog_fts (catalog_fts) VALUES ('rebuild')"))
+    connection.execute(text("INSERT INTO reviews_fts (reviews_fts) VALUES ('rebuild')"))
+
+
+def drop_search_triggers(connection):
+    """
+    Stop keeping the full-text indexes in sync, for bulk loads.
+
+    Call create_search_index() afterwards to restore the triggers and
+    re-index everything in one pass.
+    """
+    for trigger in SEARCH_TRIGGERS:
+        connection.execute(text(f"DROP TRIGGER IF EXISTS {trigger}"))
+
+
+def search_triggers_installed(connection):
+    """Return True if every trigger keeping the full-text indexes in sync exists."""
+    names = ', '.join(f"'{trigger}'" for trigger in SEARCH_TRIGGERS)
+    installed = connection.execute(text(
+        f"SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND name IN ({names})"
+    )).scalar()
+    return installed == len(SEARCH_TRIGGERS)
+
+
+def optimize_search_index(connection):
+    """Merge the index b-trees, which keeps queries fast after many small writes."""
+    connection.execute(text("INSERT INTO catalog_fts (catalog_fts) VALUES ('optimize')"))
+    connection.execute(text("INSERT INTO reviews_fts (reviews_fts) VALUES ('optimize')"))
+
+
+def match_expression(query):
+    """
+    Turn free text typed by a user into an FTS5 MATCH expression.
+
+    Every word must match. The last one also matches as a prefix (once it has
+    MIN_PREFIX_LENGTH characters), so "christopher nol" finds "Christopher
+    Nolan" while the user is still typing. FTS5 operators typed by the user
+    are treated as plain words.
+
+    Returns:
+        str or None: The expression, or None if the query holds no words.
+    """
+    terms = _TERM.findall(query or '')
+    if not terms:
+        return None
+    words = [f'"{term}"' for term in terms]
+    if len(terms[-1]) >= MIN_PREFIX_LENGTH:
+        words[-1] += '*'
+    return ' '.join(words)
+
+
+def highlight(snippet):
+    """HTML-escape a snippet and wrap its matches in <mark> tags."""
+    if snippet is None:
+        return None
+    return html.escape(snippet).replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
+
+
+def _snippet(table, column):
+    return f"snippet({table}, {column}, char(2), char(3), '…', {SNIPPET_TOKENS})"
+
+
+def search_movies(connection, expression, user_id=None, limit=20, offset=0):
+    """
+    Rank catalog entries matching an expression by bm25, best match first.
+
+    Without user_id only films at least one user has added are returned;
+    with it, only that user's movies, each with its movie_id.
+
+    Returns:
+        list: One dict per film, with highlighted title and director.
+    """
+    if user_id is None:
+        scope = "EXISTS (SELECT 1 FROM movies WHERE movies.catalog_id = catalog.catalog_id)"
+        movie_id = "NULL"
+        join = ""
+    else:
+        scope = "movies.user_id = :user_id"
+        movie_id = "movies.movie_id"
+        join = " JOIN movies ON movies.catalog_id = catalog.catalog_id"
+
+    rows = connection.execute(text(
+        f"SELECT catalog.catalog_id, {movie_id} AS movie_id, catalog.title, catalog.director,"
+        f" catalog.year, catalog.rating, {_snippet('catalog_fts', 0)} AS title_snippet,"
+        f" {_snippet('catalog_fts', 1)} AS director_snippet, catalog_fts.rank AS score"
+        f" FROM catalog_fts JOIN catalog ON catalog.catalog_id = catalog_fts.rowid{join}"
+        f" WHERE catalog_fts MATCH :expression AND {scope}"
+        f" ORDER BY catalog_fts.rank LIMIT :limit OFFSET :offset"
+    ), {"expression": expression, "user_id": user_id, "limit": limit, "offset": offset}).mappings()
+
+    return [{
+        "catalog_id": row["catalog_id"],
+        "movie_id": row["movie_id"],
+        "title": row["title"],
+        "director": row["director"],
+        "year": row["year"],
+        "rating": row["rating"],
+        "highlight": {"title": highlight(row["title_snippet"]), "director": highlight(row["director_snippet"])},
+        "score": -row["score"],
+    } for row in rows]
+
+
+def search_reviews(connection, expression, user_id=None, limit=20, offset=0):
+    """
+    Rank reviews matching an expression by bm25, best match first.
+
+    Args:
+        user_id (int or None): Only return reviews written by this user.
+
+    Returns:
+        list: One dict per review, with a highlighted snippet of its text.
+    """
+    scope = " AND reviews.user_id = :user_id" if user_id is not None else ""
+    rows = connection.execute(text(
+        f"SELECT reviews.review_id, reviews.movie_id, reviews.user_id, reviews.rating,"
+        f" {_snippet('reviews_fts', 0)} AS text_snippet, reviews_fts.rank AS score"
+        f" FROM reviews_fts JOIN reviews ON reviews.review_id = reviews_fts.rowid"
+        f" WHERE reviews_fts MATCH :expression{scope}"
+        f" ORDER BY reviews_fts.rank LIMIT :limit OFFSET :offset"
+    ), {"expression": expression, "user_id": user_id, "limit": limit, "offset": offset}).mappings()
+
+    return [{
+        "review_id": row["review_id"],
+        "movie_id": row["movie_id"],
+        "user_id": row["user_id"],
+        "rating": row["rating"],
+        "highlight": highlight(row["text_snippet"]),
+        "score": -row["score"],
+    } for row in rows]
@@ -1,8 +1,31 @@
 import os
-import requests
-from sqlalchemy.exc import SQLAlchemyError
+from datetime import timedelta
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import delete, exists, insert, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.orm import joinedload, selectinload
 from datamanager.data_manager_interface import DataManagerInterface
-from datamanager.data_models import db, User, Movie, Review
+from datamanager.data_models import db, User, Movie, Review, EnrichmentJob, CatalogEntry, ReviewStats, utcnow
+from datamanager.cascade import DELETABLE, delete_cascade
+from datamanager.enrichment import EnrichmentQueue, EnrichmentQueueFull, ENRICHMENT_CLAIM_TIMEOUT
+from datamanager.omdb_cache import OMDbCache, MISSING, OMDB_CACHE_PATH
+from datamanager.omdb_client import OMDbClient, OMDbUnavailableError
+from datamanager.omdb_mirror import OMDbMirror, OMDB_MIRROR_PATH
+from datamanager.migrations import run_migrations
+from datamanager.query_budget import init_statement_budget
+from datamanager.export import iter_export_rows
+from datamanager.search import (match_expression, optimize_search_index, rebuild_search_index,
+                                search_movies, search_reviews)
+from datamanager.review_stats import apply_deltas, rebuild_review_stats, review_deltas
+from datamanager.leaderboards import (advance_trending, apply_leaderboard_deltas, grouped_leaderboard_deltas,
+                                      rebuild_leaderboards, review_delta, top_rated, trending, trending_is_stale)
+from datamanager.recommendations import (add_like, rebuild_recommendations, recommend, RecommendationUpdater,
+                                         RECOMMEND_LIKE_RATING)
+from datamanager.result_cache import make_result_cache, RESULT_CACHE_BACKEND
+from datamanager.versions import read_version
+from datamanager.metrics import OMDB_LOOKUPS, cache_metrics, pool_metrics, Counter, Gauge
+from datamanager.storage import configure_storage, install_pragmas, describe_storage
+from datamanager.writer import InlineWriter, SQLiteWriter, SQLITE_WRITER, write_operation
 from dotenv import load_dotenv
 from pathlib import Path
 
@@ -11,11 +34,206 @@ from pathlib import Path
 load_dotenv()
 OMDB_API_URL = os.getenv('API_URL')
 OMDB_API_KEY = os.getenv('API_KEY')
+BATCH_LOOKUP_WORKERS = int(os.getenv('BATCH_LOOKUP_WORKERS', 8))
 
 
 # Database configuration
 basedir = Path(__file__).resolve().parent.parent
-database_path = os.path.join(basedir, 'db', 'movies.db')
+database_path = os.getenv('DATABASE_PATH', os.path.join(basedir, 'db', 'movies.db'))
+DELETE_BATCH_SIZE = int(os.getenv('DELETE_BATCH_SIZE', 500))
+
+# Loading plans: pass one as load= to a read method to fetch relationships
+# eagerly instead of lazy-loading them once per object.
+MOVIE_LIST_PLAN = (joinedload(Movie.enrichment),)
+USER_MOVIES_PLAN = (selectinload(User.movies).joinedload(Movie.enrichment),)
+MOVIE_REVIEWS_PLAN = (selectinload(Movie.reviews),)
+USER_REVIEWS_PLAN = (selectinload(User.reviews),)
+
+# Columns that paginated reads can project, keyed by their API field names
+USER_FIELDS = {
+    "user_id": User.user_id,
+    "name": User.name,
+}
+MOVIE_FIELDS = {
+    "movie_id": Movie.movie_id,
+    "title": CatalogEntry.title,
+    "director": CatalogEntry.director,
+    "year": CatalogEntry.year,
+    "rating": CatalogEntry.rating,
+}
+
+# Maximum number of bound parameters per IN (...) lookup
+LOOKUP_CHUNK_SIZE = 500
+
+
+def keyset_page(session, model, key_column, field_map, criteria, after_id, limit, fields, load, joins):
+    """
+    Read one page ordered by key_column, starting after after_id (keyset pagination).
+
+    Returns:
+        tuple: (items, next_after_id); items are model objects, or dicts of the fields if fields is given.
+    """
+    if after_id is not None:
+        criteria = criteria + [key_column > after_id]
+
+    if fields is None:
+        statement = select(model).options(*load)
+    else:
+        columns = [key_column.label("_cursor")]
+        columns += [field_map[field].label(field) for field in fields]
+        statement = select(*columns).select_from(model)
+        for relationship in joins:
+            statement = statement.join(relationship)
+    statement = statement.where(*criteria).order_by(key_column).limit(limit + 1)
+
+    if fields is None:
+        items = session.scalars(statement).all()
+        keys = [getattr(item, key_column.key) for item in items]
+    else:
+        # Plain tuples are the cheapest rows SQLAlchemy returns; the cursor column comes first
+        rows = session.execute(statement).tuples().all()
+        keys = [row[0] for row in rows]
+        items = [dict(zip(fields, row[1:])) for row in rows]
+
+    if len(items) > limit:
+        return items[:limit], keys[limit - 1]
+    return items, None
+
+
+def omdb_movie_data(data):
+    """Turn a decoded OMDb answer into movie details, or None if OMDb did not find the title."""
+    if data is None or data.get("Response") != "True":
+        return None
+    return {
+        "movie_name": data.get("Title"),
+        "director": data.get("Director"),
+        "year": data.get("Year"),
+        "rating": data.get("imdbRating"),
+        "imdb_id": data.get("imdbID"),
+    }
+
+
+def dedupe_titles(movie_names):
+    """
+    Drop repeated titles (case and whitespace insensitive) from a batch.
+
+    Returns:
+        tuple: ({title key: first spelling}, number of titles dropped).
+    """
+    unique_names = {}
+    duplicates = 0
+    for name in movie_names:
+        key = OMDbCache.normalize_title(name)
+        if not key or key in unique_names:
+            duplicates += 1
+            continue
+        unique_names[key] = name
+    return unique_names, duplicates
+
+
+def find_known_titles(session, title_keys):
+    """Return the shared catalog entries of the given title keys, keyed by title key, in few queries."""
+    known = {}
+    keys = list(title_keys)
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start:start + LOOKUP_CHUNK_SIZE]
+        for entry in session.scalars(select(CatalogEntry).where(CatalogEntry.title_key.in_(chunk),
+                                                                  CatalogEntry.imdb_id.isnot(None))):
+            known.setdefault(entry.title_key, entry)
+    return known
+
+
+def store_bulk_movies(session, user_id, unique_names, known, lookups):
+    """
+    Write the movies of a batch once its titles are resolved, in one transaction.
+
+    Args:
+        session (Session): The session to write with; it is committed.
+        user_id (int): The ID of the user the movies belong to.
+        unique_names (dict): As returned by dedupe_titles.
+        known (dict): Catalog entries of titles already in the catalog, by title key.
+        lookups (dict): (movie details or None, error or None) of every other title.
+
+    Returns:
+        list: One result per unique title, in request order (see add_movies_bulk).
+    """
+    results, resolved = [], {}
+    for key, name in unique_names.items():
+        if key in known:
+            entry = known[key]
+            resolved[name] = {"catalog_id": entry.catalog_id, "title": entry.title, "director": entry.director,
+                              "year": entry.year, "rating": entry.rating, "imdb_id": entry.imdb_id}
+            continue
+        movie_data, error = lookups[name]
+        if error:
+            results.append({"title": name, "status": "error", "error": error})
+            continue
+        if not movie_data:
+            results.append({"title": name, "status": "not_found"})
+            continue
+        try:
+            resolved[name] = SQLiteDataManager.catalog_values(movie_data)
+        except (KeyError, TypeError, ValueError) as e:
+            results.append({"title": name, "status": "error", "error": f"Invalid OMDb data: {str(e)}"})
+
+    if resolved:
+        try:
+            store_catalog_values(session, resolved.values())
+            statement = insert(Movie).returning(Movie.catalog_id, Movie.movie_id)
+            movie_ids = {}
+            for row in session.execute(statement, [
+                {"user_id": user_id, "catalog_id": values["catalog_id"]} for values in resolved.values()
+            ]):
+                movie_ids.setdefault(row.catalog_id, []).append(row.movie_id)
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        for name, values in resolved.items():
+            movie_id = movie_ids[values["catalog_id"]].pop()
+            results.append({"title": name, "status": "added", "movie": {
+                "movie_id": movie_id,
+                "catalog_id": values["catalog_id"],
+                "movie_name": values["title"],
+                "director": values["director"],
+                "year": values["year"],
+                "rating": values["rating"]
+            }})
+
+    order = {name: position for position, name in enumerate(unique_names.values())}
+    results.sort(key=lambda result: order[result["title"]])
+    return results
+
+
+def store_catalog_values(session, values_list):
+    """Fill in catalog_id for every values dict, reusing entries by IMDb ID and bulk-inserting the rest."""
+    pending = [values for values in values_list if "catalog_id" not in values]
+    imdb_ids = list({values["imdb_id"] for values in pending if values["imdb_id"]})
+
+    existing = {}
+    for start in range(0, len(imdb_ids), LOOKUP_CHUNK_SIZE):
+        chunk = imdb_ids[start:start + LOOKUP_CHUNK_SIZE]
+        existing.update(session.execute(
+            select(CatalogEntry.imdb_id, CatalogEntry.catalog_id).where(CatalogEntry.imdb_id.in_(chunk))
+        ).all())
+
+    # Rows are matched back to their new IDs by content, since SQLite does
+    # not promise RETURNING rows in insertion order.
+    columns = ("imdb_id", "title", "title_key", "director", "year", "rating")
+    new_entries = {}
+    for values in pending:
+        if values["imdb_id"] in existing:
+            values["catalog_id"] = existing[values["imdb_id"]]
+        else:
+            new_entries.setdefault(tuple(values[column] for column in columns), []).append(values)
+
+    if new_entries:
+        statement = insert(CatalogEntry).returning(CatalogEntry.catalog_id,
+                                                   *(getattr(CatalogEntry, column) for column in columns))
+        rows = [dict(zip(columns, key)) for key in new_entries]
+        for row in session.execute(statement, rows).mappings():
+            for values in new_entries[tuple(row[column] for column in columns)]:
+                values["catalog_id"] = row["catalog_id"]
 
 
 class SQLiteDataManager(DataManagerInterface):
@@ -23,47 +241,119 @@ class SQLiteDataManager(DataManagerInterface):
 
     def __init__(self, app):
         """Initialize the data manager with Flask app and configure the database."""
-        app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{database_path}'
+        app.config.setdefault('SQLALCHEMY_DATABASE_URI', f'sqlite:///{database_path}')
         app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+        app.config.setdefault('ASYNC_ENRICHMENT', os.getenv('ASYNC_ENRICHMENT', '').lower() in ('1', 'true', 'yes'))
+        self.storage_profile = configure_storage(app)
         db.init_app(app)
+        self.app = app
+        self.omdb_cache = OMDbCache(path=app.config.get('OMDB_CACHE_PATH', OMDB_CACHE_PATH))
+        self.omdb_mirror = OMDbMirror(path=app.config.get('OMDB_MIRROR_PATH', OMDB_MIRROR_PATH))
+        self.omdb_client = OMDbClient(OMDB_API_URL, OMDB_API_KEY)
+        self.enrichment_queue = EnrichmentQueue(app, self.enrich_movie)
+        self.recommendation_updater = RecommendationUpdater(app, self._store_like)
+        self.result_cache = make_result_cache(app.config.get('RESULT_CACHE_BACKEND', RESULT_CACHE_BACKEND))
 
         with app.app_context():
+            install_pragmas(db.engine, self.storage_profile)
             db.create_all()
+            run_migrations(db.engine, report=app.logger.info)
+            app.logger.info(describe_storage(self.storage_profile, db.engine))
+        self.writer = InlineWriter()
+        if app.config.setdefault('SQLITE_WRITER', SQLITE_WRITER):
+            self.writer = SQLiteWriter(app, db.session, self.storage_profile).start()
+        init_statement_budget(app)
+        with app.app_context():
+            self.resume_enrichment(app.config.setdefault('ENRICHMENT_CLAIM_TIMEOUT', ENRICHMENT_CLAIM_TIMEOUT))
 
     def fetch_movie_details(self, movie_name):
-        """Fetch movie details from OMDb API."""
-
-        timeout_duration = 10
-        params = {"t": movie_name, "apikey": OMDB_API_KEY}
-        response = requests.get(OMDB_API_URL, params=params, timeout= timeout_duration)
-
-        if response.status_code == 200:
-            data = response.json()
-            if data.get("Response") == "True":  # Movie found
-                return {
-                    "movie_name": data.get("Title"),
-                    "director": data.get("Director"),
-                    "year": data.get("Year"),
-                    "rating": data.get("imdbRating"),
-                }
-        return None
+        """
+        Fetch movie details from the OMDb cache, the local OMDb mirror or OMDb, in that order.
+
+        Found titles and "Response: False" answers are both cached; failed
+        HTTP calls are not, so they are retried on the next lookup. Titles
+        the mirror has never reach the network.
+
+        Raises:
+            OMDbUnavailableError: If OMDb is down or its circuit breaker is open.
+        """
+        cached = self.omdb_cache.get(movie_name)
+        if cached is not MISSING and (cached is None or "imdb_id" in cached):
+            OMDB_LOOKUPS.inc(result='cache_hit' if cached else 'cache_not_found')
+            return cached
+
+        mirrored = self.omdb_mirror.lookup(movie_name)
+        if mirrored is not None:
+            OMDB_LOOKUPS.inc(result='mirror')
+            return mirrored
+
+        try:
+            data = self.omdb_client.lookup(movie_name)
+        except OMDbUnavailableError:
+            OMDB_LOOKUPS.inc(result='unavailable')
+            raise
+
+        return self.remember_omdb_answer(movie_name, data)
 
-    def get_all_users(self):
-        """Retrieve all users from the database."""
-        return User.query.all()
+    def remember_omdb_answer(self, movie_name, data):
+        """Cache what OMDb answered for a title and return it as movie details (None if not found)."""
+        movie_data = omdb_movie_data(data)
+        if data is not None:
+            self.omdb_cache.set(movie_name, movie_data)  # Misses are cached too
+        OMDB_LOOKUPS.inc(result='found' if movie_data else 'not_found')
+        return movie_data
 
-    def get_user(self, user_id):
-        """Retrieve a user by their ID."""
-        return User.query.get(user_id)
+    def get_all_users(self, load=()):
+        """Retrieve all users from the database, eagerly loading the relationships in the load plan."""
+        return User.query.options(*load).all()
 
-    def get_user_movies(self, user_id):
+    def get_user(self, user_id, load=()):
+        """Retrieve a user by their ID, eagerly loading the relationships in the load plan."""
+        return db.session.get(User, user_id, options=load)
+
+    def get_user_movies(self, user_id, load=MOVIE_LIST_PLAN):
         """Retrieve all movies of a specific user by their user ID."""
-        return Movie.query.filter_by(user_id=user_id).all()
+        return Movie.query.options(*load).filter_by(user_id=user_id).all()
+
+    def get_movie(self, movie_id, load=()):
+        """Retrieve a specific movie by its ID, eagerly loading the relationships in the load plan."""
+        return Movie.query.options(*load).filter_by(movie_id=movie_id).first()
 
-    def get_movie(self, movie_id):
-        """Retrieve a specific movie by its ID."""
-        return Movie.query.filter_by(movie_id=movie_id).first()
+    def get_users_page(self, after_id=None, limit=50, fields=None, load=()):
+        """
+        Retrieve one page of users ordered by ID (keyset pagination).
 
+        Args:
+            after_id (int, optional): Only return users with a larger ID (the cursor).
+            limit (int): Maximum number of users to return.
+            fields (list, optional): USER_FIELDS to select. When given, only those
+                columns are queried and plain dicts are returned instead of User objects.
+            load (tuple): Loading plan for User objects; ignored with fields.
+
+        Returns:
+            tuple: (users, next_after_id) where next_after_id is None on the last page.
+        """
+        return keyset_page(db.session, User, User.user_id, USER_FIELDS, [], after_id, limit, fields, load, joins=())
+
+    def get_user_movies_page(self, user_id, after_id=None, limit=50, fields=None, load=MOVIE_LIST_PLAN):
+        """
+        Retrieve one page of a user's movies ordered by ID (keyset pagination).
+
+        Args:
+            user_id (int): The ID of the user whose movies are fetched.
+            after_id (int, optional): Only return movies with a larger ID (the cursor).
+            limit (int): Maximum number of movies to return.
+            fields (list, optional): MOVIE_FIELDS to select. When given, only those
+                columns are queried and plain dicts are returned instead of Movie objects.
+            load (tuple): Loading plan for Movie objects; ignored with fields.
+
+        Returns:
+            tuple: (movies, next_after_id) where next_after_id is None on the last page.
+        """
+        return keyset_page(db.session, Movie, Movie.movie_id, MOVIE_FIELDS, [Movie.user_id == user_id],
+                           after_id, limit, fields, load, joins=(Movie.catalog,))
+
+    @write_operation
     def add_user(self, name):
         """Add a new user to the database."""
         new_user = User(name=name)
@@ -71,36 +361,321 @@ class SQLiteDataManager(DataManagerInterface):
         db.session.commit()
         return new_user
 
+    @staticmethod
+    def catalog_values(movie_data):
+        """
+        Convert OMDb movie details into CatalogEntry column values.
+
+        Raises:
+            ValueError: If the year or rating is not a number (OMDb uses "N/A").
+        """
+        return {
+            "imdb_id": movie_data.get("imdb_id") or None,
+            "title": movie_data["movie_name"],
+            "title_key": OMDbCache.normalize_title(movie_data["movie_name"]),
+            "director": movie_data["director"],
+            "year": int(movie_data["year"]),
+            "rating": float(movie_data["rating"]),
+        }
+
+    def find_catalog_entry(self, movie_name):
+        """Find a shared (OMDb-resolved) catalog entry whose title matches movie_name, without calling OMDb."""
+        return CatalogEntry.query.filter(
+            CatalogEntry.title_key == OMDbCache.normalize_title(movie_name),
+            CatalogEntry.imdb_id.isnot(None)
+        ).first()
+
+    def catalog_entry_for(self, movie_data):
+        """
+        Return the catalog entry for OMDb movie details, creating it if needed.
+
+        An existing entry with the same IMDb ID is reused. A new entry is
+        flushed right away; if another worker inserted the same IMDb ID first,
+        the session is rolled back and that worker's entry is returned, so call
+        this before making other changes in the session.
+
+        Raises:
+            ValueError: If the details cannot be stored (see catalog_values).
+        """
+        values = self.catalog_values(movie_data)
+        if values["imdb_id"]:
+            entry = CatalogEntry.query.filter_by(imdb_id=values["imdb_id"]).first()
+            if entry:
+                return entry
+
+        entry = CatalogEntry(**values)
+        db.session.add(entry)
+        try:
+            db.session.flush()
+        except IntegrityError:
+            db.session.rollback()
+            entry = CatalogEntry.query.filter_by(imdb_id=values["imdb_id"]).one()
+        return entry
+
     def add_movie(self, user_id, movie_name):
         """
         Add a new movie to the database.
 
-        If movie details are available from OMDb API, use those. Otherwise,
-        use the provided user inputs.
+        The title is resolved to a shared catalog entry (looking it up on OMDb
+        only if nobody added it before) and linked to the user. The catalog
+        is checked first, so a title someone already added never reaches OMDb
+        (or even the OMDb cache) again.
         """
+        entry = self.find_catalog_entry(movie_name)
+        movie_data = None
+        if not entry:
+            movie_data = self.fetch_movie_details(movie_name)
+            if not movie_data:
+                return None  # Movie not found in OMDb, do not add
 
-        movie_data = self.fetch_movie_details(movie_name)
+        new_movie = self._store_movie(user_id, entry.catalog_id if entry else None, movie_data)
+        self.recommendation_updater.submit(user_id, new_movie.catalog_id)
+        return new_movie
 
-        if not movie_data:
-            return None  # Movie not found in OMDb, do not add
-
-        new_movie = Movie(
-            movie_name=movie_data["movie_name"],
-            director=movie_data["director"],
-            year=int(movie_data["year"]),
-            rating=float(movie_data["rating"]),
-            user_id=user_id
-        )
+    @write_operation
+    def _store_movie(self, user_id, catalog_id, movie_data):
+        """Link a new movie to a catalog entry, given by its ID or created from OMDb details."""
+        entry = db.session.get(CatalogEntry, catalog_id) if catalog_id else self.catalog_entry_for(movie_data)
+        new_movie = Movie(user_id=user_id, catalog=entry)
 
         db.session.add(new_movie)
         db.session.commit()
         return new_movie
 
+    def add_movies_bulk(self, user_id, movie_names, max_workers=BATCH_LOOKUP_WORKERS):
+        """
+        Add many movies to a user's collection at once.
+
+        Titles are deduplicated (case and whitespace insensitive) and resolved
+        against the catalog in one query. Only the rest are looked up on OMDb,
+        concurrently by at most max_workers threads. New catalog entries and
+        all user movies are then written with bulk INSERTs in one transaction.
+
+        Args:
+            user_id (int): The ID of the user the movies belong to.
+            movie_names (iterable): The requested titles.
+            max_workers (int): Maximum number of concurrent OMDb lookups.
+
+        Returns:
+            tuple: (results, duplicates) where results holds one dict per
+            unique title with a "status" of "added", "not_found" or "error",
+            and duplicates is the number of repeated titles that were skipped.
+        """
+        unique_names, duplicates = dedupe_titles(movie_names)
+        known = find_known_titles(db.session, unique_names)
+
+        def lookup(name):
+            try:
+                return self.fetch_movie_details(name), None
+            except OMDbUnavailableError as e:
+                return None, f"OMDb unavailable: {str(e)}"
+
+        names = [name for key, name in unique_names.items() if key not in known]
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(names) or 1))) as executor:
+            lookups = dict(zip(names, executor.map(lookup, names)))
+
+        results = self.writer.run(store_bulk_movies, db.session, user_id, unique_names, known, lookups)
+        for result in results:
+            if result["status"] == "added":
+                self.recommendation_updater.submit(user_id, result["movie"]["catalog_id"])
+        return results, duplicates
+
+    def add_movie_async(self, user_id, movie_name):
+        """
+        Add a movie right away and look up its OMDb details in the background.
+
+        A title that is already in the catalog is linked at once. Otherwise the
+        movie points at a placeholder catalog entry holding only the requested
+        title, with an EnrichmentJob in the 'pending' state; a worker later
+        fills in the details and marks the job 'enriched' or 'failed'.
+
+        Returns:
+            Movie: The new movie. Its status is 'enriched' if no lookup was needed.
+
+        Raises:
+            EnrichmentQueueFull: If the worker queue is full. Nothing is stored in that case.
+        """
+        entry = self.find_catalog_entry(movie_name)
+        if entry:
+            new_movie = self._store_movie(user_id, entry.catalog_id, None)
+            self.recommendation_updater.submit(user_id, new_movie.catalog_id)
+            return new_movie
+
+        new_movie = self._store_pending_movie(user_id, movie_name)
+        try:
+            self.enrichment_queue.submit(new_movie.enrichment.job_id)
+        except Exception:
+            self._discard_pending_movie(new_movie.movie_id)
+            raise
+        return new_movie
+
+    @write_operation
+    def _store_pending_movie(self, user_id, movie_name):
+        """Store a movie linked to a placeholder catalog entry, with a pending EnrichmentJob."""
+        placeholder = CatalogEntry(title=movie_name, title_key=OMDbCache.normalize_title(movie_name))
+        new_movie = Movie(user_id=user_id, catalog=placeholder)
+        new_movie.enrichment = EnrichmentJob(title=movie_name)
+
+        db.session.add(new_movie)
+        db.session.commit()
+        return new_movie
+
+    @write_operation
+    def _discard_pending_movie(self, movie_id):
+        """Delete a movie stored by _store_pending_movie together with its placeholder."""
+        movie = db.session.get(Movie, movie_id)
+        placeholder = movie.catalog
+        db.session.delete(movie)
+        db.session.delete(placeholder)
+        db.session.commit()
+
+    def enrich_movie(self, job_id):
+        """
+        Run the OMDb lookup for a pending movie and store the outcome.
+
+        If the film is already in the catalog the movie is re-linked to that
+        entry and its placeholder is dropped; otherwise the placeholder
+        becomes the film's catalog entry. Either way the film then counts as
+        a like of the movie's owner for recommendations.
+
+        Args:
+            job_id (int): The enrichment job to process.
+
+        Returns:
+            EnrichmentJob or None: The updated job, or None if it no longer exists.
+        """
+        job = db.session.get(EnrichmentJob, job_id)
+        if not job or job.status != EnrichmentJob.PENDING:
+            return job
+
+        error = None
+        try:
+            movie_data = self.fetch_movie_details(job.title)
+        except OMDbUnavailableError as e:
+            movie_data, error = None, str(e)
+        job, like = self._store_enrichment(job_id, movie_data, error)
+        if like:
+            self.recommendation_updater.submit(*like)
+        return job
+
+    @write_operation
+    def _store_enrichment(self, job_id, movie_data, error):
+        """
+        Store the outcome of an enrichment lookup (see enrich_movie).
+
+        Returns:
+            tuple: (job or None, (user ID, catalog ID) of the like to record, or None).
+        """
+        job = db.session.get(EnrichmentJob, job_id)
+        if not job or job.status != EnrichmentJob.PENDING:
+            return job, None  # Another worker ran the same job first
+        job.error = error
+        like = None
+
+        try:
+            if movie_data:
+                values = self.catalog_values(movie_data)
+                movie = job.movie
+                placeholder = movie.catalog
+                existing = None
+                if values["imdb_id"]:
+                    existing = CatalogEntry.query.filter_by(imdb_id=values["imdb_id"]).first()
+                if existing and existing is not placeholder:
+                    movie.catalog = existing
+                    shared = db.session.scalar(select(exists().where(Movie.catalog_id == placeholder.catalog_id,
+                                                                     Movie.movie_id != movie.movie_id)))
+                    if not shared:
+                        db.session.delete(placeholder)
+                else:
+                    for column, value in values.items():
+                        setattr(placeholder, column, value)
+                job.status = EnrichmentJob.ENRICHED
+                job.error = None
+                db.session.flush()
+                like = (movie.user_id, movie.catalog_id)
+            else:
+                job.status = EnrichmentJob.FAILED
+                job.error = job.error or "Movie not found in OMDb"
+            db.session.commit()
+        except (ValueError, SQLAlchemyError) as e:
+            db.session.rollback()
+            job = db.session.get(EnrichmentJob, job_id)
+            like = None
+            if job and job.status == EnrichmentJob.PENDING:
+                job.status = EnrichmentJob.FAILED
+                job.error = str(e)
+                db.session.commit()
+        return job, like
+
+    def resume_enrichment(self, claim_timeout=ENRICHMENT_CLAIM_TIMEOUT):
+        """
+        Queue the enrichment jobs a previous run left pending, e.g. after a restart or crash.
+
+        Only jobs untouched for claim_timeout seconds are taken over, so jobs
+        another live worker has just queued are left to it. They are claimed
+        in one UPDATE that touches their updated_at, so two workers starting
+        at once never both resume the same job. Claimed jobs that do not fit
+        in the worker queue are marked failed, so their movies do not stay
+        pending with placeholder details forever.
+
+        Args:
+            claim_timeout (int): Seconds a pending job must be untouched to be resumed.
+
+        Returns:
+            int: Number of jobs queued again.
+        """
+        if not db.session.scalar(select(exists().where(EnrichmentJob.status == EnrichmentJob.PENDING))):
+            return 0  # Nothing to claim, so no write
+        job_ids = self._claim_abandoned_jobs(claim_timeout)
+        for resumed, job_id in enumerate(job_ids):
+            try:
+                self.enrichment_queue.submit(job_id)
+            except EnrichmentQueueFull as e:
+                self._fail_claimed_jobs(job_ids[resumed:], str(e))
+                return resumed
+        return len(job_ids)
+
+    @write_operation
+    def _claim_abandoned_jobs(self, claim_timeout):
+        """Touch every pending job untouched for claim_timeout seconds and return their IDs, oldest first."""
+        now = utcnow()
+        job_ids = db.session.execute(
+            update(EnrichmentJob)
+            .where(EnrichmentJob.status == EnrichmentJob.PENDING,
+                   EnrichmentJob.updated_at <= now - timedelta(seconds=claim_timeout))
+            .values(updated_at=now)
+            .returning(EnrichmentJob.job_id)
+            .execution_options(synchronize_session=False)
+        ).scalars().all()
+        db.session.commit()
+        return sorted(job_ids)
+
+    @write_operation
+    def _fail_claimed_jobs(self, job_ids, error):
+        """Mark the given jobs failed if they are still pending."""
+        for start in range(0, len(job_ids), LOOKUP_CHUNK_SIZE):
+            db.session.execute(
+                update(EnrichmentJob)
+                .where(EnrichmentJob.status == EnrichmentJob.PENDING,
+                       EnrichmentJob.job_id.in_(job_ids[start:start + LOOKUP_CHUNK_SIZE]))
+                .values(status=EnrichmentJob.FAILED, error=error)
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    def get_enrichment_job(self, movie_id):
+        """Retrieve the enrichment job of a movie, or None if it was added synchronously."""
+        return EnrichmentJob.query.filter_by(movie_id=movie_id).first()
 
     def update_movie(self, movie_id, new_movie_name, new_director, new_year, new_rating):
         """
         Update the details of a specific movie in the database.
 
+        The new name must be known to OMDb. If the given details match OMDb's,
+        the movie is linked to the shared catalog entry for that film;
+        otherwise it gets (or keeps) a private catalog entry with the edited
+        details, so one user's edits never change another user's movies.
+
         Args:
             movie_id (int): The ID of the movie to be updated.
             movie_name (str, optional): The new movie name.
@@ -108,7 +683,7 @@ class SQLiteDataManager(DataManagerInterface):
             year (int, optional): The new release year.
             rating (float, optional): The new IMDB rating.
         """
-        movie = Movie.query.get(movie_id)
+        movie = db.session.get(Movie, movie_id)
 
         if not movie:
             return None
@@ -118,63 +693,143 @@ class SQLiteDataManager(DataManagerInterface):
             print("❌ Movie not found in OMDb.")  # Debugging print
             return None
 
-        movie.movie_name = new_movie_name
-        movie.director =new_director
-        movie.year = new_year
-        movie.rating = new_rating
+        return self._store_movie_update(movie_id, new_movie_name, new_director, new_year, new_rating,
+                                        updated_movie_data)
 
+    @write_operation
+    def _store_movie_update(self, movie_id, new_movie_name, new_director, new_year, new_rating, updated_movie_data):
+        """Store the edited details of a movie once OMDb has been asked about the new name (see update_movie)."""
+        movie = db.session.get(Movie, movie_id)
+        if not movie:
+            return None
+
+        edited = {
+            "title": new_movie_name,
+            "title_key": OMDbCache.normalize_title(new_movie_name),
+            "director": new_director,
+            "year": new_year,
+            "rating": new_rating,
+        }
+        try:
+            resolved = self.catalog_values(updated_movie_data)
+        except (KeyError, TypeError, ValueError):
+            resolved = None
+
+        current = movie.catalog
+        previous_catalog_id = current.catalog_id
+        reviews = (Review.movie_id == movie_id,)
+        moved_out = grouped_leaderboard_deltas(db.session, reviews)
+        if resolved and all(resolved[column] == value for column, value in edited.items()):
+            movie.catalog = self.catalog_entry_for(updated_movie_data)
+        elif current.imdb_id is None and not self._is_shared(current, movie):
+            for column, value in edited.items():
+                setattr(current, column, value)
+        else:
+            movie.catalog = CatalogEntry(**edited)
+
+        self._purge_private_catalog_entries()
+        if movie.catalog_id != previous_catalog_id:  # The reviews now count for another film
+            apply_leaderboard_deltas(db.session, moved_out + grouped_leaderboard_deltas(db.session, reviews, sign=1))
         db.session.commit()
         return movie
 
+    @staticmethod
+    def _is_shared(entry, movie):
+        """Return True if movies other than the given one point at the catalog entry."""
+        return db.session.query(exists().where(
+            Movie.catalog_id == entry.catalog_id, Movie.movie_id != movie.movie_id
+        )).scalar()
 
-    def delete_movie(self, movie_id):
-        """Delete a specific movie from the database."""
-        movie = Movie.query.get(movie_id)
-        if not movie:
-            return False
+    @staticmethod
+    def _purge_private_catalog_entries():
+        """Delete private catalog entries that no movie points at any more."""
+        db.session.flush()
+        db.session.execute(delete(CatalogEntry).where(
+            CatalogEntry.imdb_id.is_(None),
+            ~exists().where(Movie.catalog_id == CatalogEntry.catalog_id)
+        ))
 
-        db.session.delete(movie)
-        db.session.commit()
-        return True
+    @write_operation
+    def delete_movie(self, movie_id):
+        """Delete a specific movie from the database, with its reviews."""
+        return self._delete_rows(movies=[movie_id])["movies"] > 0
 
+    @write_operation
     def delete_user(self, user_id):
-        """Delete a specific user from the database."""
-        user = User.query.get(user_id)
-        if not user:
-            return False  # User not found
+        """Delete a specific user from the database, with their movies and reviews and the reviews of their movies."""
+        return self._delete_rows(users=[user_id])["users"] > 0
+
+    def delete_many(self, users=(), movies=(), reviews=(), chunk_size=DELETE_BATCH_SIZE):
+        """
+        Delete many users, movies and reviews, with what depends on them.
+
+        The IDs are deleted in chunks of chunk_size IDs of one kind, each in
+        its own transaction, so other writes get the database between chunks
+        instead of waiting for the whole delete. If a chunk fails, the ones
+        before it stay deleted.
+
+        Args:
+            users (list): User IDs.
+            movies (list): Movie IDs.
+            reviews (list): Review IDs.
+            chunk_size (int): IDs deleted per transaction.
 
-        db.session.delete(user)  # This will also delete related movies due to `cascade="all, delete-orphan"`
+        Returns:
+            dict: Rows deleted per table ("users", "movies", "reviews"), cascades included.
+        """
+        deleted = dict.fromkeys(DELETABLE, 0)
+        for kind, ids in (("reviews", reviews), ("movies", movies), ("users", users)):
+            ids = list(dict.fromkeys(ids))
+            for start in range(0, len(ids), chunk_size):
+                for table, count in self._delete_chunk(kind, ids[start:start + chunk_size]).items():
+                    deleted[table] += count
+        return deleted
+
+    @write_operation
+    def _delete_chunk(self, kind, ids):
+        """Delete one chunk of delete_many()."""
+        return self._delete_rows(**{kind: ids})
+
+    def _delete_rows(self, **ids):
+        """Delete rows with delete_cascade() and the catalog entries they leave unused, and commit."""
+        deleted = delete_cascade(db.session, **ids)
+        self._purge_private_catalog_entries()
         db.session.commit()
-        return True  # Successfully deleted the user
+        return deleted
 
-    def get_movie_reviews(self, movie_id):
+    def get_movie_reviews(self, movie_id, load=()):
         """
                 Retrieves all reviews for a specific movie.
 
                 Args:
                     movie_id (int): The ID of the movie for which reviews are being fetched.
+                    load (tuple): Loading plan for relationships of the reviews.
 
                 Returns:
                     list: A list of all review objects associated with the given movie ID.
         """
-        return Review.query.filter_by(movie_id=movie_id).all()
+        return Review.query.options(*load).filter_by(movie_id=movie_id).all()
 
-    def get_user_reviews(self, user_id):
+    def get_user_reviews(self, user_id, load=()):
         """
                 Retrieves all reviews submitted by a specific user.
 
                 Args:
                     user_id (int): The ID of the user for which reviews are being fetched.
+                    load (tuple): Loading plan for relationships of the reviews.
 
                 Returns:
                     list: A list of all review objects submitted by the given user ID.
         """
-        return Review.query.filter_by(user_id=user_id).all()
+        return Review.query.options(*load).filter_by(user_id=user_id).all()
 
     def add_review(self, user_id, movie_id, review_text, rating):
         """
             Adds a new review for a specific movie by a user.
 
+            A rating of RECOMMEND_LIKE_RATING or more counts as a like of the
+            film for recommendations.
+
             Args:
                  user_id (int): The ID of the user submitting the review.
                  movie_id (int): The ID of the movie being reviewed.
@@ -185,37 +840,250 @@ class SQLiteDataManager(DataManagerInterface):
                 Review or None: Returns the created Review object if successful,
                                     or None if the movie or user does not exist.
         """
-        movie = Movie.query.get(movie_id)
-        user = User.query.get(user_id)
+        new_review, catalog_id = self._store_review(user_id, movie_id, review_text, rating)
+        if new_review is not None and new_review.rating >= RECOMMEND_LIKE_RATING:
+            self.recommendation_updater.submit(user_id, catalog_id)
+        return new_review
+
+    @write_operation
+    def _store_review(self, user_id, movie_id, review_text, rating):
+        """Store a new review (see add_review); returns it with its film's catalog ID, or (None, None)."""
+        movie = db.session.get(Movie, movie_id)
+        user = db.session.get(User, user_id)
 
         if not movie or not user:
-            return None
+            return None, None
+        catalog_id = movie.catalog_id
 
         new_review = Review(
             user_id=user_id,
             movie_id = movie_id,
             review_text = review_text,
-            rating = float(rating)
-
+            rating = float(rating),
+            created_at = utcnow()
         )
 
         db.session.add(new_review)
+        apply_deltas(db.session, review_deltas(new_review))
+        apply_leaderboard_deltas(db.session, review_delta(new_review, catalog_id))
         db.session.commit()
-        return new_review
+        return new_review, catalog_id
 
     def view_review(self, movie_id):
         """Fetch all reviews for a given movie ID."""
         return Review.query.filter_by(movie_id=movie_id).all()
 
+    @write_operation
     def delete_review(self, review_id):
         """Delete a review by its ID."""
-        review = Review.query.get(review_id)
-        if Review:
+        review = db.session.get(Review, review_id)
+        if review:
             try:
+                apply_deltas(db.session, review_deltas(review, sign=-1))
+                apply_leaderboard_deltas(db.session, review_delta(review, review.movie.catalog_id, sign=-1))
                 db.session.delete(review)
                 db.session.commit()
                 return True
             except SQLAlchemyError as e:
                 db.session.rollback()
                 print(f"Error deleting review: {str(e)}")
-        return False
\ No newline at end of file
+        return False
+
+    def get_review_stats(self, scope, subject_id):
+        """
+        Read the review aggregates of one movie or user.
+
+        Args:
+            scope (str): ReviewStats.MOVIE or ReviewStats.USER.
+            subject_id (int): The movie or user ID.
+
+        Returns:
+            ReviewStats or None: None if nothing has been reviewed yet.
+        """
+        return db.session.get(ReviewStats, (scope, subject_id))
+
+    def get_review_stats_for(self, scope, subject_ids):
+        """
+        Read the review aggregates of several movies or users in one query.
+
+        Returns:
+            dict: ReviewStats keyed by subject ID; subjects without reviews are left out.
+        """
+        if not subject_ids:
+            return {}
+        rows = db.session.scalars(
+            select(ReviewStats).where(ReviewStats.scope == scope, ReviewStats.subject_id.in_(subject_ids))
+        )
+        return {stats.subject_id: stats for stats in rows}
+
+    @write_operation
+    def rebuild_review_stats(self):
+        """
+        Recompute every review aggregate from the reviews table.
+
+        Returns:
+            int: Number of aggregate rows written.
+        """
+        written = rebuild_review_stats(db.session)
+        db.session.commit()
+        return written
+
+    def get_top_rated(self, limit=10):
+        """Read the best rated films (see leaderboards.top_rated)."""
+        return top_rated(db.session, limit)
+
+    def get_trending(self, period='week', limit=10):
+        """
+        Read the films reviewed most within a trending window (see leaderboards.trending).
+
+        The window is moved forward first if a new hour started since it last was.
+
+        Args:
+            period (str): One of leaderboards.TRENDING_PERIODS.
+            limit (int): Number of films.
+        """
+        if trending_is_stale(db.session, period):
+            self.advance_trending()
+        return trending(db.session, period, limit)
+
+    @write_operation
+    def advance_trending(self):
+        """Move the trending windows forward to the current hour; returns the number of windows moved."""
+        moved = advance_trending(db.session)
+        db.session.commit()
+        return moved
+
+    @write_operation
+    def rebuild_leaderboards(self):
+        """
+        Recompute the film ratings and trending counts from the reviews.
+
+        Returns:
+            int: Number of leaderboard rows written.
+        """
+        written = rebuild_leaderboards(db.session)
+        db.session.commit()
+        return written
+
+    def get_recommendations(self, user_id, limit=10):
+        """
+        Recommend films for a user from the films they like (see recommendations.recommend).
+
+        Returns:
+            list: Dicts with the catalog ID, title, director, year, IMDb rating and score, best first.
+        """
+        return recommend(db.session, user_id, limit)
+
+    @write_operation
+    def _store_like(self, user_id, catalog_id):
+        """Count one like in the neighbour lists (run by the recommendation updater)."""
+        added = add_like(db.session, user_id, catalog_id)
+        db.session.commit()
+        return added
+
+    @write_operation
+    def rebuild_recommendations(self):
+        """
+        Recompute every like and neighbour list from the movies and reviews.
+
+        Returns:
+            int: Number of neighbour rows written.
+        """
+        written = rebuild_recommendations(db.session)
+        db.session.commit()
+        return written
+
+    def search(self, query, kind='movies', user_id=None, limit=20, offset=0):
+        """
+        Full-text search over movie titles and directors, or over review texts.
+
+        All words of the query must match, the last one also as a prefix.
+        Results are ranked by bm25 and carry HTML-safe snippets with
+        the matches wrapped in <mark> tags.
+
+        Args:
+            query (str): Words to look for.
+            kind (str): 'movies' or 'reviews'.
+            user_id (int or None): Only search this user's movies, or the reviews they wrote.
+            limit (int): Page size.
+            offset (int): Number of results to skip.
+
+        Returns:
+            tuple: (results, next_offset), next_offset being None on the last page.
+        """
+        expression = match_expression(query)
+        if expression is None:
+            return [], None
+
+        search_kind = search_movies if kind == 'movies' else search_reviews
+        results = search_kind(db.session, expression, user_id=user_id, limit=limit + 1, offset=offset)
+        if len(results) > limit:
+            return results[:limit], offset + limit
+        return results, None
+
+    @write_operation
+    def rebuild_search_index(self):
+        """Re-index every catalog entry and review, then merge the index segments."""
+        rebuild_search_index(db.session)
+        optimize_search_index(db.session)
+        db.session.commit()
+
+    def export_rows(self, entity, user_id=None):
+        """
+        Stream every row of one entity for a bulk export.
+
+        Args:
+            entity (str): "users", "movies" or "reviews".
+            user_id (int or None): Only export this user, their movies or the reviews they wrote.
+
+        Returns:
+            iterator: Plain dicts, read in batches from a server-side cursor.
+        """
+        return iter_export_rows(db.session, entity, user_id)
+
+    def get_data_version(self, scope, subject_id):
+        """
+        Read the version counter of the users list or of one user's movies.
+
+        The counter changes with every write that changes what it covers, so
+        it can validate cached copies without running the query behind them.
+
+        Args:
+            scope (str): versions.USERS (subject_id 0) or versions.USER.
+            subject_id (int): The user ID for versions.USER.
+
+        Returns:
+            tuple: (version, time of the last change or None).
+        """
+        return read_version(db.session, scope, subject_id)
+
+    def collect_metrics(self):
+        """
+        Report the state of the caches, the connection pool and the OMDb integration.
+
+        Returns:
+            list: Metrics for the /metrics endpoint, read at scrape time.
+        """
+        breaker = self.omdb_client.breaker.snapshot()
+        breaker_open = Gauge('omdb_breaker_open', 'Whether the OMDb circuit breaker is refusing calls.')
+        breaker_open.set(1 if breaker["state"] == "open" else 0)
+        pending = Gauge('enrichment_jobs_pending', 'Background OMDb lookups queued or running.')
+        pending.set(self.enrichment_queue.pending)
+        caches = {"omdb": self.omdb_cache.stats(), "omdb_mirror": self.omdb_mirror.stats(),
+                  "result": self.result_cache.stats()}
+        with self.app.app_context():
+            pool = db.engine.pool
+        likes = Gauge('recommendation_updates_pending', 'Likes waiting to be counted in the recommendations.')
+        likes.set(self.recommendation_updater.pending)
+        dropped = Counter('recommendation_updates_dropped_total', 'Likes dropped because the update queue was full.')
+        dropped.inc(self.recommendation_updater.dropped)
+        metrics = [*cache_metrics(caches), *pool_metrics(pool), breaker_open, pending, likes, dropped]
+
+        writer = self.writer.stats()
+        if writer is not None:
+            queued = Gauge('sqlite_writer_jobs_pending', 'Writes waiting for the single writer thread.')
+            queued.set(writer["pending"])
+            batch = Gauge('sqlite_writer_mean_batch', 'Mean number of writes committed per transaction.')
+            batch.set(writer["mean_batch"])
+            metrics += [queued, batch]
+        return metrics
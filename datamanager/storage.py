@@ -0,0 +1,152 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool, StaticPool
+
+from datamanager.metrics import TimedQueuePool
+
+
+# Storage profile configuration
+load_dotenv()
+SQLITE_PROFILE = os.getenv('SQLITE_PROFILE', 'wal')
+
+# Each profile lists the PRAGMAs applied to every new connection and the pool settings.
+STORAGE_PROFILES = {
+    # SQLite's own defaults (rollback journal), only with a busy timeout so writers wait instead of failing.
+    'legacy': {
+        'journal_mode': None,
+        'synchronous': None,
+        'cache_size': None,
+        'mmap_size': None,
+        'temp_store': None,
+        'busy_timeout': 5000,
+        'pool_size': 5,
+        'max_overflow': 10,
+    },
+    # WAL lets readers run while a writer commits; synchronous=NORMAL is safe in WAL mode.
+    'wal': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size': -20000,  # negative values are KiB, so 20 MB of page cache
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 5000,
+        'pool_size': 10,
+        'max_overflow': 20,
+    },
+    # Like 'wal', but every commit is fsynced before it returns.
+    'durable': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size': -20000,
+        'mmap_size': 256 * 1024 * 1024,
+        'temp_store': 'MEMORY',
+        'busy_timeout': 10000,
+        'pool_size': 10,
+        'max_overflow': 20,
+    },
+}
+
+PRAGMAS = ('journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store', 'busy_timeout')
+INTEGER_SETTINGS = ('cache_size', 'mmap_size', 'busy_timeout', 'pool_size', 'max_overflow')
+
+
+def resolve_storage_profile(app):
+    """
+    Work out the storage profile for an app.
+
+    The profile is picked by app.config['SQLITE_PROFILE'] (default: the
+    SQLITE_PROFILE environment variable, else 'wal'). Any setting can then be
+    overridden by an environment variable named SQLITE_<SETTING>, for example
+    SQLITE_BUSY_TIMEOUT=10000, or by app.config['SQLITE_<SETTING>'].
+
+    Returns:
+        dict: The profile name under "name" plus every setting.
+
+    Raises:
+        ValueError: If the profile name is unknown.
+    """
+    name = app.config.setdefault('SQLITE_PROFILE', SQLITE_PROFILE)
+    if name not in STORAGE_PROFILES:
+        raise ValueError(f"Unknown SQLITE_PROFILE '{name}'. Choose one of: {', '.join(STORAGE_PROFILES)}")
+
+    profile = dict(STORAGE_PROFILES[name], name=name)
+    for setting in list(STORAGE_PROFILES[name]):
+        key = f'SQLITE_{setting.upper()}'
+        value = app.config.get(key, os.getenv(key))
+        if value is None or value == '':
+            continue
+        profile[setting] = int(value) if setting in INTEGER_SETTINGS else value
+    return profile
+
+
+def is_memory_database(uri):
+    """Return True for in-memory SQLite URIs, which need a single shared connection."""
+    database = make_url(uri).database
+    return not database or database == ':memory:' or 'mode=memory' in uri
+
+
+def engine_options(profile, uri):
+    """
+    Build SQLALCHEMY_ENGINE_OPTIONS for a profile.
+
+    File databases get a QueuePool sized by the profile (timed, so checkout
+    waits show up in the metrics); in-memory databases
+    get a StaticPool so every session sees the same database.
+    """
+    connect_args = {'check_same_thread': False, 'timeout': profile['busy_timeout'] / 1000}
+    if is_memory_database(uri):
+        return {'poolclass': StaticPool, 'connect_args': connect_args}
+    return {
+        'poolclass': TimedQueuePool,
+        'pool_size': profile['pool_size'],
+        'max_overflow': profile['max_overflow'],
+        'pool_pre_ping': False,
+        'connect_args': connect_args,
+    }
+
+
+def configure_storage(app):
+    """
+    Prepare app.config for the storage profile before db.init_app().
+
+    Creates the directory of a file database and fills in
+    SQLALCHEMY_ENGINE_OPTIONS (unless the app already set them).
+
+    Returns:
+        dict: The resolved profile.
+    """
+    profile = resolve_storage_profile(app)
+    uri = app.config['SQLALCHEMY_DATABASE_URI']
+
+    database = make_url(uri).database
+    if not is_memory_database(uri):
+        Path(database).parent.mkdir(parents=True, exist_ok=True)
+
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', engine_options(profile, uri))
+    return profile
+
+
+def install_pragmas(engine, profile):
+    """Apply the profile's PRAGMAs to every connection the engine opens."""
+
+    def apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in PRAGMAS:
+            value = profile[pragma]
+            if value is not None:
+                cursor.execute(f"PRAGMA {pragma} = {value}")
+        cursor.close()
+
+    event.listen(engine, 'connect', apply_pragmas)
+
+
+def describe_storage(profile, engine):
+    """Return a one-line summary of the storage profile and pool, for the startup log."""
+    settings = ", ".join(f"{pragma}={profile[pragma]}" for pragma in PRAGMAS if profile[pragma] is not None)
+    pool = engine.pool
+    size = f" size={profile['pool_size']} max_overflow={profile['max_overflow']}" if isinstance(pool, QueuePool) else ""
+    return f"SQLite storage profile '{profile['name']}': {settings}; pool={type(pool).__name__}{size}"
@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import text
+
+
+# Version counters behind the HTTP validators (ETag / Last-Modified). Each
+# counter is bumped by a trigger in the same transaction as the write that
+# changes what it covers:
+#   ('users', 0)       the list of users
+#   ('user', user_id)  a user and their movie list, including the movies'
+#                      catalog details, enrichment status and reviews
+USERS = 'users'
+USER = 'user'
+
+VERSIONS_TABLE = (
+    "CREATE TABLE IF NOT EXISTS data_versions ("
+    " scope VARCHAR(20) NOT NULL,"
+    " subject_id INTEGER NOT NULL,"
+    " version INTEGER NOT NULL,"
+    " updated_at REAL NOT NULL,"  # Unix time
+    " PRIMARY KEY (scope, subject_id))"
+)
+
+
+def _bump(scope, subject, where=None):
+    """SQL bumping the counter of scope for subject, or for every movies row matching where."""
+    source = f" FROM movies WHERE {where} AND" if where else " WHERE"
+    # The WHERE clause also keeps SQLite from reading ON CONFLICT as part of the SELECT
+    return (
+        f" INSERT INTO data_versions (scope, subject_id, version, updated_at)"
+        f" SELECT '{scope}', {subject}, 1, (julianday('now') - 2440587.5) * 86400.0"
+        f"{source} {subject} IS NOT NULL"
+        f" ON CONFLICT (scope, subject_id) DO UPDATE SET version = version + 1, updated_at = excluded.updated_at;"
+    )
+
+
+def _bump_owner(movie_id):
+    return _bump(USER, "movies.user_id", f"movies.movie_id = {movie_id}")
+
+
+VERSION_TRIGGERS = {
+    "users_version_insert": ("AFTER INSERT ON users", _bump(USERS, 0) + _bump(USER, "new.user_id")),
+    "users_version_update": ("AFTER UPDATE ON users", _bump(USERS, 0) + _bump(USER, "new.user_id")),
+    "users_version_delete": ("AFTER DELETE ON users", _bump(USERS, 0) + _bump(USER, "old.user_id")),
+    "movies_version_insert": ("AFTER INSERT ON movies", _bump(USER, "new.user_id")),
+    "movies_version_update": ("AFTER UPDATE ON movies", _bump(USER, "old.user_id") + _bump(USER, "new.user_id")),
+    "movies_version_delete": ("AFTER DELETE ON movies", _bump(USER, "old.user_id")),
+    "catalog_version_update": ("AFTER UPDATE ON catalog", _bump(
+        USER, "movies.user_id", "movies.catalog_id = new.catalog_id")),
+    "enrichment_version_insert": ("AFTER INSERT ON enrichment_jobs", _bump_owner("new.movie_id")),
+    "enrichment_version_update": ("AFTER UPDATE ON enrichment_jobs", _bump_owner("new.movie_id")),
+    "reviews_version_insert": ("AFTER INSERT ON reviews", _bump_owner("new.movie_id")),
+    "reviews_version_delete": ("AFTER DELETE ON reviews", _bump_owner("old.movie_id")),
+}
+
+
+def create_version_triggers(connection):
+    """Create the data_versions table and the triggers that keep it current."""
+    connection.execute(text(VERSIONS_TABLE))
+    for name, (event, body) in VERSION_TRIGGERS.items():
+        connection.execute(text(f"CREATE TRIGGER IF NOT EXISTS {name} {event} BEGIN{body} END"))
+
+
+def read_version(connection, scope, subject_id):
+    """
+    Read one version counter.
+
+    Returns:
+        tuple: (version, updated_at as an aware UTC datetime); (0, None) if nothing was written yet.
+    """
+    row = connection.execute(
+        text("SELECT version, updated_at FROM data_versions WHERE scope = :scope AND subject_id = :subject_id"),
+        {"scope": scope, "subject_id": subject_id}
+    ).first()
+    if row is None:
+        return 0, None
+    return row.version, datetime.fromtimestamp(row.updated_at, tz=timezone.utc)
@@ -0,0 +1,243 @@
+import functools
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+from datamanager.storage import engine_options, install_pragmas, is_memory_database
+
+
+# Single-writer configuration
+load_dotenv()
+SQLITE_WRITER = os.getenv('SQLITE_WRITER', '').lower() in ('1', 'true', 'yes')
+WRITER_COMMIT_WINDOW = float(os.getenv('WRITER_COMMIT_WINDOW', 0.002))
+WRITER_MAX_BATCH = int(os.getenv('WRITER_MAX_BATCH', 128))
+
+
+def write_operation(method):
+    """
+    Run a SQLiteDataManager method on the manager's writer.
+
+    Without a writer thread (the default) the method simply runs in the
+    calling thread; with one, the caller waits for the batch holding the
+    call to be committed.
+    """
+    @functools.wraps(method)
+    def run_on_writer(self, *args, **kwargs):
+        return self.writer.run(method, self, *args, **kwargs)
+    return run_on_writer
+
+
+class InlineWriter:
+    """Runs every write in the calling thread, committing it on its own."""
+
+    def run(self, function, *args, **kwargs):
+        return function(*args, **kwargs)
+
+    def stats(self):
+        return None
+
+    def shutdown(self):
+        pass
+
+
+class SQLiteWriter:
+    """
+    One thread that performs every write of the app, with group commit.
+
+    SQLite lets one connection write at a time, so writers in many worker
+    threads mostly wait for each other's locks (and time out with "database
+    is locked" under bursts). Instead, callers hand their write to this
+    thread and wait. It takes the jobs queued within commit_window seconds
+    (at most max_batch), runs each in its own SAVEPOINT so a failing job
+    only undoes itself, and commits them with a single transaction, which
+    costs one fsync for the whole batch.
+
+    Reads go to a separate pool of read-only connections (mode=ro,
+    query_only), so they never queue behind the writer; WAL mode lets them
+    see every committed batch without waiting for locks.
+    """
+
+    def __init__(self, app, session, profile, commit_window=WRITER_COMMIT_WINDOW, max_batch=WRITER_MAX_BATCH):
+        """
+        Args:
+            app (Flask): The app whose context the writer runs in.
+            session (scoped_session): The app's db.session, which must be a WriterSession.
+            profile (dict): The storage profile (see storage.resolve_storage_profile).
+            commit_window (float): Seconds to wait for more jobs before committing a batch.
+            max_batch (int): Maximum number of jobs per transaction.
+
+        Raises:
+            ValueError: For in-memory databases, which cannot be opened a second time.
+        """
+        uri = app.config['SQLALCHEMY_DATABASE_URI']
+        if is_memory_database(uri):
+            raise ValueError("The single writer needs a database file")
+
+        self.app = app
+        self.session = session
+        self.commit_window = commit_window
+        self.max_batch = max_batch
+        self.engine = self._write_engine(uri, profile)
+        self.read_engine = self._read_engine(uri, profile)
+        self._queue = queue.SimpleQueue()
+        self._local = threading.local()
+        self._counters = {"jobs": 0, "batches": 0, "failed_jobs": 0, "failed_batches": 0}
+        self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+
+    @staticmethod
+    def _write_engine(uri, profile):
+        engine = create_engine(uri, poolclass=QueuePool, pool_size=1, max_overflow=0,
+                               connect_args={'check_same_thread': False, 'timeout': profile['busy_timeout'] / 1000})
+        install_pragmas(engine, profile)
+
+        # pysqlite's own transaction handling breaks SAVEPOINTs; begin explicitly,
+        # taking the write lock up front since every transaction here writes.
+        @event.listens_for(engine, 'connect')
+        def disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, 'begin')
+        def begin_immediate(connection):
+            connection.exec_driver_sql('BEGIN IMMEDIATE')
+
+        return engine
+
+    @staticmethod
+    def _read_engine(uri, profile):
+        database = make_url(uri).database
+        read_uri = f"sqlite:///file:{database}?mode=ro&uri=true"
+        engine = create_engine(read_uri, **engine_options(profile, read_uri))
+        install_pragmas(engine, dict(profile, journal_mode=None))  # Read-only connections cannot change it
+
+        @event.listens_for(engine, 'connect')
+        def query_only(dbapi_connection, connection_record):
+            dbapi_connection.execute('PRAGMA query_only = 1')
+
+        return engine
+
+    def start(self):
+        """Open the write connection and start the writer thread."""
+        with self.engine.connect():  # Keeps the WAL files in place for the read-only connections
+            pass
+        self.app.extensions['sqlite_writer'] = self
+        self._thread.start()
+        return self
+
+    def in_writer_thread(self):
+        return threading.get_ident() == self._thread.ident
+
+    def in_job(self):
+        return getattr(self._local, 'savepoint', None) is not None
+
+    def rollback_job(self):
+        """Undo the writes of the running job only."""
+        savepoint = self._local.savepoint
+        if savepoint.is_active:
+            savepoint.rollback()
+
+    def run(self, function, *args, **kwargs):
+        """
+        Run a write on the writer thread and wait until it is committed.
+
+        ORM objects in the result are merged into the caller's session, whose
+        read transaction is ended first so it sees the new rows.
+
+        Returns:
+            The function's result.
+
+        Raises:
+            Exception: Whatever the function raised, or the error of the batch commit.
+        """
+        if self.in_writer_thread():
+            return function(*args, **kwargs)
+        future = Future()
+        self._queue.put((function, args, kwargs, future))
+        result = future.result()
+        self.session.commit()
+        return self._attach(result)
+
+    def _attach(self, result):
+        if isinstance(result, (list, tuple)):
+            return type(result)(self._attach(item) for item in result)
+        if hasattr(result, '__mapper__'):
+            return self.session.merge(result, load=False)
+        return result
+
+    def _next_batch(self):
+        job = self._queue.get()
+        if job is None:
+            return None
+        batch = [job]
+        deadline = time.monotonic() + self.commit_window
+        while len(batch) < self.max_batch:
+            try:
+                job = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+            except queue.Empty:
+                break
+            if job is None:
+                self._queue.put(None)  # Stop after this batch
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            session = self.session()
+            session.expire_on_commit = False  # Results are handed to other threads after the commit
+            while (batch := self._next_batch()) is not None:
+                self._commit_batch(session, batch)
+            self.session.remove()
+
+    def _commit_batch(self, session, batch):
+        outcomes = []
+        for function, args, kwargs, future in batch:
+            self._local.savepoint = session.begin_nested()
+            try:
+                result = function(*args, **kwargs)
+                if self._local.savepoint.is_active:
+                    self._local.savepoint.commit()
+                outcomes.append((future, result, None))
+            except Exception as e:
+                self.rollback_job()
+                outcomes.append((future, None, e))
+            finally:
+                self._local.savepoint = None
+
+        try:
+            session.commit()
+        except Exception as e:
+            session.rollback()
+            outcomes = [(future, None, e) for future, _, _ in outcomes]
+            self._counters["failed_batches"] += 1
+        session.expunge_all()
+
+        self._counters["batches"] += 1
+        self._counters["jobs"] += len(outcomes)
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                self._counters["failed_jobs"] += 1
+                future.set_exception(error)
+
+    def stats(self):
+        """Return the job and batch counters and the mean batch size."""
+        stats = dict(self._counters, pending=self._queue.qsize())
+        stats["mean_batch"] = round(stats["jobs"] / stats["batches"], 2) if stats["batches"] else 0.0
+        return stats
+
+    def shutdown(self):
+        """Commit the queued writes and stop the writer thread."""
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        self.app.extensions.pop('sqlite_writer', None)
+        self.engine.dispose()
+        self.read_engine.dispose()
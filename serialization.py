@@ -0,0 +1,126 @@
+import datetime
+import decimal
+import gzip
+import json
+import os
+import uuid
+
+from dotenv import load_dotenv
+from werkzeug.http import http_date
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder produces the same JSON, only slower
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # Optional: without it the API only offers JSON
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:  # Optional: without it responses are only gzipped
+    brotli = None
+
+
+# API serialization configuration
+load_dotenv()
+API_COMPRESS_MIN_BYTES = int(os.getenv('API_COMPRESS_MIN_BYTES', 1024))
+API_GZIP_LEVEL = int(os.getenv('API_GZIP_LEVEL', 6))
+API_BROTLI_QUALITY = int(os.getenv('API_BROTLI_QUALITY', 5))
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPES = ('application/msgpack', 'application/x-msgpack')
+
+
+def _default(value):
+    """Encode the types Flask's JSON provider knows beyond the JSON ones, the way it does."""
+    if isinstance(value, datetime.date):
+        return http_date(value)
+    if isinstance(value, (decimal.Decimal, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+
+def offered_mimetypes():
+    """The response body formats this process can produce, preferred first."""
+    return (JSON_MIMETYPE, *MSGPACK_MIMETYPES) if msgpack is not None else (JSON_MIMETYPE,)
+
+
+def negotiate(accept_mimetypes):
+    """
+    Pick the body format of an API response from the request's Accept header.
+
+    JSON wins unless the client prefers MessagePack and msgpack is installed;
+    a client accepting nothing we offer still gets JSON.
+
+    Args:
+        accept_mimetypes (MIMEAccept): The parsed Accept header (request.accept_mimetypes).
+
+    Returns:
+        str: The mimetype of the response.
+    """
+    return accept_mimetypes.best_match(offered_mimetypes(), default=JSON_MIMETYPE)
+
+
+def serialize(body, mimetype=JSON_MIMETYPE):
+    """
+    Encode a response body.
+
+    JSON comes out like Flask's jsonify (sorted keys, compact separators,
+    trailing newline), through orjson when it is installed; orjson writes
+    non-ASCII characters as UTF-8 rather than as \\u escapes.
+
+    Args:
+        body: Dicts, lists, strings, numbers, booleans, None and dates.
+        mimetype (str): JSON_MIMETYPE or one of MSGPACK_MIMETYPES.
+
+    Returns:
+        bytes: The encoded body.
+    """
+    if mimetype in MSGPACK_MIMETYPES:
+        return msgpack.packb(body, default=_default, use_bin_type=True)
+    if orjson is not None:
+        return orjson.dumps(body, default=_default, option=orjson.OPT_SORT_KEYS | orjson.OPT_APPEND_NEWLINE
+                            | orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME)
+    return (json.dumps(body, default=_default, sort_keys=True, separators=(',', ':')) + '\n').encode()
+
+
+def offered_encodings():
+    """The Content-Encodings this process can compress responses with, preferred first."""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def compress(data, encoding):
+    """Compress a response body with 'br' or 'gzip'."""
+    if encoding == 'br':
+        return brotli.compress(data, quality=API_BROTLI_QUALITY)
+    return gzip.compress(data, API_GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, accept_encodings, min_bytes=API_COMPRESS_MIN_BYTES):
+    """
+    Compress a buffered response in place if the client accepts it and the body is worth it.
+
+    Streamed responses (such as exports, which compress themselves) and
+    bodies smaller than min_bytes are left alone.
+
+    Args:
+        response (Response): The response to compress.
+        accept_encodings (Accept): The parsed Accept-Encoding header (request.accept_encodings).
+        min_bytes (int): Smallest body that gets compressed.
+
+    Returns:
+        Response: The same response.
+    """
+    if response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers:
+        return response
+    response.vary.add('Accept-Encoding')
+    data = response.get_data()
+    encoding = accept_encodings.best_match(offered_encodings())
+    if encoding is None or len(data) < min_bytes:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
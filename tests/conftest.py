@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask
+
+import api as api_module
+from api import api, init_data_manager
+from datamanager.sqllite_data_magager import SQLiteDataManager
+
+
+# Every API request made in a test must stay within this many SQL statements.
+SQL_STATEMENT_BUDGET = 8
+
+MOVIES = {
+    "inception": {"movie_name": "Inception", "director": "Christopher Nolan", "year": "2010", "rating": "8.8",
+                  "imdb_id": "tt1375666"},
+    "interstellar": {"movie_name": "Interstellar", "director": "Christopher Nolan", "year": "2014", "rating": "8.7",
+                     "imdb_id": "tt0816692"},
+}
+
+# Films only the films fixture's lookup knows about
+FILMS = {
+    **MOVIES,
+    "tenet": {"movie_name": "Tenet", "director": "Christopher Nolan", "year": "2020", "rating": "7.3",
+              "imdb_id": "tt6723592"},
+    "memento": {"movie_name": "Memento", "director": "Christopher Nolan", "year": "2000", "rating": "8.4",
+                "imdb_id": "tt0209144"},
+}
+
+
+@pytest.fixture
+def data_manager(tmp_path):
+    """Set up a data manager and API on a throw-away database with a stubbed OMDb lookup."""
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'movies.db'}"
+    app.config["OMDB_CACHE_PATH"] = None
+    app.config["OMDB_MIRROR_PATH"] = None
+    app.config["SQL_STATEMENT_BUDGET"] = SQL_STATEMENT_BUDGET
+    manager = SQLiteDataManager(app)
+    manager.omdb_lookups = []
+
+    def fetch_movie_details(title):
+        manager.omdb_lookups.append(title)
+        return MOVIES.get(title.strip().lower())
+
+    manager.fetch_movie_details = fetch_movie_details
+
+    previous = api_module.data_manager
+    init_data_manager(manager)
+    app.register_blueprint(api, url_prefix="/api")
+    yield manager
+    manager.enrichment_queue.shutdown()
+    manager.recommendation_updater.shutdown()
+    init_data_manager(previous)
+
+
+@pytest.fixture
+def films(data_manager):
+    """Let the stubbed OMDb lookup find two more films."""
+    data_manager.fetch_movie_details = lambda title: FILMS.get(title.strip().lower())
+    return data_manager
+
+
+@pytest.fixture
+def api_client(data_manager):
+    """Set up a test client for the throw-away app."""
+    return data_manager.app.test_client()
+
+
+@pytest.fixture
+def user_id(data_manager):
+    """Create a user and return their ID."""
+    with data_manager.app.app_context():
+        return data_manager.add_user("Test User").user_id
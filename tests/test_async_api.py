@@ -0,0 +1,163 @@
+import asyncio
+import threading
+import time
+
+import pytest
+from sqlalchemy import select
+
+pytest.importorskip("aiosqlite")
+httpx = pytest.importorskip("httpx")
+
+from async_api import AsyncAPI
+from benchmarks.concurrency import run_async_adds
+from benchmarks.fake_omdb import FakeOMDb
+from datamanager import omdb_client
+from datamanager.data_models import db, UserLike
+from datamanager.async_data_manager import AsyncSQLiteDataManager
+from datamanager.omdb_client import AsyncOMDbClient
+
+
+@pytest.fixture
+def fake_omdb():
+    with FakeOMDb(latency=0.2) as fake:
+        yield fake
+
+
+def run_async_api(data_manager, fake_omdb, scenario):
+    """Run scenario(client) against the async API of the test app, on a fresh event loop."""
+    async def main():
+        manager = AsyncSQLiteDataManager(data_manager,
+                                         omdb_client=AsyncOMDbClient(fake_omdb.url, "key", backoff=0))
+        transport = httpx.ASGITransport(app=AsyncAPI(data_manager.app, manager))
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://localhost") as client:
+                return await scenario(client)
+        finally:
+            await manager.close()
+
+    return asyncio.run(main())
+
+
+def test_async_routes_match_the_flask_blueprint(data_manager, api_client, user_id, fake_omdb):
+    """Test that the async routes answer with the status, body and validators of the sync ones."""
+    with data_manager.app.app_context():
+        data_manager.add_user("Second User")
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+
+    paths = ["/api/users?limit=1", "/api/users?limit=1&fields=name", f"/api/users/{user_id}/movies",
+             f"/api/movies/{movie_id}/status", f"/api/movies/{movie_id}/stats", f"/api/users/{user_id}/stats",
+             "/api/users/999/movies", "/api/movies/999/status", "/api/users?limit=0", "/api/search?q=inception"]
+
+    async def scenario(client):
+        return [await client.get(path) for path in paths]
+
+    for path, response in zip(paths, run_async_api(data_manager, fake_omdb, scenario)):
+        expected = api_client.get(path)
+        assert response.status_code == expected.status_code, path
+        assert response.content == expected.data, path
+        assert response.headers.get("ETag") == expected.headers.get("ETag"), path
+        assert response.headers.get("Link") == expected.headers.get("Link"), path
+
+
+def test_async_routes_answer_conditional_requests(data_manager, user_id, fake_omdb):
+    """Test that a current ETag gets a 304 until the user's movies change."""
+    async def scenario(client):
+        first = await client.get(f"/api/users/{user_id}/movies")
+        etag = first.headers["ETag"]
+        unchanged = await client.get(f"/api/users/{user_id}/movies", headers={"If-None-Match": etag})
+        await client.post(f"/api/users/{user_id}/movies", json={"title": "Arrival"})
+        changed = await client.get(f"/api/users/{user_id}/movies", headers={"If-None-Match": etag})
+        return unchanged, changed
+
+    unchanged, changed = run_async_api(data_manager, fake_omdb, scenario)
+    assert unchanged.status_code == 304
+    assert changed.status_code == 200
+    assert [movie["title"] for movie in changed.json()["movies"]] == ["Arrival"]
+
+
+def test_slow_omdb_lookups_overlap(data_manager, user_id, fake_omdb):
+    """Test that concurrent adds wait on OMDb together instead of one after another."""
+    titles = [f"Slow Film {number}" for number in range(10)]
+
+    async def scenario(client):
+        started = time.perf_counter()
+        responses = await asyncio.gather(*(client.post(f"/api/users/{user_id}/movies", json={"title": title})
+                                           for title in titles))
+        return responses, time.perf_counter() - started
+
+    responses, elapsed = run_async_api(data_manager, fake_omdb, scenario)
+    assert [response.status_code for response in responses] == [201] * len(titles)
+    assert sorted(response.json()["movie"]["title"] for response in responses) == sorted(titles)
+    assert elapsed < len(titles) * fake_omdb.latency / 2
+    assert fake_omdb.requests == len(titles)
+
+
+def test_async_batch_add(data_manager, user_id, fake_omdb):
+    """Test that a JSON batch is added with concurrent lookups and summarized like the sync route."""
+    async def scenario(client):
+        return await client.post(f"/api/users/{user_id}/movies/batch",
+                                 json={"titles": ["Dune", "dune", "Unknown Film", "Arrival"]})
+
+    response = run_async_api(data_manager, fake_omdb, scenario)
+    assert response.status_code == 201
+    body = response.json()
+    assert body["summary"] == {"requested": 4, "duplicates": 1, "added": 2, "not_found": 1, "error": 0}
+    assert [result["status"] for result in body["results"]] == ["added", "not_found", "added"]
+    assert body["results"][0]["movie"]["title"] == "Dune"
+
+    data_manager.recommendation_updater.wait()
+    with data_manager.app.app_context():
+        liked = db.session.execute(select(UserLike.catalog_id).where(UserLike.user_id == user_id)).scalars().all()
+    assert len(liked) == 2
+
+
+def test_async_compare_benchmark(data_manager, user_id, fake_omdb):
+    """Test that the benchmark's async path adds every title with the lookups in flight together."""
+    manager = AsyncSQLiteDataManager(data_manager, omdb_client=AsyncOMDbClient(fake_omdb.url, "key", backoff=0))
+    result = run_async_adds(AsyncAPI(data_manager.app, manager), [user_id], clients=8, total_requests=8,
+                            report=None)
+    assert result["statuses"] == {"201": 8}
+    assert result["seconds"] < 8 * fake_omdb.latency / 2
+
+
+def test_async_client_runs_in_threads_without_httpx(monkeypatch, fake_omdb):
+    """Test that the async OMDb client falls back to the blocking client when httpx is missing."""
+    monkeypatch.setattr(omdb_client, "httpx", None)
+
+    async def lookup():
+        client = AsyncOMDbClient(fake_omdb.url, "key")
+        try:
+            return await asyncio.gather(client.lookup("Inception"), client.lookup("Unknown Film"))
+        finally:
+            await client.close()
+
+    found, not_found = asyncio.run(lookup())
+    assert found == FakeOMDb.details("Inception")
+    assert not_found["Response"] == "False"
+
+
+def test_omdb_cache_and_mirror_are_not_read_on_the_event_loop(data_manager, fake_omdb):
+    """Test that the blocking OMDb cache, mirror and answer bookkeeping run in worker threads."""
+    threads = []
+
+    def recording(method):
+        def record(*args):
+            threads.append(threading.current_thread())
+            return method(*args)
+        return record
+
+    data_manager.omdb_cache.get = recording(data_manager.omdb_cache.get)
+    data_manager.omdb_mirror.lookup = recording(data_manager.omdb_mirror.lookup)
+    data_manager.remember_omdb_answer = recording(data_manager.remember_omdb_answer)
+
+    async def lookup():
+        manager = AsyncSQLiteDataManager(data_manager,
+                                         omdb_client=AsyncOMDbClient(fake_omdb.url, "key", backoff=0))
+        try:
+            return threading.current_thread(), await manager.fetch_movie_details("Inception")
+        finally:
+            await manager.close()
+
+    loop_thread, details = asyncio.run(lookup())
+    assert details["movie_name"] == "Inception"
+    assert len(threads) == 3 and loop_thread not in threads
@@ -0,0 +1,36 @@
+import json
+
+
+def test_batch_add_dedupes_and_reports_per_title(api_client, user_id):
+    """Test that a batch adds found titles once and reports the rest."""
+    response = api_client.post(f"/api/users/{user_id}/movies/batch",
+                               json={"titles": ["Inception", " inception", "Interstellar", "Nope"]})
+    assert response.status_code == 201
+
+    summary = response.json["summary"]
+    assert summary == {"requested": 4, "duplicates": 1, "added": 2, "not_found": 1, "error": 0}
+    statuses = {result["title"]: result["status"] for result in response.json["results"]}
+    assert statuses == {"Inception": "added", "Interstellar": "added", "Nope": "not_found"}
+
+    movies = api_client.get(f"/api/users/{user_id}/movies").json["movies"]
+    assert sorted(movie["title"] for movie in movies) == ["Inception", "Interstellar"]
+
+
+def test_batch_add_streams_ndjson(api_client, user_id):
+    """Test that an NDJSON batch gets one NDJSON result line per title plus a summary."""
+    body = "\n".join([json.dumps("Inception"), json.dumps({"title": "Nope"})]) + "\n"
+    response = api_client.post(f"/api/users/{user_id}/movies/batch", data=body,
+                               content_type="application/x-ndjson")
+    assert response.status_code == 201
+    assert response.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert lines[0]["movie"]["title"] == "Inception"
+    assert lines[1] == {"title": "Nope", "status": "not_found"}
+    assert lines[2]["summary"]["added"] == 1
+
+
+def test_batch_add_rejects_bad_payload(api_client, user_id):
+    """Test that a batch without a list of titles is rejected."""
+    response = api_client.post(f"/api/users/{user_id}/movies/batch", json={"titles": "Inception"})
+    assert response.status_code == 400
@@ -0,0 +1,82 @@
+import pytest
+
+from benchmarks.fake_omdb import FakeOMDb
+from benchmarks.load import run_load
+from benchmarks.micro import run_micro_benchmarks
+from benchmarks.stats import percentile, summarize
+from benchmarks.synthetic import dataset_shape, generate_records, read_shape, write_dataset
+from datamanager.bulk_import import BulkImporter
+from datamanager.data_models import db
+from datamanager.omdb_client import OMDbClient, OMDbUnavailableError
+
+
+SHAPE = dataset_shape(users=5, movies_per_user=4, reviews_per_movie=2, titles=10)
+
+
+@pytest.fixture
+def dataset(data_manager, tmp_path):
+    """Load a small synthetic dataset into the throw-away database."""
+    path = tmp_path / "dataset.ndjson.gz"
+    write_dataset(path, SHAPE, seed=1)
+    with data_manager.app.app_context():
+        BulkImporter(db.engine, report=None).run(str(path), restart=True)
+    return SHAPE
+
+
+def test_percentiles_and_summary():
+    """Test nearest-rank percentiles and the millisecond summary of a benchmark."""
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 0.5) == 0.05
+    assert percentile(values, 0.99) == 0.099
+
+    result = summarize("op", values, wall_seconds=2.0, errors=1)
+    assert result["operations"] == 100
+    assert result["ops_per_second"] == 50.0
+    assert result["p50_ms"] == 50.0
+    assert result["max_ms"] == 100.0
+    assert result["errors"] == 1
+
+
+def test_synthetic_data_is_reproducible_and_importable(data_manager, dataset):
+    """Test that a seed always gives the same records and that they load completely."""
+    assert list(generate_records(SHAPE, seed=1)) == list(generate_records(SHAPE, seed=1))
+    assert list(generate_records(SHAPE, seed=1)) != list(generate_records(SHAPE, seed=2))
+
+    with data_manager.app.app_context():
+        shape = read_shape(db.engine)
+    assert (shape["users"], shape["movies"], shape["reviews"]) == (5, 20, 40)
+
+
+def test_fake_omdb_serves_stable_details_and_configured_errors():
+    """Test the fake OMDb answers, its not-found titles and its error rate."""
+    with FakeOMDb() as fake:
+        client = OMDbClient(fake.url, "key", max_retries=0)
+        assert client.lookup("Inception") == FakeOMDb.details("Inception")
+        assert client.lookup("Unknown Film")["Response"] == "False"
+
+    with FakeOMDb(error_rate=1.0) as fake:
+        client = OMDbClient(fake.url, "key", max_retries=1, backoff=0)
+        with pytest.raises(OMDbUnavailableError):
+            client.lookup("Inception")
+        assert fake.requests == 2
+
+
+def test_micro_benchmarks_cover_the_data_manager(data_manager, dataset):
+    """Test that every micro-benchmark runs without errors on a small dataset."""
+    results = run_micro_benchmarks(data_manager, dataset, iterations=3, report=None)
+
+    names = {result["name"] for result in results}
+    assert {"get_user_movies", "add_movie (OMDb)", "search movies", "delete_user"} <= names
+    assert all(result["errors"] == 0 for result in results)
+    assert all(result["p99_ms"] is not None for result in results)
+
+
+def test_load_scenario_reports_throughput_and_routes(data_manager, dataset):
+    """Test a concurrent load run against the API."""
+    data_manager.app.config["SQL_STATEMENT_BUDGET"] = None  # Not under test here
+    result = run_load(data_manager.app, dataset, "api_reads", concurrency=2, total_requests=20, report=None)
+
+    assert result["operations"] == 20
+    assert result["errors"] == 0
+    assert result["statuses"] == {"200": 20}
+    assert sum(route["operations"] for route in result["routes"]) == 20
@@ -0,0 +1,85 @@
+import json
+
+import pytest
+from sqlalchemy import text
+
+from datamanager.bulk_import import BulkImporter
+from datamanager.data_models import db, User, Movie, Review, CatalogEntry, ReviewStats
+
+
+def write_ndjson(path, records):
+    path.write_text("".join(json.dumps(record) + "\n" for record in records))
+    return path
+
+
+def library(users=3, movies_per_user=4):
+    """Build NDJSON records in the export format: users, their movies and a review of each movie."""
+    records = [{"type": "user", "user_id": user_id, "name": f"User {user_id}"} for user_id in range(1, users + 1)]
+    movie_id = 0
+    for user_id in range(1, users + 1):
+        for n in range(movies_per_user):
+            movie_id += 1
+            records.append({"type": "movie", "movie_id": movie_id, "user_id": user_id, "title": f"Film {n}",
+                            "director": "Someone", "year": 2000 + n, "rating": 7.5, "imdb_id": f"tt{n:07d}"})
+            records.append({"type": "review", "review_id": movie_id, "user_id": user_id, "movie_id": movie_id,
+                            "rating": 8, "review_text": f"Review of film {n}"})
+    return records
+
+
+def test_import_loads_export_format_and_shares_catalog_entries(data_manager, tmp_path):
+    """Test an NDJSON load: rows are inserted, films are shared by IMDb ID and aggregates are rebuilt."""
+    path = write_ndjson(tmp_path / "export.ndjson", library())
+
+    with data_manager.app.app_context():
+        summary = BulkImporter(db.engine, batch_size=5, report=None).run(str(path))
+
+        assert summary["read"] == 27 and summary["inserted"] == 27 and summary["invalid"] == 0
+        assert (User.query.count(), Movie.query.count(), Review.query.count()) == (3, 12, 12)
+        assert CatalogEntry.query.count() == 4
+        assert data_manager.get_review_stats(ReviewStats.USER, 2).review_count == 4
+        assert data_manager.search("film", kind="reviews", limit=50)[0]
+
+
+def test_invalid_rows_are_reported_and_skipped(data_manager, tmp_path):
+    """Test CSV validation: bad rows are counted and the rest are loaded."""
+    path = tmp_path / "users.csv"
+    path.write_text("user_id,name\n1,Ada\nx,Bob\n2,\n3,Cy\n")
+    messages = []
+
+    with data_manager.app.app_context():
+        summary = BulkImporter(db.engine, report=messages.append).run(str(path))
+        assert [user.name for user in User.query.order_by(User.user_id)] == ["Ada", "Cy"]
+
+    assert summary["invalid"] == 2
+    assert any("Record 2: user_id must be a whole number" in message for message in messages)
+
+
+def test_interrupted_import_resumes_after_last_committed_batch(data_manager, tmp_path, monkeypatch):
+    """Test that a crashed load picks up at its checkpoint and the same file is not loaded twice."""
+    path = write_ndjson(tmp_path / "export.ndjson", library())
+
+    with data_manager.app.app_context():
+        importer = BulkImporter(db.engine, batch_size=10, defer_indexes=True, report=None)
+        write_batch = importer._write_batch
+        calls = []
+
+        def crash_on_second_batch(*args, **kwargs):
+            calls.append(args)
+            if len(calls) == 2:
+                raise RuntimeError("power cut")
+            return write_batch(*args, **kwargs)
+
+        monkeypatch.setattr(importer, "_write_batch", crash_on_second_batch)
+        with pytest.raises(RuntimeError):
+            importer.run(str(path))
+        assert User.query.count() + Movie.query.count() + Review.query.count() == 10
+
+        summary = BulkImporter(db.engine, batch_size=10, report=None).run(str(path))
+        assert summary["read"] == 17
+        assert (User.query.count(), Movie.query.count(), Review.query.count()) == (3, 12, 12)
+
+        indexes = {row[0] for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        assert {"ix_movies_user_id_movie_id", "ix_reviews_movie_id_review_id"} <= indexes
+        assert data_manager.search("film 3", kind="reviews")[0]
+
+        assert BulkImporter(db.engine, report=None).run(str(path))["read"] == 0
@@ -0,0 +1,111 @@
+from sqlalchemy import func, select
+
+from datamanager.data_models import (db, CatalogEntry, EnrichmentJob, LikeCount, Movie, MovieNeighbor, Review, User,
+                                     UserLike)
+from datamanager.query_budget import count_statements
+from tests.test_review_stats import snapshot
+
+
+def add_heavy_user(manager, name, movies):
+    """Add a user with `movies` copies of Inception, each reviewed by them and by a guest."""
+    user_id = manager.add_user(name).user_id
+    guest_id = manager.add_user(f"Guest of {name}").user_id
+    for number in range(movies):
+        movie_id = manager.add_movie(user_id, "Inception").movie_id
+        manager.add_review(user_id, movie_id, None, 1 + number % 10)
+        manager.add_review(guest_id, movie_id, None, 5)
+    manager.add_review(user_id, manager.add_movie(guest_id, "Interstellar").movie_id, None, 9)
+    return user_id, guest_id
+
+
+def counts():
+    return tuple(db.session.scalar(select(func.count()).select_from(model))
+                 for model in (User, Movie, Review, EnrichmentJob, CatalogEntry))
+
+
+def test_deleting_a_user_takes_the_same_statements_however_much_they_have(data_manager):
+    """Test that a user's movies and reviews go with set-based deletes, not one statement per row."""
+    with data_manager.app.app_context():
+        statements = []
+        for name, movies in (("Light", 2), ("Heavy", 40)):
+            user_id, guest_id = add_heavy_user(data_manager, name, movies)
+            with count_statements() as counter:
+                assert data_manager.delete_user(user_id)
+            statements.append(counter.count)
+
+            assert db.session.scalar(select(func.count()).select_from(Review)
+                                     .where(Review.user_id == guest_id)) == 0  # Their movies' reviews went too
+            assert [movie.movie_name for movie in data_manager.get_user_movies(guest_id)] == ["Interstellar"]
+            assert not data_manager.delete_user(user_id)
+        assert statements[0] == statements[1]
+
+        aggregates = snapshot(data_manager)
+        data_manager.rebuild_review_stats()
+        assert snapshot(data_manager) == aggregates
+
+
+def test_delete_many_deletes_in_chunks(data_manager):
+    """Test that a bulk delete removes every kind of row and cascades, whatever the chunk size."""
+    with data_manager.app.app_context():
+        users = [add_heavy_user(data_manager, f"User {number}", 3) for number in range(3)]
+        before = counts()
+        review_ids = [review.review_id for review in data_manager.get_user_reviews(users[2][1])]
+        movie_id = data_manager.get_user_movies(users[1][0])[0].movie_id
+
+        deleted = data_manager.delete_many(users=[users[0][0], users[0][0], 9999], movies=[movie_id],
+                                           reviews=review_ids, chunk_size=2)
+        assert deleted == {"users": 1, "movies": 4, "reviews": 3 + 2 + 7}
+        assert counts() == (before[0] - 1, before[1] - 4, before[2] - 12, 0, 2)
+
+        aggregates = snapshot(data_manager)
+        data_manager.rebuild_review_stats()
+        assert snapshot(data_manager) == aggregates
+
+
+def likes():
+    """Read the likes, like counts and neighbour pairs with their shared counts."""
+    return (db.session.execute(select(UserLike.user_id, UserLike.catalog_id).order_by(UserLike.user_id,
+                                                                                       UserLike.catalog_id)).all(),
+            db.session.execute(select(LikeCount.catalog_id, LikeCount.like_count)
+                               .order_by(LikeCount.catalog_id)).all(),
+            db.session.execute(select(MovieNeighbor.catalog_id, MovieNeighbor.neighbor_id, MovieNeighbor.shared)
+                               .order_by(MovieNeighbor.catalog_id, MovieNeighbor.neighbor_id)).all())
+
+
+def test_deletes_take_lost_likes_out_of_recommendations(films):
+    """Test that likes only deleted rows backed leave the like counts and neighbour lists as a rebuild would."""
+    with films.app.app_context():
+        users = [films.add_user(name).user_id for name in ("First", "Second", "Third", "Fourth")]
+        movie_ids = {}
+        for user, titles in zip(users, (("Inception", "Interstellar", "Tenet"), ("Inception", "Tenet", "Memento"),
+                                        ("Interstellar", "Memento"), ("Inception", "Interstellar"))):
+            for title in titles:
+                movie_ids[user, title] = films.add_movie(user, title).movie_id
+        films.add_review(users[2], movie_ids[users[0], "Tenet"], "Great", 9)  # A like without the movie
+        films.add_review(users[3], movie_ids[users[1], "Memento"], "Great", 9)
+        films.recommendation_updater.wait()
+        films.rebuild_recommendations()
+
+        films.delete_user(users[0])  # Takes the third user's Tenet like along with their own likes
+        films.delete_movie(movie_ids[users[3], "Inception"])
+        films.delete_movie(movie_ids[users[3], "Interstellar"])  # Still likes Memento through a review
+        after = likes()
+        assert (users[2], films.get_movie(movie_ids[users[1], "Tenet"]).catalog_id) not in after[0]
+        films.rebuild_recommendations()
+        assert likes() == after
+
+
+def test_bulk_delete_endpoint(api_client, data_manager, user_id):
+    """Test the bulk delete endpoint and its validation."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        review_id = data_manager.add_review(user_id, movie_id, None, 8).review_id
+
+    response = api_client.post("/api/bulk-delete", json={"reviews": [review_id], "users": [user_id]})
+    assert response.status_code == 200
+    assert response.get_json() == {"requested": {"users": 1, "movies": 0, "reviews": 1},
+                                   "deleted": {"users": 1, "movies": 1, "reviews": 1}}
+    assert api_client.get(f"/api/users/{user_id}/movies").status_code == 404
+
+    for body in ({}, {"users": "1"}, {"movies": [1.5]}, {"films": [1]}, [1, 2]):
+        assert api_client.post("/api/bulk-delete", json=body).status_code == 400
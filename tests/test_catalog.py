@@ -0,0 +1,34 @@
+from datamanager.data_models import CatalogEntry
+
+
+def test_popular_title_is_stored_and_looked_up_once(data_manager, api_client):
+    """Test that users adding the same film share one catalog entry and one OMDb lookup."""
+    with data_manager.app.app_context():
+        user_ids = [data_manager.add_user(f"User {i}").user_id for i in range(3)]
+
+    for user_id in user_ids:
+        response = api_client.post(f"/api/users/{user_id}/movies", json={"title": "inception"})
+        assert response.status_code == 201
+        assert response.json["movie"]["title"] == "Inception"
+
+    assert data_manager.omdb_lookups == ["inception"]
+    with data_manager.app.app_context():
+        assert CatalogEntry.query.count() == 1
+
+
+def test_edited_details_stay_private(data_manager, user_id):
+    """Test that editing a shared movie gives that user a private copy and leaves other users alone."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        mine = data_manager.add_movie(user_id, "Inception").movie_id
+        theirs = data_manager.add_movie(other_id, "Inception").movie_id
+
+        data_manager.update_movie(mine, "Inception", "Someone Else", 2010, 9.9)
+
+        assert data_manager.get_movie(mine).director == "Someone Else"
+        assert data_manager.get_movie(theirs).director == "Christopher Nolan"
+        assert data_manager.get_movie(theirs).catalog.imdb_id == "tt1375666"
+
+        data_manager.update_movie(mine, "Inception", "Christopher Nolan", 2010, 8.8)
+        assert data_manager.get_movie(mine).catalog_id == data_manager.get_movie(theirs).catalog_id
+        assert CatalogEntry.query.count() == 1
@@ -0,0 +1,54 @@
+from datamanager.query_budget import count_statements
+
+
+def test_unchanged_user_list_is_answered_with_304_from_one_query(data_manager, api_client, user_id):
+    """Test that a matching If-None-Match gets a 304 that only reads the version counter."""
+    response = api_client.get("/api/users")
+    etag = response.headers["ETag"]
+    assert etag.startswith('W/"users-0-')
+    assert "must-revalidate" in response.headers["Cache-Control"]
+    assert "public" in response.headers["Cache-Control"]
+
+    with count_statements() as counter:
+        response = api_client.get("/api/users", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert counter.count == 1
+
+    with data_manager.app.app_context():
+        data_manager.add_user("New User")
+    response = api_client.get("/api/users", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_movie_list_validator_follows_every_write_that_changes_it(data_manager, api_client, user_id):
+    """Test that movies, catalog edits and reviews change the user's ETag, and other users' writes do not."""
+    def etag():
+        return api_client.get(f"/api/users/{user_id}/movies").headers["ETag"]
+
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+
+        seen = [etag()]
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        seen.append(etag())
+        data_manager.update_movie(movie_id, "Inception", "Someone Else", 2010, 9.0)
+        seen.append(etag())
+        data_manager.add_review(user_id, movie_id, "Good", 8)
+        seen.append(etag())
+        assert len(set(seen)) == 4
+
+        data_manager.add_movie(other_id, "Interstellar")
+        assert etag() == seen[-1]
+
+
+def test_if_modified_since(data_manager, api_client, user_id):
+    """Test revalidation with the Last-Modified date."""
+    with data_manager.app.app_context():
+        data_manager.add_movie(user_id, "Inception")
+
+    response = api_client.get(f"/api/users/{user_id}/movies")
+    last_modified = response.headers["Last-Modified"]
+    response = api_client.get(f"/api/users/{user_id}/movies", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
@@ -0,0 +1,90 @@
+from flask import Flask
+
+from datamanager.data_models import EnrichmentJob
+from datamanager.enrichment import EnrichmentQueue, EnrichmentQueueFull
+from datamanager.sqllite_data_magager import SQLiteDataManager
+from tests.conftest import MOVIES
+
+
+def test_async_add_returns_202_and_enriches(data_manager, api_client, user_id):
+    """Test that an async add answers 202 at once and the worker fills in the details."""
+    response = api_client.post(f"/api/users/{user_id}/movies?async=1", json={"title": "Inception"})
+    assert response.status_code == 202
+    assert response.json["status"] == EnrichmentJob.PENDING
+    status_url = response.json["status_url"]
+
+    data_manager.enrichment_queue.shutdown(wait=True)
+
+    status = api_client.get(status_url).json
+    assert status["status"] == EnrichmentJob.ENRICHED
+    assert status["movie"]["director"] == "Christopher Nolan"
+    assert status["movie"]["year"] == 2010
+
+
+def test_unknown_title_marks_job_failed(data_manager, user_id):
+    """Test that a title OMDb does not know leaves the movie in the failed state."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie_async(user_id, "No Such Movie").movie_id
+
+    data_manager.enrichment_queue.shutdown(wait=True)
+
+    with data_manager.app.app_context():
+        job = data_manager.get_enrichment_job(movie_id)
+        assert job.status == EnrichmentJob.FAILED
+        assert job.error == "Movie not found in OMDb"
+
+
+def test_pending_jobs_are_resumed_on_startup(data_manager, user_id, monkeypatch):
+    """Test that a manager started over a database with pending jobs queues them again."""
+    with data_manager.app.app_context():
+        movie_id = data_manager._store_pending_movie(user_id, "Inception").movie_id  # As if the app stopped here
+    data_manager.enrichment_queue.shutdown(wait=True)
+
+    monkeypatch.setattr(SQLiteDataManager, "fetch_movie_details",
+                        lambda self, title: MOVIES.get(title.strip().lower()))
+    app = Flask(__name__)
+    app.config.update(data_manager.app.config)
+    app.config["ENRICHMENT_CLAIM_TIMEOUT"] = 0  # Take over the job at once instead of after a quiet period
+    restarted = SQLiteDataManager(app)
+    restarted.enrichment_queue.shutdown(wait=True)
+    restarted.recommendation_updater.shutdown()
+
+    with app.app_context():
+        job = restarted.get_enrichment_job(movie_id)
+        assert job.status == EnrichmentJob.ENRICHED
+        assert restarted.get_movie(movie_id).director == "Christopher Nolan"
+
+
+def test_jobs_that_do_not_fit_are_failed_on_startup(data_manager, user_id, monkeypatch):
+    """Test that pending jobs a full queue refuses at startup are marked failed instead of staying pending."""
+    with data_manager.app.app_context():
+        movie_id = data_manager._store_pending_movie(user_id, "Inception").movie_id
+
+    def refuse(self, job_id):
+        raise EnrichmentQueueFull("100 movies are already waiting for OMDb")
+
+    monkeypatch.setattr(EnrichmentQueue, "submit", refuse)
+    with data_manager.app.app_context():
+        assert data_manager.resume_enrichment(claim_timeout=0) == 0
+        job = data_manager.get_enrichment_job(movie_id)
+        assert job.status == EnrichmentJob.FAILED
+        assert job.error == "100 movies are already waiting for OMDb"
+
+
+def test_a_job_is_claimed_and_stored_once(data_manager, user_id):
+    """Test that workers do not both resume a job, and that running it twice keeps the shared catalog entry."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        shared_id = data_manager.add_movie(other_id, "Inception").movie_id
+        job_id = data_manager._store_pending_movie(user_id, "Inception").enrichment.job_id
+
+        assert data_manager._claim_abandoned_jobs(claim_timeout=60) == []  # Just queued by a live worker
+        assert data_manager._claim_abandoned_jobs(claim_timeout=0) == [job_id]
+        assert data_manager._claim_abandoned_jobs(claim_timeout=60) == []  # Claimed already
+
+        for _ in range(2):
+            job, _ = data_manager._store_enrichment(job_id, MOVIES["inception"], None)
+            assert job.status == EnrichmentJob.ENRICHED
+        movies = data_manager.get_user_movies(user_id) + data_manager.get_user_movies(other_id)
+        assert [movie.director for movie in movies] == ["Christopher Nolan"] * 2
+        assert movies[0].catalog_id == data_manager.get_movie(shared_id).catalog_id
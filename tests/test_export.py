@@ -0,0 +1,73 @@
+import csv
+import gzip
+import io
+import json
+
+from datamanager.data_models import db
+from datamanager.export import iter_export_rows
+
+
+def add_library(data_manager, user_id):
+    """Give the test user two movies and a review, and another user one movie."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        data_manager.add_movie(user_id, "Interstellar")
+        data_manager.add_movie(other_id, "Inception")
+        data_manager.add_review(user_id, movie_id, 'Dreams, "within" dreams', 9)
+    return other_id
+
+
+def test_ndjson_export_streams_every_entity(data_manager, api_client, user_id):
+    """Test that the default export holds every user, movie and review as typed NDJSON lines."""
+    add_library(data_manager, user_id)
+
+    response = api_client.get("/api/export")
+    assert response.status_code == 200
+    assert response.is_streamed
+    assert response.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.data.decode().splitlines()]
+    assert [line["type"] for line in lines] == ["user", "user", "movie", "movie", "movie", "review"]
+    assert lines[2]["title"] == "Inception" and lines[2]["imdb_id"] == "tt1375666"
+    assert lines[5]["review_text"] == 'Dreams, "within" dreams'
+
+
+def test_csv_export_of_one_user_is_gzipped_on_request(data_manager, api_client, user_id):
+    """Test a per-user CSV export with on-the-fly gzip."""
+    add_library(data_manager, user_id)
+
+    response = api_client.get(f"/api/export?format=csv&entity=movies&user_id={user_id}",
+                              headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert response.headers["Content-Encoding"] == "gzip"
+
+    rows = list(csv.DictReader(io.StringIO(gzip.decompress(response.data).decode())))
+    assert [row["title"] for row in rows] == ["Inception", "Interstellar"]
+    assert {row["user_id"] for row in rows} == {str(user_id)}
+    assert response.headers["Vary"] == "Accept-Encoding"
+
+    refused = api_client.get(f"/api/export?format=csv&entity=movies&user_id={user_id}",
+                             headers={"Accept-Encoding": "gzip;q=0, identity"})
+    assert "Content-Encoding" not in refused.headers
+    assert refused.headers["Vary"] == "Accept-Encoding"
+    assert refused.data.decode().splitlines()[0].startswith("movie_id")
+
+
+def test_export_reads_rows_without_loading_objects(data_manager, user_id):
+    """Test that exported rows come back as plain dicts and never fill the session."""
+    add_library(data_manager, user_id)
+
+    with data_manager.app.app_context():
+        rows = iter_export_rows(db.session, "movies", batch_size=2)
+        assert next(rows)["movie_id"] == 1
+        assert len(list(rows)) == 2
+        assert len(db.session.identity_map) == 0
+
+
+def test_export_rejects_bad_parameters(api_client):
+    """Test validation of the export parameters."""
+    assert api_client.get("/api/export?format=xml").status_code == 400
+    assert api_client.get("/api/export?entity=ratings").status_code == 400
+    assert api_client.get("/api/export?format=csv").status_code == 400
+    assert api_client.get("/api/export?user_id=999").status_code == 404
@@ -0,0 +1,111 @@
+import pytest
+from sqlalchemy import event, select
+
+from datamanager import leaderboards
+from datamanager.data_models import db, FilmRating, ReviewBucket, TrendingCount
+
+
+def snapshot():
+    """Read every leaderboard row that counts something."""
+    return (
+        db.session.execute(select(FilmRating.catalog_id, FilmRating.review_count, FilmRating.rating_sum,
+                                  FilmRating.average).order_by(FilmRating.catalog_id)).all(),
+        db.session.execute(select(ReviewBucket.bucket, ReviewBucket.catalog_id, ReviewBucket.review_count)
+                           .where(ReviewBucket.review_count > 0).order_by(ReviewBucket.catalog_id)).all(),
+        db.session.execute(select(TrendingCount.period, TrendingCount.catalog_id, TrendingCount.review_count)
+                           .where(TrendingCount.review_count > 0)
+                           .order_by(TrendingCount.period, TrendingCount.catalog_id)).all(),
+    )
+
+
+def add_reviews(manager):
+    """Three users with Inception, two with Interstellar and one with Tenet, each reviewing their copies."""
+    movie_ids = {}
+    for name, ratings in (("First", {"Inception": 9, "Interstellar": 6, "Tenet": 10}),
+                          ("Second", {"Inception": 7, "Interstellar": 8}),
+                          ("Third", {"Inception": 8})):
+        user_id = manager.add_user(name).user_id
+        for title, rating in ratings.items():
+            movie_id = manager.add_movie(user_id, title).movie_id
+            movie_ids.setdefault(title, []).append(movie_id)
+            manager.add_review(user_id, movie_id, None, rating)
+            manager.add_review(manager.add_user(f"Guest of {name}").user_id, movie_id, None, rating)
+    return movie_ids
+
+
+def titles(response):
+    return [(movie["title"], movie["review_count"]) for movie in response.get_json()["movies"]]
+
+
+def test_writes_keep_leaderboards_equal_to_a_rebuild(films, api_client):
+    """Test that reviews, deletes and renames update the leaderboards the way a full rebuild computes them."""
+    with films.app.app_context():
+        movie_ids = add_reviews(films)
+        before = snapshot()
+        films.rebuild_leaderboards()
+        assert snapshot() == before
+
+        films.delete_review(films.get_movie_reviews(movie_ids["Inception"][0])[0].review_id)
+        films.delete_movie(movie_ids["Interstellar"][1])
+        films.update_movie(movie_ids["Tenet"][0], "Memento", "Christopher Nolan", 2000, 8.4)
+        films.delete_user(films.get_all_users()[-1].user_id)
+        after = snapshot()
+        films.rebuild_leaderboards()
+        assert snapshot() == after
+
+
+def test_top_rated_counts_every_copy_of_a_film(films, api_client):
+    """Test that ratings of every user's copy add up, and that films need LEADERBOARD_MIN_REVIEWS reviews."""
+    with films.app.app_context():
+        add_reviews(films)
+
+    top = api_client.get("/api/movies/top").get_json()["movies"]
+    assert [(movie["title"], movie["review_count"], movie["average_rating"]) for movie in top] == \
+        [("Inception", 6, 8.0), ("Interstellar", 4, 7.0)]  # Tenet has two reviews only
+    assert titles(api_client.get("/api/movies/top?limit=1")) == [("Inception", 6)]
+    assert api_client.get("/api/movies/top?limit=0").status_code == 400
+
+
+def test_trending_windows_move_forward(films, api_client, monkeypatch):
+    """Test that reviews drop out of the day's trending after a day and out of the week's after a week."""
+    with films.app.app_context():
+        add_reviews(films)
+    now = leaderboards.current_bucket()
+
+    expected = [("Inception", 6), ("Interstellar", 4), ("Tenet", 2)]
+    assert titles(api_client.get("/api/movies/trending?period=day")) == expected
+    assert titles(api_client.get("/api/movies/trending")) == expected
+
+    monkeypatch.setattr(leaderboards, "current_bucket", lambda: now + 24)
+    assert titles(api_client.get("/api/movies/trending?period=day")) == []
+    assert titles(api_client.get("/api/movies/trending?period=week")) == expected
+
+    monkeypatch.setattr(leaderboards, "current_bucket", lambda: now + 7 * 24)
+    assert titles(api_client.get("/api/movies/trending?period=week")) == []
+    with films.app.app_context():
+        assert db.session.execute(select(ReviewBucket)).all() == []
+    assert api_client.get("/api/movies/trending?period=month").status_code == 400
+
+
+@pytest.mark.parametrize("query, index", [
+    (lambda: leaderboards.top_rated(db.session, 10), "ix_film_ratings_average"),
+    (lambda: leaderboards.trending(db.session, "week", 10), "ix_trending_counts_rank"),
+])
+def test_leaderboards_read_their_index(data_manager, query, index):
+    """Test that both leaderboards are read in index order instead of sorting the table."""
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    with data_manager.app.app_context():
+        event.listen(db.engine, "before_cursor_execute", record)
+        try:
+            query()
+        finally:
+            event.remove(db.engine, "before_cursor_execute", record)
+        statement, parameters = statements[-1]
+        plan = db.session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters).all()
+    details = " ".join(row[-1] for row in plan)
+    assert index in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,86 @@
+import pytest
+
+from api import movie_to_dict
+from datamanager.memory_data_manager import InMemoryDataManager
+from datamanager.query_budget import count_statements
+
+
+@pytest.fixture
+def memory_manager(data_manager):
+    """Wrap the test data manager in an in-memory one."""
+    return InMemoryDataManager(data_manager)
+
+
+def reviews_of(reviews):
+    return sorted((review.review_id, review.user_id, review.movie_id, review.rating) for review in reviews)
+
+
+def test_repeated_reads_run_no_sql(memory_manager, user_id):
+    """Test that reads are answered from memory once loaded, with the same data SQLite has."""
+    with memory_manager.app.app_context():
+        movie_id = memory_manager.add_movie(user_id, "Inception").movie_id
+        memory_manager.add_review(user_id, movie_id, "Great", 9)
+        memory_manager.manager.add_movie(user_id, "Interstellar")  # Behind the cache's back, before it is loaded
+
+        reads = [lambda: memory_manager.get_user(user_id).name,
+                 lambda: [movie_to_dict(movie) for movie in memory_manager.get_user_movies(user_id)],
+                 lambda: movie_to_dict(memory_manager.get_movie(movie_id)),
+                 lambda: reviews_of(memory_manager.get_movie_reviews(movie_id)),
+                 lambda: reviews_of(memory_manager.get_user_reviews(user_id))]
+        first = [read() for read in reads]
+        hits = memory_manager.stats()["hits"]
+        with count_statements() as counter:
+            second = [read() for read in reads]
+
+        assert counter.count == 0
+        assert first == second
+        assert [movie["title"] for movie in second[1]] == ["Inception", "Interstellar"]
+        assert second[3] == second[4] == reviews_of(memory_manager.manager.get_movie_reviews(movie_id))
+        assert memory_manager.stats()["hits"] - hits == len(reads)
+
+
+def test_writes_go_through_and_update_memory(memory_manager, user_id):
+    """Test that every write reaches SQLite and that memory then matches it."""
+    with memory_manager.app.app_context():
+        other_id = memory_manager.add_user("Other User").user_id
+        mine = memory_manager.add_movie(user_id, "Inception").movie_id
+        theirs = memory_manager.add_movie(other_id, "Interstellar").movie_id
+        for reader in (user_id, other_id):
+            memory_manager.get_user_reviews(reader)
+            memory_manager.get_user_movies(reader)
+        memory_manager.get_movie_reviews(mine)
+        memory_manager.get_movie_reviews(theirs)
+
+        first = memory_manager.add_review(user_id, mine, None, 8)
+        memory_manager.add_review(other_id, mine, None, 6)
+        memory_manager.add_review(user_id, theirs, None, 9)
+        assert memory_manager.delete_review(first.review_id)
+        updated = memory_manager.update_movie(mine, "Interstellar", "Someone Else", 2014, 5.0)
+        assert movie_to_dict(memory_manager.get_movie(mine)) == movie_to_dict(updated)
+        assert updated.director == "Someone Else"
+
+        assert memory_manager.delete_user(other_id)
+        assert memory_manager.get_user(other_id) is None
+        assert memory_manager.get_movie(theirs) is None
+        assert reviews_of(memory_manager.get_movie_reviews(mine)) == []
+        assert reviews_of(memory_manager.get_user_reviews(user_id)) == []
+
+        assert memory_manager.delete_movie(mine)
+        assert memory_manager.get_user_movies(user_id) == []
+        assert memory_manager.manager.get_user_movies(user_id) == []
+
+
+def test_memory_cap_evicts_least_recently_used_users(data_manager):
+    """Test that past the cap the users read longest ago are dropped and read through again."""
+    memory_manager = InMemoryDataManager(data_manager, max_records=3)
+    with memory_manager.app.app_context():
+        user_ids = [memory_manager.add_user(f"User {number}").user_id for number in range(4)]
+        stats = memory_manager.stats()
+        assert (stats["entries"], stats["users"], stats["evictions"]) == (3, 3, 1)
+
+        with count_statements() as counter:
+            assert memory_manager.get_user(user_ids[0]).name == "User 0"
+        assert counter.count == 1
+        with count_statements() as counter:
+            assert memory_manager.get_user(user_ids[3]).name == "User 3"
+        assert counter.count == 0
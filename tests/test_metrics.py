@@ -0,0 +1,44 @@
+from datamanager.metrics import Counter, Histogram, init_metrics
+
+
+def test_histogram_renders_cumulative_buckets():
+    """Test that bucket counts are cumulative and end with +Inf, followed by the sum and count."""
+    histogram = Histogram("job_seconds", "Job time.", ("job",), buckets=(0.1, 1))
+    histogram.observe(0.05, job="a")
+    histogram.observe(0.5, job="a")
+    histogram.observe(5, job="a")
+
+    assert histogram.render()[2:] == [
+        'job_seconds_bucket{job="a",le="0.1"} 1',
+        'job_seconds_bucket{job="a",le="1"} 2',
+        'job_seconds_bucket{job="a",le="+Inf"} 3',
+        'job_seconds_sum{job="a"} 5.55',
+        'job_seconds_count{job="a"} 3',
+    ]
+
+
+def test_label_values_are_escaped():
+    """Test that quotes, backslashes and newlines in label values are escaped."""
+    counter = Counter("things_total", "Things.", ("name",))
+    counter.inc(name='say "hi"\\\n')
+
+    assert counter.render()[-1] == 'things_total{name="say \\"hi\\"\\\\\\n"} 1'
+
+
+def test_metrics_endpoint_reports_requests_sql_and_caches(data_manager, api_client, user_id):
+    """Test that /metrics shows request latency and counts, SQL timings, cache ratios and the breaker state."""
+    init_metrics(data_manager.app, collectors=[data_manager.collect_metrics])
+    api_client.get("/api/users")
+    api_client.get("/api/users")
+
+    response = api_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    body = response.get_data(as_text=True)
+    assert 'http_requests_total{method="GET",endpoint="api.get_users",status="200"}' in body
+    assert 'http_request_duration_seconds_bucket{method="GET",endpoint="api.get_users",le="+Inf"}' in body
+    assert 'http_request_sql_statements_count{endpoint="api.get_users"}' in body
+    assert "sql_statement_duration_seconds_count" in body
+    assert 'cache_hit_ratio{cache="result"} 0.5' in body
+    assert "omdb_breaker_open 0" in body
+    assert "enrichment_jobs_pending" in body
@@ -0,0 +1,60 @@
+import sqlite3
+
+from flask import Flask
+from sqlalchemy import text
+
+from datamanager.data_models import db, ReviewStats
+from datamanager.migrations import run_migrations, migration_status
+from datamanager.sqllite_data_magager import SQLiteDataManager
+
+
+BASELINE_SCHEMA = """
+CREATE TABLE users (user_id INTEGER PRIMARY KEY AUTOINCREMENT, name VARCHAR(100) NOT NULL);
+CREATE TABLE movies (movie_id INTEGER PRIMARY KEY AUTOINCREMENT, movie_name VARCHAR(255) NOT NULL,
+    director VARCHAR(255) NOT NULL, year INTEGER NOT NULL, rating FLOAT NOT NULL,
+    user_id INTEGER NOT NULL REFERENCES users (user_id));
+CREATE TABLE reviews (review_id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER NOT NULL REFERENCES users (user_id),
+    movie_id INTEGER NOT NULL REFERENCES movies (movie_id), review_text TEXT, rating FLOAT NOT NULL);
+INSERT INTO users (name) VALUES ('Old User');
+INSERT INTO users (name) VALUES ('Other User');
+INSERT INTO users (name) VALUES ('Third User');
+INSERT INTO movies (movie_name, director, year, rating, user_id) VALUES ('Inception', 'Christopher Nolan', 2010, 8.8, 1);
+INSERT INTO movies (movie_name, director, year, rating, user_id) VALUES ('Inception', 'Christopher Nolan', 2010, 8.9, 2);
+INSERT INTO movies (movie_name, director, year, rating, user_id) VALUES ('Memento', 'Christopher Nolan', 2000, 8.4, 2);
+INSERT INTO movies (movie_name, director, year, rating, user_id) VALUES ('Inception', 'Christopher Nolan', 2010, 8.8, 3);
+INSERT INTO reviews (user_id, movie_id, review_text, rating) VALUES (2, 2, 'Dreams within dreams', 9);
+"""
+
+
+def test_existing_database_is_upgraded_in_place(tmp_path):
+    """Test that a database created before the migrations is upgraded and keeps its rows."""
+    path = tmp_path / "movies.db"
+    with sqlite3.connect(path) as conn:
+        conn.executescript(BASELINE_SCHEMA)
+
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{path}"
+    app.config["OMDB_CACHE_PATH"] = None
+    manager = SQLiteDataManager(app)
+
+    with app.app_context():
+        indexes = {row[0] for row in db.session.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))}
+        assert {"ix_movies_user_id_movie_id", "ix_reviews_movie_id_review_id",
+                "ix_reviews_user_id_review_id"} <= indexes
+
+        plan = db.session.execute(text("EXPLAIN QUERY PLAN SELECT * FROM movies WHERE user_id = 1")).all()
+        assert "ix_movies_user_id_movie_id" in plan[0][-1]
+
+        # Identical rows share an entry; the hand-edited 8.9 keeps its own
+        assert [(movie.movie_name, movie.rating) for movie in manager.get_user_movies(1)] == [("Inception", 8.8)]
+        assert sorted((movie.movie_name, movie.rating) for movie in manager.get_user_movies(2)) == \
+            [("Inception", 8.9), ("Memento", 8.4)]
+        assert manager.get_user_movies(3)[0].catalog_id == manager.get_user_movies(1)[0].catalog_id
+        assert db.session.execute(text("SELECT COUNT(*) FROM catalog")).scalar() == 3
+        assert manager.get_movie_reviews(2)[0].movie.user_id == 2
+        assert manager.get_review_stats(ReviewStats.MOVIE, 2).review_count == 1
+        assert manager.get_review_stats(ReviewStats.USER, 2).h9 == 1
+        assert all(applied for _, _, applied in migration_status(db.engine))
+        assert run_migrations(db.engine, report=None) == []
+    manager.enrichment_queue.shutdown()
+    manager.recommendation_updater.shutdown()
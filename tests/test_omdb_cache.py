@@ -0,0 +1,62 @@
+from datamanager.omdb_cache import OMDbCache, MISSING
+
+
+INCEPTION = {"movie_name": "Inception", "director": "Christopher Nolan", "year": "2010", "rating": "8.8"}
+
+
+class FakeClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_hit_after_set(tmp_path):
+    """Test that a stored title is served from the cache, ignoring case and spacing."""
+    cache = OMDbCache(path=str(tmp_path / "cache.db"))
+    assert cache.get("Inception") is MISSING
+
+    cache.set("Inception", INCEPTION)
+    assert cache.get("  inception ") == INCEPTION
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+
+def test_negative_entries_expire(tmp_path):
+    """Test that "not found" answers are cached until their own TTL runs out."""
+    clock = FakeClock()
+    cache = OMDbCache(path=str(tmp_path / "cache.db"), ttl=100, negative_ttl=10, clock=clock)
+
+    cache.set("No Such Movie", None)
+    assert cache.get("No Such Movie") is None
+    assert cache.stats()["negative_hits"] == 1
+
+    clock.now += 11
+    assert cache.get("No Such Movie") is MISSING
+
+
+def test_disk_store_survives_restart(tmp_path):
+    """Test that a new cache instance reads entries written by an earlier one."""
+    path = str(tmp_path / "cache.db")
+    OMDbCache(path=path).set("Inception", INCEPTION)
+
+    cache = OMDbCache(path=path)
+    assert cache.get("Inception") == INCEPTION
+    assert cache.stats()["disk_hits"] == 1
+
+
+def test_lru_evicts_oldest_entry():
+    """Test that the in-process LRU keeps at most max_entries titles."""
+    cache = OMDbCache(path=None, max_entries=2)
+    cache.set("A", INCEPTION)
+    cache.set("B", INCEPTION)
+    cache.get("A")
+    cache.set("C", INCEPTION)
+
+    assert cache.get("B") is MISSING
+    assert cache.get("A") == INCEPTION
@@ -0,0 +1,91 @@
+import pytest
+import requests
+
+from datamanager.omdb_client import OMDbClient, CircuitBreaker, OMDbUnavailableError
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.payload = payload
+
+    def json(self):
+        if isinstance(self.payload, Exception):
+            raise self.payload
+        return self.payload
+
+
+class FakeSession:
+    """Replays a scripted list of responses (or exceptions) for session.get."""
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, params=None, timeout=None):
+        self.calls += 1
+        outcome = self.script.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+
+def make_client(script, **kwargs):
+    session = FakeSession(script)
+    client = OMDbClient("http://omdb.test/", "key", backoff=0, session=session, **kwargs)
+    return client, session
+
+
+def test_retries_server_errors_and_timeouts():
+    """Test that 5xx answers and timeouts are retried until a call succeeds."""
+    client, session = make_client([
+        FakeResponse(503),
+        requests.Timeout("slow"),
+        FakeResponse(200, {"Response": "True", "Title": "Inception"}),
+    ], max_retries=2)
+
+    assert client.lookup("Inception")["Title"] == "Inception"
+    assert session.calls == 3
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_opens_and_fails_fast():
+    """Test that the breaker opens after repeated failures and stops outgoing calls."""
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=30, clock=lambda: now[0])
+    client, session = make_client([FakeResponse(500)] * 2 + [FakeResponse(200, {"Response": "False"})],
+                                  max_retries=0, breaker=breaker)
+
+    for _ in range(2):
+        with pytest.raises(OMDbUnavailableError):
+            client.lookup("Inception")
+    assert breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(OMDbUnavailableError):
+        client.lookup("Inception")
+    assert session.calls == 2
+
+    now[0] = 31.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert client.lookup("Inception") == {"Response": "False"}
+    assert breaker.snapshot()["state"] == CircuitBreaker.CLOSED
+
+
+def test_client_errors_are_not_retried():
+    """Test that a 4xx answer returns None without retrying or tripping the breaker."""
+    client, session = make_client([FakeResponse(401)], max_retries=3)
+
+    assert client.lookup("Inception") is None
+    assert session.calls == 1
+    assert client.breaker.failures == 0
+
+
+def test_bodies_that_are_not_json_count_as_failures():
+    """Test that a 200 answer with a body that is not JSON is retried and then reported as unavailable."""
+    page_error = ValueError("Expecting value: line 1 column 1 (char 0)")
+    client, session = make_client([FakeResponse(200, page_error)] * 2, max_retries=1)
+
+    with pytest.raises(OMDbUnavailableError, match="Expecting value"):
+        client.lookup("Inception")
+    assert session.calls == 2
+    assert client.breaker.failures == 1
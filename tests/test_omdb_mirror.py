@@ -0,0 +1,113 @@
+import gzip
+import json
+
+import pytest
+from flask import Flask
+
+from datamanager.omdb_mirror import OMDbMirror, build_mirror, normalize_title, split_year
+from datamanager.sqllite_data_magager import SQLiteDataManager
+
+
+OMDB_ANSWERS = [
+    {"Title": "Amélie", "Year": "2001", "Director": "Jean-Pierre Jeunet", "imdbRating": "8.3",
+     "imdbID": "tt0211915", "imdbVotes": "780,000", "Response": "True"},
+    {"Title": "Dune", "Year": "2021", "Director": "Denis Villeneuve", "imdbRating": "8.0",
+     "imdbID": "tt1160419", "imdbVotes": "900,000", "Response": "True"},
+    {"Title": "Dune", "Year": "1984", "Director": "David Lynch", "imdbRating": "6.3",
+     "imdbID": "tt0087182", "imdbVotes": "180,000", "Response": "True"},
+    {"Title": "Unrated Film", "Year": "2020", "Director": "N/A", "imdbRating": "N/A",
+     "imdbID": "tt0000001", "Response": "True"},
+]
+IMDB_BASICS = (
+    "tconst\ttitleType\tprimaryTitle\toriginalTitle\tisAdult\tstartYear\tendYear\truntimeMinutes\tgenres\n"
+    "tt0120737\tmovie\tThe Lord of the Rings: The Fellowship of the Ring\tsame\t0\t2001\t\\N\t178\tAdventure\n"
+    "tt0000002\ttvEpisode\tSome Episode\tsame\t0\t2001\t\\N\t30\tDrama\n"
+)
+IMDB_RATINGS = "tconst\taverageRating\tnumVotes\ntt0120737\t8.9\t2000000\n"
+
+
+@pytest.fixture
+def mirror_path(tmp_path):
+    """Build a mirror from an OMDb NDJSON dump and IMDb basics and ratings dumps."""
+    answers = tmp_path / "omdb.ndjson.gz"
+    with gzip.open(answers, "wt", encoding="utf-8") as file:
+        file.writelines(json.dumps(answer) + "\n" for answer in OMDB_ANSWERS)
+    (tmp_path / "title.basics.tsv").write_text(IMDB_BASICS, encoding="utf-8")
+    (tmp_path / "title.ratings.tsv").write_text(IMDB_RATINGS, encoding="utf-8")
+
+    path = str(tmp_path / "omdb_mirror.db")
+    count = build_mirror(path, [str(answers), str(tmp_path / "title.basics.tsv")],
+                         [str(tmp_path / "title.ratings.tsv")], report=None)
+    assert count == 4  # The episode and the film without a rating are left out
+    return path
+
+
+def test_title_normalization_and_years():
+    """Test that keys ignore case, accents and punctuation, and that trailing years are split off."""
+    assert normalize_title("AMÉLIE!") == normalize_title("amelie") == "amelie"
+    assert normalize_title("Spider-Man") == normalize_title("spider man")
+    assert normalize_title("Fast & Furious") == "fast and furious"
+    assert split_year("Dune (1984)") == ("Dune", 1984)
+    assert split_year("Dune 2021") == ("Dune", 2021)
+    assert split_year("1917") == ("1917", None)
+
+
+def test_missing_mirror_file_answers_nothing(tmp_path):
+    """Test that lookups go on to OMDb while the configured mirror file does not exist."""
+    mirror = OMDbMirror(str(tmp_path / "missing.db"))
+    assert mirror.lookup("Dune") is None
+    assert mirror.lookup("Dune") is None
+    assert not mirror.available
+
+
+def test_lookup_by_exact_and_normalized_title_and_year(mirror_path):
+    """Test exact and normalized matches, year disambiguation and the most-voted default."""
+    mirror = OMDbMirror(mirror_path)
+
+    assert mirror.lookup("amelie") == {"movie_name": "Amélie", "director": "Jean-Pierre Jeunet", "year": "2001",
+                                       "rating": "8.3", "imdb_id": "tt0211915"}
+    assert mirror.lookup("Dune")["imdb_id"] == "tt1160419"
+    assert mirror.lookup("dune (1984)")["director"] == "David Lynch"
+    assert mirror.lookup("the lord of the rings the fellowship of the ring")["rating"] == "8.9"
+    assert mirror.lookup("Unrated Film") is None
+    assert mirror.stats()["entries"] == 4
+    assert OMDbMirror(None).lookup("Dune") is None
+
+
+def test_rebuilt_mirror_is_picked_up_without_restart(mirror_path, tmp_path):
+    """Test that a running mirror switches to a rebuilt file after its recheck interval."""
+    clock = [0.0]
+    mirror = OMDbMirror(mirror_path, recheck_interval=10, clock=lambda: clock[0])
+    assert mirror.lookup("Dune")["year"] == "2021"
+
+    dump = tmp_path / "update.ndjson"
+    dump.write_text(json.dumps({**OMDB_ANSWERS[1], "Title": "Dune: Part One"}) + "\n")
+    build_mirror(mirror_path, [str(dump)], report=None)
+    assert mirror.lookup("Dune") is not None  # Still the old file
+
+    clock[0] += 11
+    assert mirror.lookup("Dune") is None
+    assert mirror.lookup("Dune: Part One")["imdb_id"] == "tt1160419"
+
+
+def test_data_manager_answers_from_the_mirror_before_omdb(mirror_path, tmp_path):
+    """Test that fetch_movie_details resolves mirrored titles without calling OMDb."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'movies.db'}"
+    app.config["OMDB_CACHE_PATH"] = None
+    app.config["OMDB_MIRROR_PATH"] = mirror_path
+    manager = SQLiteDataManager(app)
+
+    class OfflineClient:
+        def lookup(self, title):
+            raise AssertionError(f"OMDb was called for {title}")
+
+    manager.omdb_client = OfflineClient()
+    try:
+        assert manager.fetch_movie_details("Dune (1984)")["imdb_id"] == "tt0087182"
+        with app.app_context():
+            movie = manager.add_movie(manager.add_user("Offline").user_id, "amélie")
+            assert (movie.catalog.title, movie.catalog.year) == ("Amélie", 2001)
+    finally:
+        manager.enrichment_queue.shutdown()
+        manager.recommendation_updater.shutdown()
@@ -0,0 +1,36 @@
+def test_users_are_paginated_with_cursor(data_manager, api_client):
+    """Test that following next_cursor walks through every user exactly once."""
+    with data_manager.app.app_context():
+        for i in range(5):
+            data_manager.add_user(f"User {i}")
+
+    names, url = [], "/api/users?limit=2"
+    while url:
+        response = api_client.get(url)
+        assert response.status_code == 200
+        assert len(response.json["users"]) <= 2
+        names += [user["name"] for user in response.json["users"]]
+        url = response.json["next"]
+
+    assert names == [f"User {i}" for i in range(5)]
+
+
+def test_movies_field_projection(api_client, user_id):
+    """Test that fields= limits each movie to the requested fields."""
+    api_client.post(f"/api/users/{user_id}/movies/batch", json={"titles": ["Inception", "Interstellar"]})
+
+    response = api_client.get(f"/api/users/{user_id}/movies?fields=title,year&limit=1")
+    assert response.status_code == 200
+    assert response.json["movies"] == [{"title": "Inception", "year": 2010}]
+    assert response.headers["Link"].endswith('rel="next"')
+
+    response = api_client.get(f"/api/users/{user_id}/movies?fields=title&cursor={response.json['next_cursor']}")
+    assert response.json["movies"] == [{"title": "Interstellar"}]
+    assert response.json["next_cursor"] is None
+
+
+def test_invalid_page_arguments(api_client, user_id):
+    """Test that unknown fields, bad cursors and bad limits are rejected."""
+    assert api_client.get("/api/users?fields=password").status_code == 400
+    assert api_client.get("/api/users?cursor=!!!").status_code == 400
+    assert api_client.get(f"/api/users/{user_id}/movies?limit=0").status_code == 400
@@ -0,0 +1,43 @@
+import pytest
+
+from datamanager.query_budget import count_statements, SQLStatementBudgetExceeded
+from datamanager.sqllite_data_magager import USER_MOVIES_PLAN
+
+
+def add_movies(api_client, user_id, count):
+    titles = ["Inception", "Interstellar"] * count
+    api_client.post(f"/api/users/{user_id}/movies/batch", json={"titles": titles[:count]})
+
+
+def test_movie_list_query_count_does_not_grow(data_manager, api_client, user_id):
+    """Test that listing movies with their status takes the same number of queries for 1 or 2 movies."""
+    counts = []
+    for total in (1, 2):
+        add_movies(api_client, user_id, total)
+        with data_manager.app.app_context(), count_statements() as counter:
+            movies, _ = data_manager.get_user_movies_page(user_id)
+            [movie.status for movie in movies]
+        counts.append(counter.count)
+
+    assert counts[0] == counts[1] == 1
+
+
+def test_user_movies_plan_loads_relationships_up_front(data_manager, api_client, user_id):
+    """Test that USER_MOVIES_PLAN fetches the movies and their enrichment jobs in the initial queries."""
+    add_movies(api_client, user_id, 2)
+    with data_manager.app.app_context():
+        with count_statements() as counter:
+            user = data_manager.get_user(user_id, load=USER_MOVIES_PLAN)
+        loaded = counter.count
+        with count_statements() as counter:
+            [movie.status for movie in user.movies]
+
+    assert loaded == 2
+    assert counter.count == 0
+
+
+def test_request_over_budget_fails(data_manager, api_client, user_id):
+    """Test that a request running more statements than SQL_STATEMENT_BUDGET raises."""
+    data_manager.app.config["SQL_STATEMENT_BUDGET"] = 0
+    with pytest.raises(SQLStatementBudgetExceeded):
+        api_client.get(f"/api/users/{user_id}/movies")
@@ -0,0 +1,110 @@
+import random
+
+import pytest
+from sqlalchemy import select
+
+from datamanager import recommendations
+from datamanager.data_models import db, CatalogEntry, LikeCount, UserLike
+
+
+def titles(body):
+    return [recommendation["title"] for recommendation in body["recommendations"]]
+
+
+def test_sparse_and_python_neighbours_agree():
+    """Test that the sparse matrix rebuild and the plain Python one find the same neighbours and scores."""
+    if recommendations.sparse is None:
+        pytest.skip("numpy and scipy are not installed")
+    rng = random.Random(7)
+    likes = sorted({(rng.randrange(200), rng.randrange(60)) for _ in range(2000)})
+
+    sparse_rows = recommendations._top_neighbors_sparse(likes, 5)
+    python_rows = recommendations._top_neighbors_python(likes, 5)
+    assert [row[:3] for row in sparse_rows] == [row[:3] for row in python_rows]
+    assert [row[3] for row in sparse_rows] == pytest.approx([row[3] for row in python_rows])
+
+
+def test_likes_update_recommendations_in_the_background(films, api_client):
+    """Test that favourites and good reviews show up in other users' recommendations once applied."""
+    with films.app.app_context():
+        fan = films.add_user("Fan").user_id
+        newcomer = films.add_user("Newcomer").user_id
+        for title in ("Inception", "Interstellar", "Tenet"):
+            films.add_movie(fan, title)
+        memento = films.add_movie(fan, "Memento").movie_id
+        films.add_review(fan, memento, "Fine", 6)  # Below RECOMMEND_LIKE_RATING, but it is a favourite anyway
+        films.add_movie(newcomer, "Inception")
+        films.recommendation_updater.wait()
+
+    body = api_client.get(f"/api/users/{newcomer}/recommendations").get_json()
+    assert body["user_id"] == newcomer
+    assert sorted(titles(body)) == ["Interstellar", "Memento", "Tenet"]
+    assert {"catalog_id", "title", "director", "year", "rating", "score"} <= set(body["recommendations"][0])
+    assert titles(api_client.get(f"/api/users/{fan}/recommendations").get_json()) == []
+
+    with films.app.app_context():
+        films.rebuild_recommendations()
+    assert sorted(titles(api_client.get(f"/api/users/{newcomer}/recommendations").get_json())) == \
+        ["Interstellar", "Memento", "Tenet"]
+
+
+def test_rebuild_ranks_by_summed_similarity(films, api_client):
+    """Test that films co-liked with more of the user's likes rank first, and that low ratings are no likes."""
+    with films.app.app_context():
+        movie_ids = {}
+        for name, liked in (("First", ("Inception", "Interstellar", "Tenet")), ("Second", ("Inception", "Memento")),
+                            ("Third", ("Interstellar", "Tenet"))):
+            user = films.add_user(name).user_id
+            for title in liked:
+                movie_ids[title] = films.add_movie(user, title).movie_id
+        reader = films.add_user("Reader").user_id
+        films.add_movie(reader, "Interstellar")
+        films.add_review(reader, movie_ids["Inception"], "Loved it", 9)  # Likes Inception without having it
+        films.add_review(reader, movie_ids["Memento"], "Meh", 3)
+        films.recommendation_updater.wait()
+        assert films.rebuild_recommendations() > 0
+        ranked = films.get_recommendations(reader)
+
+    assert [row["title"] for row in ranked] == ["Tenet", "Memento"]
+    assert ranked[0]["score"] > ranked[1]["score"]
+    body = api_client.get(f"/api/users/{reader}/recommendations?limit=1").get_json()
+    assert titles(body) == ["Tenet"]
+
+
+def test_every_way_of_adding_a_movie_records_a_like(films):
+    """Test that batch adds, async adds and finished enrichment lookups all count as likes."""
+    with films.app.app_context():
+        batch, known, first, second = (films.add_user(name).user_id for name in ("Batch", "Known", "First", "Second"))
+        films.add_movies_bulk(batch, ["Inception", "Interstellar", "No Such Film"])
+        films.add_movie_async(known, "Inception")  # Already in the catalog, linked at once
+        jobs = [films._store_pending_movie(user, "Tenet").enrichment.job_id for user in (first, second)]
+        for job_id in jobs:  # The first fills in its placeholder, the second is re-linked to that entry
+            films.enrich_movie(job_id)
+        films.recommendation_updater.wait()
+
+        likes = db.session.execute(select(UserLike.user_id, CatalogEntry.title)
+                                   .join(CatalogEntry, CatalogEntry.catalog_id == UserLike.catalog_id)).all()
+        assert sorted(likes) == sorted([(batch, "Inception"), (batch, "Interstellar"), (known, "Inception"),
+                                        (first, "Tenet"), (second, "Tenet")])
+        assert sorted(db.session.execute(select(CatalogEntry.title, LikeCount.like_count)
+                                         .join(LikeCount, LikeCount.catalog_id == CatalogEntry.catalog_id)).all()) == \
+            [("Inception", 2), ("Interstellar", 1), ("Tenet", 2)]
+
+
+def test_recommendations_endpoint_errors(api_client, user_id):
+    """Test the answers for unknown users and bad limits."""
+    assert api_client.get("/api/users/999/recommendations").status_code == 404
+    assert api_client.get(f"/api/users/{user_id}/recommendations?limit=0").status_code == 400
+    assert api_client.get(f"/api/users/{user_id}/recommendations").get_json()["recommendations"] == []
+
+
+def test_failed_updates_are_logged(films, caplog):
+    """Test that a like the background thread cannot apply is logged with its traceback."""
+    def fail(user_id, catalog_id):
+        raise RuntimeError("database is locked")
+
+    films.recommendation_updater.store_like = fail
+    films.recommendation_updater.submit(1, 2)
+    films.recommendation_updater.wait()
+    assert "Could not update recommendations for a like of 2 by 1" in caplog.text
+    assert caplog.records[-1].exc_info[0] is RuntimeError
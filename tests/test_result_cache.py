@@ -0,0 +1,65 @@
+import sqlite3
+
+import pytest
+
+from datamanager.data_models import db
+from datamanager.query_budget import count_statements
+from datamanager.result_cache import DiskBackend, MemoryBackend, ResultCache, MISSING, make_result_cache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_backend_evicts_least_recently_used_and_expired_entries():
+    """Test LRU eviction and TTL expiry of the in-process backend."""
+    clock = FakeClock()
+    backend = MemoryBackend(max_entries=2, clock=clock)
+    backend.set("a", 1, ttl=10)
+    backend.set("b", 2, ttl=10)
+    assert backend.get("a") == 1
+    backend.set("c", 3, ttl=10)
+    assert backend.get("b") is MISSING
+
+    clock.now += 11
+    assert backend.get("a") is MISSING
+
+
+def test_disk_backend_is_shared_between_processes(tmp_path):
+    """Test that two backends on the same file (as in two workers) see each other's entries."""
+    first = ResultCache(DiskBackend(str(tmp_path / "cache.db")))
+    second = ResultCache(DiskBackend(str(tmp_path / "cache.db")))
+
+    assert first.get_or_set(("page", 1), lambda: {"html": "<p>hi</p>"}) == {"html": "<p>hi</p>"}
+    assert second.get_or_set(("page", 1), lambda: pytest.fail("should be cached")) == {"html": "<p>hi</p>"}
+    assert second.stats()["hit_ratio"] == 1.0
+
+
+def test_cached_list_is_replaced_after_a_write_from_another_process(data_manager, api_client, user_id):
+    """Test that a cached page is served from the cache until any connection writes to what it shows."""
+    with data_manager.app.app_context():
+        data_manager.add_movie(user_id, "Inception")
+        path = db.engine.url.database
+
+    assert [m["title"] for m in api_client.get(f"/api/users/{user_id}/movies").json["movies"]] == ["Inception"]
+    with count_statements() as counter:
+        response = api_client.get(f"/api/users/{user_id}/movies")
+    assert counter.count == 1  # Only the version counter was read
+    assert data_manager.result_cache.stats()["hits"] == 1
+
+    # Another worker renames the film through its own connection
+    with sqlite3.connect(path) as conn:
+        conn.execute("UPDATE catalog SET title = 'Inception (2010)'")
+
+    response = api_client.get(f"/api/users/{user_id}/movies")
+    assert [m["title"] for m in response.json["movies"]] == ["Inception (2010)"]
+
+
+def test_unknown_backend_is_rejected():
+    """Test that a typo in RESULT_CACHE_BACKEND fails loudly."""
+    with pytest.raises(ValueError):
+        make_result_cache("redis")
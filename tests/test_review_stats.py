@@ -0,0 +1,82 @@
+from datamanager.data_models import ReviewStats
+
+
+def snapshot(data_manager):
+    """Return every review aggregate as plain tuples, for comparing against a rebuild."""
+    return sorted(
+        (stats.scope, stats.subject_id, stats.review_count, round(stats.rating_sum, 6),
+         tuple(stats.histogram.values()))
+        for stats in ReviewStats.query.all()
+    )
+
+
+def test_reviews_update_movie_and_user_aggregates(data_manager, user_id):
+    """Test that adding and deleting reviews keeps count, average and histogram current."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        first = data_manager.add_review(user_id, movie_id, "Great", 9.5)
+        data_manager.add_review(user_id, movie_id, "Fine", 7)
+        data_manager.add_review(user_id, movie_id, None, 10)
+
+        stats = data_manager.get_review_stats(ReviewStats.MOVIE, movie_id)
+        assert stats.review_count == 3
+        assert stats.average_rating == (9.5 + 7 + 10) / 3
+        assert (stats.h7, stats.h9, stats.h10) == (1, 1, 1)
+        assert data_manager.get_review_stats(ReviewStats.USER, user_id).review_count == 3
+
+        assert data_manager.delete_review(first.review_id)
+        stats = data_manager.get_review_stats(ReviewStats.MOVIE, movie_id)
+        assert (stats.review_count, stats.rating_sum, stats.h9) == (2, 17, 0)
+
+
+def test_deleting_movies_and_users_removes_their_reviews_from_aggregates(data_manager, user_id):
+    """Test that cascading deletes take the removed reviews out of every aggregate."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        mine = data_manager.add_movie(user_id, "Inception").movie_id
+        theirs = data_manager.add_movie(other_id, "Interstellar").movie_id
+        data_manager.add_review(user_id, mine, None, 8)
+        data_manager.add_review(other_id, mine, None, 6)
+        data_manager.add_review(user_id, theirs, None, 9)
+
+        data_manager.delete_movie(mine)
+        assert data_manager.get_review_stats(ReviewStats.MOVIE, mine) is None
+        assert data_manager.get_review_stats(ReviewStats.USER, other_id) is None
+        assert data_manager.get_review_stats(ReviewStats.USER, user_id).review_count == 1
+
+        data_manager.delete_user(user_id)
+        assert ReviewStats.query.count() == 0
+
+
+def test_rebuild_matches_incremental_aggregates(data_manager, user_id):
+    """Test that the repair command recomputes exactly what the incremental updates maintain."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        movie_ids = [data_manager.add_movie(user_id, title).movie_id for title in ("Inception", "Interstellar")]
+        for rating in (1, 4.5, 8.2, 10):
+            data_manager.add_review(user_id, movie_ids[0], None, rating)
+            data_manager.add_review(other_id, movie_ids[1], None, rating)
+
+        incremental = snapshot(data_manager)
+        ReviewStats.query.delete()
+        assert data_manager.rebuild_review_stats() == 4
+        assert snapshot(data_manager) == incremental
+
+
+def test_stats_endpoints(data_manager, api_client, user_id):
+    """Test the movie and user review aggregate endpoints."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        data_manager.add_review(user_id, movie_id, None, 8)
+        data_manager.add_review(user_id, movie_id, None, 9)
+
+    response = api_client.get(f"/api/movies/{movie_id}/stats")
+    assert response.status_code == 200
+    assert response.json["review_count"] == 2
+    assert response.json["average_rating"] == 8.5
+    assert response.json["histogram"]["8"] == 1
+
+    response = api_client.get(f"/api/users/{user_id}/stats")
+    assert response.json["review_count"] == 2
+
+    assert api_client.get("/api/movies/999/stats").status_code == 404
@@ -0,0 +1,63 @@
+def test_movies_are_found_by_title_and_director_prefixes(data_manager, api_client, user_id):
+    """Test prefix matching, highlighting and the user filter of the movie search."""
+    with data_manager.app.app_context():
+        other_id = data_manager.add_user("Other User").user_id
+        data_manager.add_movie(user_id, "Inception")
+        data_manager.add_movie(other_id, "Interstellar")
+
+    response = api_client.get("/api/search?q=christopher nol")
+    assert response.status_code == 200
+    assert sorted(result["title"] for result in response.json["results"]) == ["Inception", "Interstellar"]
+    assert response.json["results"][0]["highlight"]["director"] == "<mark>Christopher</mark> <mark>Nolan</mark>"
+
+    response = api_client.get(f"/api/search?q=incep&user_id={user_id}")
+    [result] = response.json["results"]
+    assert result["title"] == "Inception"
+    assert result["highlight"]["title"] == "<mark>Inception</mark>"
+    assert result["movie_id"] is not None
+
+    assert api_client.get(f"/api/search?q=interstellar&user_id={user_id}").json["results"] == []
+
+
+def test_reviews_are_ranked_paginated_and_kept_in_sync(data_manager, api_client, user_id):
+    """Test review search ranking, snippets, paging and index updates on delete."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        data_manager.add_review(user_id, movie_id, "A dream inside a dream inside a dream", 9)
+        data_manager.add_review(user_id, movie_id, "The dream logic is <b>fun</b>", 8)
+        weak = data_manager.add_review(user_id, movie_id, "Long, but a dream", 6).review_id
+
+    response = api_client.get("/api/search?q=dream&type=reviews&limit=2")
+    assert response.status_code == 200
+    first_page = response.json["results"]
+    assert len(first_page) == 2
+    assert first_page[0]["highlight"].count("<mark>dream</mark>") == 3
+    assert "&lt;b&gt;" in api_client.get("/api/search?q=logic&type=reviews").json["results"][0]["highlight"]
+
+    next_page = api_client.get(response.json["next"]).json
+    assert len(next_page["results"]) == 1
+    assert next_page["next_offset"] is None
+
+    with data_manager.app.app_context():
+        data_manager.delete_review(weak)
+    assert len(api_client.get("/api/search?q=dream&type=reviews").json["results"]) == 2
+
+
+def test_search_index_follows_movie_edits(data_manager, api_client, user_id):
+    """Test that editing a movie's details re-indexes them."""
+    with data_manager.app.app_context():
+        movie_id = data_manager.add_movie(user_id, "Inception").movie_id
+        data_manager.update_movie(movie_id, "Inception", "Somebody Else", 2010, 9.0)
+
+    assert [r["director"] for r in api_client.get("/api/search?q=somebody").json["results"]] == ["Somebody Else"]
+    assert api_client.get(f"/api/search?q=nolan&user_id={user_id}").json["results"] == []
+
+
+def test_search_rejects_bad_parameters(api_client):
+    """Test validation of the search parameters and FTS5 syntax in user input."""
+    assert api_client.get("/api/search").status_code == 400
+    assert api_client.get("/api/search?q=x&type=users").status_code == 400
+    assert api_client.get("/api/search?q=x&limit=0").status_code == 400
+    response = api_client.get('/api/search?q=" OR NEAR(')
+    assert response.status_code == 200
+    assert response.json["results"] == []
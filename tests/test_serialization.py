@@ -0,0 +1,78 @@
+import gzip
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from flask import Flask, jsonify
+
+import serialization
+from serialization import JSON_MIMETYPE, serialize
+
+
+BODY = {"movies": [{"movie_id": 1, "title": "Inception", "rating": 8.8, "year": 2010, "director": None}],
+        "name": "Test User", "next": None, "histogram": {"10": 1, "2": 0}}
+
+
+@pytest.mark.parametrize("fast", [True, False])
+def test_json_matches_jsonify(monkeypatch, fast):
+    """Test that both JSON encoders produce the bytes jsonify produced before."""
+    if not fast:
+        monkeypatch.setattr(serialization, "orjson", None)
+    elif serialization.orjson is None:
+        pytest.skip("orjson is not installed")
+    with Flask(__name__).app_context():
+        assert serialize(BODY) == jsonify(BODY).get_data()
+
+
+def test_msgpack_is_negotiated_when_installed(api_client, user_id):
+    """Test that a client preferring MessagePack gets it, with the JSON body's content."""
+    msgpack = pytest.importorskip("msgpack")
+    response = api_client.get(f"/api/users/{user_id}/movies", headers={"Accept": "application/msgpack"})
+    assert response.mimetype == "application/msgpack"
+    assert msgpack.unpackb(response.data) == api_client.get(f"/api/users/{user_id}/movies").get_json()
+
+
+def test_unavailable_formats_fall_back_to_json(monkeypatch, api_client, user_id):
+    """Test that JSON is served when MessagePack is asked for but not installed, and that Accept is a Vary."""
+    monkeypatch.setattr(serialization, "msgpack", None)
+    response = api_client.get(f"/api/users/{user_id}/movies", headers={"Accept": "application/msgpack"})
+    assert response.mimetype == JSON_MIMETYPE
+    assert response.get_json()["user_id"] == user_id
+    assert "Accept" in response.headers["Vary"]
+
+
+def test_large_responses_are_compressed(api_client, data_manager):
+    """Test that responses past API_COMPRESS_MIN_BYTES are gzipped for clients that accept it."""
+    with data_manager.app.app_context():
+        for number in range(40):
+            data_manager.add_user(f"User with a fairly long name {number}")
+
+    plain = api_client.get("/api/users")
+    compressed = api_client.get("/api/users", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in plain.headers
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in compressed.headers["Vary"]
+    assert gzip.decompress(compressed.data) == plain.data
+    assert len(compressed.data) < len(plain.data)
+
+    small = api_client.get("/api/users?limit=1", headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in small.headers
+    assert json.loads(small.data)["users"][0]["user_id"] == 1
+
+
+def test_api_runs_without_optional_packages():
+    """Test that the API, its serializers and the recommendation rebuild work with no optional package installed."""
+    script = (
+        "import sys\n"
+        "for name in ('orjson', 'msgpack', 'brotli', 'aiosqlite', 'httpx', 'numpy', 'scipy'):\n"
+        "    sys.modules[name] = None\n"
+        "import api, async_api, serialization\n"
+        "from datamanager import recommendations\n"
+        "assert serialization.offered_mimetypes() == ('application/json',)\n"
+        "assert recommendations.top_neighbors([(1, 10), (1, 20)], 5)[0][:3] == (10, 20, 1)\n"
+    )
+    root = Path(__file__).resolve().parent.parent
+    result = subprocess.run([sys.executable, "-c", script], cwd=root, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
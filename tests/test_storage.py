@@ -0,0 +1,51 @@
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from datamanager.data_models import db
+from datamanager.sqllite_data_magager import SQLiteDataManager
+from datamanager.storage import resolve_storage_profile, engine_options
+
+
+def test_wal_profile_pragmas_applied(data_manager):
+    """Test that every connection of the default profile runs in WAL mode with a busy timeout."""
+    with data_manager.app.app_context():
+        assert db.session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+        assert db.session.execute(text("PRAGMA busy_timeout")).scalar() == 5000
+        assert db.session.execute(text("PRAGMA temp_store")).scalar() == 2  # MEMORY
+
+
+def test_profile_overrides_and_validation():
+    """Test that single settings can be overridden and unknown profiles are rejected."""
+    app = Flask(__name__)
+    app.config["SQLITE_PROFILE"] = "durable"
+    app.config["SQLITE_BUSY_TIMEOUT"] = "250"
+    profile = resolve_storage_profile(app)
+    assert profile["synchronous"] == "FULL"
+    assert profile["busy_timeout"] == 250
+
+    app.config["SQLITE_PROFILE"] = "turbo"
+    with pytest.raises(ValueError):
+        resolve_storage_profile(app)
+
+
+def test_memory_database_uses_static_pool():
+    """Test that an in-memory database shares one connection."""
+    profile = resolve_storage_profile(Flask(__name__))
+    assert engine_options(profile, "sqlite://")["poolclass"] is StaticPool
+
+
+def test_startup_logs_instead_of_printing(tmp_path, capsys, caplog):
+    """Test that the storage profile and applied migrations go to the app log, not to stdout."""
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'movies.db'}"
+    app.config["OMDB_CACHE_PATH"] = None
+    app.config["OMDB_MIRROR_PATH"] = None
+    with caplog.at_level("INFO", logger=app.logger.name):
+        manager = SQLiteDataManager(app)
+    manager.enrichment_queue.shutdown()
+    manager.recommendation_updater.shutdown()
+
+    assert capsys.readouterr().out == ""
+    assert any(message.startswith("SQLite storage profile 'wal'") for message in caplog.messages)
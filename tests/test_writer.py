@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+from flask import Flask
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from api import movie_to_dict
+from datamanager.data_models import db, ReviewStats
+from datamanager.sqllite_data_magager import SQLiteDataManager
+from tests.conftest import MOVIES
+
+
+@pytest.fixture
+def writer_manager(tmp_path):
+    """Set up a data manager whose writes go through the single writer thread."""
+    app = Flask(__name__)
+    app.config["TESTING"] = True
+    app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{tmp_path / 'movies.db'}"
+    app.config["OMDB_CACHE_PATH"] = None
+    app.config["OMDB_MIRROR_PATH"] = None
+    app.config["SQLITE_WRITER"] = True
+    manager = SQLiteDataManager(app)
+    manager.fetch_movie_details = lambda title: MOVIES.get(title.strip().lower())
+    yield manager
+    manager.enrichment_queue.shutdown()
+    manager.recommendation_updater.shutdown()
+    manager.writer.shutdown()
+
+
+def test_writes_return_usable_objects(writer_manager):
+    """Test that the data manager works the same with its writes on the writer thread."""
+    with writer_manager.app.app_context():
+        user_id = writer_manager.add_user("Writer").user_id
+        movie = writer_manager.add_movie(user_id, "Inception")
+        assert movie_to_dict(movie)["title"] == "Inception"
+        assert writer_manager.add_movie(user_id, "No Such Movie") is None
+
+        review = writer_manager.add_review(user_id, movie.movie_id, "Great", 9)
+        assert review.review_id is not None
+        assert writer_manager.get_review_stats(ReviewStats.MOVIE, movie.movie_id).review_count == 1
+
+        updated = writer_manager.update_movie(movie.movie_id, "Interstellar", "Christopher Nolan", 2014, 8.7)
+        assert updated.movie_name == "Interstellar"
+        results, _ = writer_manager.add_movies_bulk(user_id, ["Inception", "Unknown"])
+        assert [result["status"] for result in results] == ["added", "not_found"]
+
+        assert writer_manager.delete_movie(movie.movie_id)
+        assert [m.movie_name for m in writer_manager.get_user_movies(user_id)] == ["Inception"]
+        assert writer_manager.delete_user(user_id)
+        assert writer_manager.get_user(user_id) is None
+
+
+def test_reads_use_read_only_connections(writer_manager):
+    """Test that sessions outside the writer thread cannot write."""
+    with writer_manager.app.app_context():
+        with pytest.raises(OperationalError, match="readonly|read-only|query_only"):
+            db.session.execute(text("INSERT INTO users (name) VALUES ('sneaky')"))
+        db.session.rollback()
+
+
+def test_bursts_of_reviews_are_group_committed(writer_manager):
+    """Test that concurrent writes all succeed and share transactions."""
+    with writer_manager.app.app_context():
+        user_id = writer_manager.add_user("Reviewer").user_id
+        movie_id = writer_manager.add_movie(user_id, "Inception").movie_id
+    writer_manager.recommendation_updater.wait()  # Ratings below RECOMMEND_LIKE_RATING queue no more updates
+    before = writer_manager.writer.stats()
+    errors = []
+
+    def review(thread):
+        with writer_manager.app.app_context():
+            for number in range(20):
+                try:
+                    writer_manager.add_review(user_id, movie_id, f"Review {thread}-{number}", 1 + number % 6)
+                except Exception as e:
+                    errors.append(e)
+
+    threads = [threading.Thread(target=review, args=(number,)) for number in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    with writer_manager.app.app_context():
+        assert writer_manager.get_review_stats(ReviewStats.MOVIE, movie_id).review_count == 320
+    after = writer_manager.writer.stats()
+    assert after["jobs"] - before["jobs"] == 320
+    assert after["batches"] - before["batches"] < 320
+
+
+def test_failing_write_only_undoes_itself(writer_manager):
+    """Test that a write raising inside a batch does not take the other writes of the batch down."""
+    writer_manager.writer.commit_window = 0.2
+    outcomes = {}
+
+    def failing():
+        db.session.execute(text("INSERT INTO users (name) VALUES ('rolled back')"))
+        raise ValueError("boom")
+
+    def run(name, function, *args):
+        with writer_manager.app.app_context():
+            try:
+                outcomes[name] = writer_manager.writer.run(function, *args)
+            except ValueError as e:
+                outcomes[name] = e
+
+    threads = [threading.Thread(target=run, args=("failing", failing)),
+               threading.Thread(target=run, args=("user", lambda: writer_manager.add_user("Kept").user_id))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert isinstance(outcomes["failing"], ValueError)
+    with writer_manager.app.app_context():
+        assert [user.name for user in writer_manager.get_all_users()] == ["Kept"]
+    assert writer_manager.writer.stats()["batches"] == 1